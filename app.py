@@ -1,15 +1,71 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import gzip
+import io
+import json
 from flask_cors import CORS
 import logging
-from database import get_db
-from scraper import BusinessScraper
+import os
+import re
+import time
+import uuid
+from datetime import timedelta
+from database import get_db, parse_fields, validate_business, IMPORT_BATCH
+from export import EXPORT_FORMATS, export_stream
+from metrics import METRICS
+from records import CARD_FIELDS
+from scraper import BusinessScraper, crawl_depth
+from batch import BatchScraper, MAX_BATCH_SIZE, DEFAULT_CONCURRENCY, DEFAULT_PER_HOST
+from jobs import JobManager
+from logs import REQUEST_LOGGER, configure_logging, request_id
+from refresh import RefreshScheduler, DEFAULT_MAX_AGE, DEFAULT_RATE
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is slower but equivalent
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # responses are gzipped instead
+    brotli = None
+
+json_loads = orjson.loads if orjson else json.loads
+
+# JSON responses smaller than this go out uncompressed
+COMPRESS_MIN_SIZE = 1024
+
+# Moderate levels: most of the size reduction for a fraction of the CPU time
+# the maximum levels take
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
 
 # Setup logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
+# Per-request lines, sampled by LOG_SAMPLE_RATE
+request_log = logging.getLogger(REQUEST_LOGGER)
+
+# Incoming X-Request-ID values we reuse rather than replace
+REQUEST_ID_PATTERN = re.compile(r'[\w.:-]{1,64}')
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify() through orjson, writing bytes straight into the response"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default), mimetype=self.mimetype)
 
 # Create Flask app
 app = Flask(__name__)
+if orjson:
+    app.json = OrjsonProvider(app)
 
 CORS(app, origins=[
     "http://localhost:3000", 
@@ -21,6 +77,66 @@ CORS(app, origins=[
 # Initialize database and scraper
 db = get_db()
 scraper = BusinessScraper()
+jobs = JobManager(scraper)
+
+# Set REFRESH_MAX_AGE_HOURS to re-scrape stale businesses on a schedule;
+# POST /api/refresh runs a pass on demand either way
+refresh_hours = os.environ.get('REFRESH_MAX_AGE_HOURS')
+refresher = RefreshScheduler(
+    db, jobs,
+    max_age=timedelta(hours=float(refresh_hours)) if refresh_hours else DEFAULT_MAX_AGE,
+    rate=float(os.environ.get('REFRESH_RATE', DEFAULT_RATE))
+)
+if refresh_hours:
+    refresher.start()
+
+@app.before_request
+def start_request():
+    """Tag everything logged for this request with its id"""
+    g.started = time.perf_counter()
+    incoming = request.headers.get('X-Request-ID', '')
+    request_id.set(incoming if REQUEST_ID_PATTERN.fullmatch(incoming) else uuid.uuid4().hex)
+
+def compress_response(response):
+    """Brotli- or gzip-encode a JSON body the client accepts compressed"""
+    if (response.mimetype != 'application/json' or response.direct_passthrough
+            or response.is_streamed or 'Content-Encoding' in response.headers):
+        return
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return
+    encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+    if encoding == 'br':
+        data = brotli.compress(data, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=GZIP_LEVEL)
+    else:
+        return
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes differ, so an ETag can only claim the same content
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+@app.after_request
+def finish_request(response):
+    """Compress, echo the request id and write the access line"""
+    compress_response(response)
+    response.headers['X-Request-ID'] = request_id.get()
+    if request_log.isEnabledFor(logging.INFO):
+        duration_ms = (time.perf_counter() - g.started) * 1000
+        request_log.info('%s %s %s %.1fms', request.method, request.path, response.status_code, duration_ms,
+                         extra={'method': request.method, 'path': request.path,
+                                'status': response.status_code, 'duration_ms': round(duration_ms, 2)})
+    return response
+
+def normalize_url(url):
+    """Add a scheme to bare domains"""
+    if not url.startswith(('http://', 'https://')):
+        url = f'https://{url}'
+    return url
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -28,36 +144,202 @@ def health_check():
     return jsonify({
         'success': True,
         'status': 'healthy',
-        'message': 'Business Scraper API is running'
+        'message': 'Business Scraper API is running',
+        'pid': os.getpid(),
+        'fetch_cache': scraper.cache.info() if scraper.cache else None
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Scrape stage and per-extractor timings in Prometheus text format"""
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/businesses', methods=['GET'])
 def get_businesses():
-    """Get businesses with search and pagination"""
+    """Get businesses with search and pagination.
+
+    Each business has the CARD_FIELDS a list view shows, or the
+    comma-separated fields= given. The full record is at
+    /api/businesses/<id>.
+    """
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 12))
         search = request.args.get('search', '').strip()
         sort_by = request.args.get('sort_by', 'scraped_date')
+        after = request.args.get('after')
+        
+        request_log.debug('List businesses: page=%s search=%r sort_by=%s', page, search, sort_by)
+        
+        try:
+            fields = parse_fields(request.args['fields']) if 'fields' in request.args else CARD_FIELDS
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        print(f"🔍 API Request: page={page}, search='{search}', sort_by={sort_by}")
+        # Nothing written since the client's copy: skip the query entirely.
+        # Weak, since the same page may go out compressed or not.
+        etag = db.etag()
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         
-        result = db.get_businesses(
-            search=search,
-            sort_by=sort_by,
-            page=page,
-            per_page=per_page
-        )
+        try:
+            result = db.get_businesses(
+                search=search,
+                sort_by=sort_by,
+                page=page,
+                per_page=per_page,
+                after=after,
+                fields=fields
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         if result['success']:
-            print(f"✅ Returning {len(result['data'])} businesses")
+            request_log.debug('Returning %d businesses', len(result['data']))
+            response = jsonify(result)
+            response.set_etag(etag, weak=True)
+            # Browsers may keep the response but must revalidate it each time
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        else:
+            logger.error('Database error: %s', result['error'])
+            return jsonify({'success': False, 'error': result['error']}), 500
+            
+    except Exception as e:
+        logger.exception('API error: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/businesses/facets', methods=['GET'])
+def get_facets():
+    """Business counts by industry, business_type, company_size and founded decade"""
+    try:
+        search = request.args.get('search', '').strip()
+        
+        etag = db.etag()
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        result = db.get_facets(search=search)
+        if not result['success']:
+            logger.error('Database error: %s', result['error'])
+            return jsonify(result), 500
+        
+        response = jsonify(result)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+        
+    except Exception as e:
+        logger.exception('API error: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/businesses/export', methods=['GET'])
+def export_businesses():
+    """Stream every matching business as NDJSON, CSV or Parquet"""
+    export_format = request.args.get('format', 'ndjson')
+    search = request.args.get('search', '').strip()
+    sort_by = request.args.get('sort_by', 'scraped_date')
+    since = request.args.get('since')
+    
+    try:
+        chunks = db.export_businesses(search=search, sort_by=sort_by, since=since)
+        body = export_stream(chunks, export_format)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    logger.info('Exporting businesses as %s (search=%r, since=%s)', export_format, search, since)
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=businesses.{extension}',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Bad lines reported back from one bulk import; the rest are only counted
+MAX_IMPORT_ERRORS = 100
+
+@app.route('/api/businesses/bulk', methods=['POST'])
+def import_businesses():
+    """Upsert businesses from an NDJSON body, one record per line"""
+    summary = {'received': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0, 'rejected': 0}
+    errors = []
+    
+    def write(batch):
+        for outcome, count in db.import_businesses(batch).items():
+            summary[outcome] += count
+    
+    try:
+        batch = []
+        # Buffered, so lines aren't read a byte at a time off the raw stream
+        for line_number, line in enumerate(io.BufferedReader(request.stream), 1):
+            if not line.strip():
+                continue
+            summary['received'] += 1
+            try:
+                batch.append(validate_business(json_loads(line)))
+            except ValueError as e:
+                summary['rejected'] += 1
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append({'line': line_number, 'error': str(e)})
+                continue
+            if len(batch) >= IMPORT_BATCH:
+                write(batch)
+                batch = []
+        if batch:
+            write(batch)
+        
+        logger.info('Bulk import: %d received, %d rejected', summary['received'], summary['rejected'],
+                    extra=summary)
+        return jsonify({'success': True, 'summary': summary, 'errors': errors})
+        
+    except Exception as e:
+        logger.exception('Bulk import error: %s', e)
+        return jsonify({'success': False, 'error': str(e), 'summary': summary, 'errors': errors}), 500
+
+@app.route('/api/businesses', methods=['DELETE'])
+def delete_businesses():
+    """Delete several businesses: {"ids": [1, 2, 3]}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        
+        if not isinstance(ids, list) or not ids:
+            return jsonify({'success': False, 'error': 'ids must be a non-empty list'}), 400
+        if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'success': False, 'error': 'ids must be integers'}), 400
+        
+        result = db.delete_businesses(ids)
+        
+        if result['success']:
+            logger.info('Deleted %d businesses', len(result['deleted']))
             return jsonify(result)
         else:
-            print(f"❌ Database error: {result['error']}")
             return jsonify({'success': False, 'error': result['error']}), 500
             
     except Exception as e:
-        print(f"❌ API error: {e}")
+        logger.exception('Delete error: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/businesses/<int:business_id>', methods=['GET'])
+def get_business(business_id):
+    """Get a single business"""
+    try:
+        result = db.get_business(business_id)
+        
+        if result['success']:
+            return jsonify(result)
+        elif result['error'] == 'Business not found':
+            return jsonify({'success': False, 'error': result['error']}), 404
+        else:
+            return jsonify({'success': False, 'error': result['error']}), 500
+            
+    except Exception as e:
+        logger.exception('API error: %s', e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/businesses/<int:business_id>', methods=['DELETE'])
@@ -67,13 +349,13 @@ def delete_business(business_id):
         result = db.delete_business(business_id)
         
         if result['success']:
-            print(f"🗑️ Deleted business ID: {business_id}")
+            logger.info('Deleted business ID: %s', business_id)
             return jsonify({'success': True, 'message': 'Business deleted successfully'})
         else:
             return jsonify({'success': False, 'error': result['error']}), 404
             
     except Exception as e:
-        print(f"❌ Delete error: {e}")
+        logger.exception('Delete error: %s', e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/scrape', methods=['POST'])
@@ -88,31 +370,153 @@ def scrape_business():
         if not url:
             return jsonify({'success': False, 'error': 'URL cannot be empty'}), 400
         
-        if not url.startswith(('http://', 'https://')):
-            url = f'https://{url}'
+        url = normalize_url(url)
         
-        print(f"🔍 Scraping URL: {url}")
+        try:
+            depth = crawl_depth(data.get('depth'))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'depth must be an integer'}), 400
         
-        result = scraper.scrape_business(url)
+        request_log.debug('Scraping URL: %s (depth %d)', url, depth)
+        
+        result = scraper.scrape_business(url, depth)
         
         if result['success']:
-            print(f"✅ Successfully scraped: {result['data']['company_name']}")
+            request_log.debug('Scraped: %s', result['data']['company_name'])
             return jsonify(result)
         else:
-            print(f"❌ Scraping failed: {result['error']}")
+            logger.warning('Scraping %s failed: %s', url, result['error'])
             return jsonify(result), 400
             
     except Exception as e:
-        print(f"❌ Scrape error: {e}")
+        logger.exception('Scrape error: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/scrape/batch', methods=['POST'])
+def scrape_batch():
+    """Scrape many business websites concurrently"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('urls'), list):
+            return jsonify({'success': False, 'error': 'urls must be a list'}), 400
+        
+        urls = [normalize_url(str(url).strip()) for url in data['urls'] if str(url).strip()]
+        if not urls:
+            return jsonify({'success': False, 'error': 'URL list cannot be empty'}), 400
+        if len(urls) > MAX_BATCH_SIZE:
+            return jsonify({'success': False, 'error': f'At most {MAX_BATCH_SIZE} URLs per batch'}), 400
+        
+        concurrency = int(data.get('concurrency', DEFAULT_CONCURRENCY))
+        per_host = int(data.get('per_host', DEFAULT_PER_HOST))
+        
+        logger.info('Batch scraping %d URLs (concurrency=%d, per_host=%d)', len(urls), concurrency, per_host)
+        
+        batch = BatchScraper(scraper, concurrency=concurrency, per_host=per_host, depth=data.get('depth'))
+        results = batch.scrape_many(urls)
+        succeeded = sum(1 for r in results if r['success'])
+        
+        logger.info('Batch done: %d/%d succeeded', succeeded, len(results))
+        return jsonify({
+            'success': True,
+            'data': results,
+            'summary': {
+                'total': len(results),
+                'succeeded': succeeded,
+                'failed': len(results) - succeeded
+            }
+        })
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid batch options: {e}'}), 400
+    except Exception as e:
+        logger.exception('Batch scrape error: %s', e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/jobs', methods=['POST'])
+def submit_jobs():
+    """Queue background scrapes and return their job IDs"""
+    try:
+        data = request.get_json()
+        if not data or not ('url' in data or isinstance(data.get('urls'), list)):
+            return jsonify({'success': False, 'error': 'URL is required'}), 400
+        
+        raw_urls = data['urls'] if 'urls' in data else [data['url']]
+        urls = [normalize_url(str(url).strip()) for url in raw_urls if str(url).strip()]
+        if not urls:
+            return jsonify({'success': False, 'error': 'URL cannot be empty'}), 400
+        if len(urls) > MAX_BATCH_SIZE:
+            return jsonify({'success': False, 'error': f'At most {MAX_BATCH_SIZE} URLs per request'}), 400
+        
+        try:
+            depth = crawl_depth(data.get('depth'))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'depth must be an integer'}), 400
+        
+        submitted = [jobs.submit(url, depth).to_dict() for url in urls]
+        logger.info('Queued %d scrape job(s)', len(submitted))
+        
+        return jsonify({'success': True, 'data': submitted}), 202
+        
+    except Exception as e:
+        logger.exception('Job submit error: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/refresh', methods=['POST'])
+def start_refresh():
+    """Re-scrape businesses older than max_age_hours in the background"""
+    try:
+        data = request.get_json(silent=True) or {}
+        max_age = None
+        if 'max_age_hours' in data:
+            hours = float(data['max_age_hours'])
+            if hours < 0:
+                return jsonify({'success': False, 'error': 'max_age_hours cannot be negative'}), 400
+            max_age = timedelta(hours=hours)
+        
+        if not refresher.trigger(max_age):
+            return jsonify({'success': False, 'error': 'A refresh is already running'}), 409
+        
+        logger.info('Refresh started')
+        return jsonify({'success': True, 'message': 'Refresh started'}), 202
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid max_age_hours: {e}'}), 400
+    except Exception as e:
+        logger.exception('Refresh error: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the state of a scrape job"""
+    job = jobs.snapshot(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'data': job})
+
+@app.route('/api/jobs/stream', methods=['GET'])
+def stream_jobs():
+    """Stream job updates as NDJSON (or SSE with format=sse) until all finish"""
+    job_ids = [i for i in request.args.get('ids', '').split(',') if i]
+    if not job_ids:
+        return jsonify({'success': False, 'error': 'ids is required'}), 400
+    
+    sse = request.args.get('format') == 'sse'
+    
+    def generate():
+        for snapshot in jobs.watch(job_ids):
+            line = json.dumps(snapshot)
+            yield f"data: {line}\n\n" if sse else f"{line}\n"
+    
+    mimetype = 'text/event-stream' if sse else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
-    print("🚀 Starting Business Scraper API...")
-    print("🌐 API running on: http://localhost:5003")
-    print("📋 Health check: http://localhost:5003/api/health")
+    logger.info('Starting Business Scraper API on http://localhost:5003 (health check: /api/health)')
     
     app.run(
         host='0.0.0.0',
         port=5003,
-        debug=True
+        debug=True,
+        threaded=True
     )
\ No newline at end of file
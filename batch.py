@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from fetcher import FetchError
+from scraper import (analyze_business, crawl_depth, is_unchanged, merge_business, record_timings,
+                     subpage_fields)
+
+logger = logging.getLogger(__name__)
+
+# Limits for a single batch request
+MAX_BATCH_SIZE = 5000
+DEFAULT_CONCURRENCY = 16
+MAX_CONCURRENCY = 256
+DEFAULT_PER_HOST = 2
+
+# Parsing is CPU-bound, so it runs in worker processes shared by all batches
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """Get the shared process pool for HTML parsing"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _parse_pool
+
+
+async def parse_in_pool(content, url, known_hash=None, fields=None, depth=0):
+    """Parse a page in the process pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    business_data, timings = await loop.run_in_executor(get_parse_pool(), analyze_business,
+                                                        content, url, known_hash, None, fields, depth)
+    record_timings(timings)
+    return business_data
+
+
+async def parse_site(scraper, url, body, known_hash=None, depth=0):
+    """Parse a landing page in the pool and, with a depth, merge in its subpages.
+
+    The subpages are fetched while the landing page is parsed, then parsed
+    in the pool together.
+    """
+    crawl = asyncio.ensure_future(scraper.fetch_subpages(url, body, depth)) if depth else None
+    business_data = await parse_in_pool(body, url, known_hash, depth=depth)
+    if crawl is None:
+        return business_data
+    if is_unchanged(business_data):
+        crawl.cancel()
+        return business_data
+    subpages = await asyncio.gather(*(parse_in_pool(content, page_url, fields=subpage_fields(kind))
+                                      for kind, page_url, content in await crawl))
+    return merge_business(business_data, subpages)
+
+
+class BatchScraper:
+    def __init__(self, scraper, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, depth=None):
+        """Scrape many URLs with bounded fetch concurrency, crawling depth levels of subpages"""
+        self.scraper = scraper
+        self.concurrency = max(1, min(concurrency, MAX_CONCURRENCY))
+        self.per_host = max(1, per_host)
+        self.depth = crawl_depth(depth)
+
+    async def _scrape_one(self, url, slots, hosts):
+        """Fetch, parse and store a single URL"""
+        try:
+            host = urlsplit(url).hostname or ''
+            if host not in hosts:
+                hosts[host] = asyncio.Semaphore(self.per_host)
+
+            async with slots, hosts[host]:
+                fetched = await self.scraper.fetch_page(url, self.depth)
+
+            # Database calls are SQLite queries; keep them off the loop
+            loop = asyncio.get_running_loop()
+            business_data = fetched.data
+            if business_data is None:
+                known_hash = await loop.run_in_executor(None, self.scraper.known_hash, url, fetched.response)
+                business_data = await parse_site(self.scraper, url, fetched.response.body, known_hash,
+                                                 self.depth)
+
+            result = await loop.run_in_executor(None, self.scraper.save, business_data)
+            if result['success']:
+                await loop.run_in_executor(None, self.scraper.remember, url, fetched, result['data'])
+                return {"url": url, "success": True, "data": result['data']}
+            return {"url": url, "success": False, "error": result['error']}
+
+        except FetchError as e:
+            return {"url": url, "success": False, "error": f"Failed to access website: {str(e)}"}
+        except Exception as e:
+            return {"url": url, "success": False, "error": f"Scraping failed: {str(e)}"}
+
+    async def _scrape_all(self, urls):
+        slots = asyncio.Semaphore(self.concurrency)
+        hosts = {}
+        tasks = [asyncio.ensure_future(self._scrape_one(url, slots, hosts)) for url in urls]
+
+        for future in asyncio.as_completed(tasks):
+            result = await future
+            if result['success']:
+                logger.debug('Batch scraped: %s', result['url'])
+            else:
+                logger.warning('Batch failed: %s (%s)', result['url'], result['error'])
+
+        return [task.result() for task in tasks]
+
+    def scrape_many(self, urls):
+        """Scrape every URL, storing results as they finish.
+
+        Fetches run on the shared fetcher event loop. Returns one result per
+        URL, in the order the URLs were given.
+        """
+        return self.scraper.fetcher.call(self._scrape_all(urls))
@@ -0,0 +1,89 @@
+"""Fetch throughput against a local slow server: blocking requests vs AsyncFetcher
+
+Run from the repo root:  python benchmarks/bench_fetcher.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from fetcher import AsyncFetcher
+
+LATENCY = 0.2
+PAGES = 1000
+BODY = b'<html><head><title>Bench</title></head><body>' + b'<p>hello</p>' * 2000 + b'</body></html>'
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under a burst of clients
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def start_server():
+    server = Server(('127.0.0.1', 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    server = start_server()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    # Distinct paths, one host: per-host caps apply, as on a real site crawl
+    urls = [f'{base}/page/{i}' for i in range(PAGES)]
+
+    print(f"{PAGES} pages, {LATENCY * 1000:.0f}ms server latency")
+    print(f"{'mode':<28} {'threads':>8} {'seconds':>8} {'pages/s':>8}")
+
+    def report(mode, threads, elapsed):
+        print(f"{mode:<28} {threads:>8} {elapsed:>8.2f} {PAGES / elapsed:>8.0f}")
+
+    session = requests.Session()
+    start = time.perf_counter()
+    for url in urls[:PAGES // 10]:
+        session.get(url, timeout=10).content
+    report('requests, sequential', 1, (time.perf_counter() - start) * 10)
+
+    for workers in (16, 256):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda u: session.get(u, timeout=10).content, urls))
+        report(f'requests, {workers} threads', workers, time.perf_counter() - start)
+
+    for per_host in (16, 256):
+        fetcher = AsyncFetcher(per_host=per_host)
+
+        async def fetch_all():
+            return await asyncio.gather(*(fetcher.fetch(url) for url in urls))
+
+        start = time.perf_counter()
+        fetcher.call(fetch_all())
+        report(f'AsyncFetcher, per_host={per_host}', 1, time.perf_counter() - start)
+        fetcher.close()
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Bulk import throughput through POST /api/businesses/bulk
+
+Posts an NDJSON body of synthetic records to a store that starts empty,
+then posts it again so every line is an update. Compares against
+insert_business() one record at a time.
+
+Run from the repo root:  python benchmarks/bench_import.py [--rows 100000] [--content-bytes 200]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep app.py on an in-memory catalog and off the response cache
+os.environ['DATABASE_PATH'] = ''
+os.environ['FETCH_CACHE_PATH'] = ''
+
+from bench_storage import make_records
+from database import Database, MemoryStore, SQLiteStore
+import app
+
+
+def ndjson(count, content_bytes):
+    lines = []
+    for record in make_records(count, content_bytes):
+        del record['scraped_date'], record['last_updated']
+        lines.append(json.dumps(record))
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def post(client, body):
+    start = time.perf_counter()
+    response = client.post('/api/businesses/bulk', data=body)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.json
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--content-bytes', type=int, default=200)
+    parser.add_argument('--single', type=int, default=5_000, help='rows for the insert_business() baseline')
+    args = parser.parse_args()
+
+    body = ndjson(args.rows, args.content_bytes)
+    client = app.app.test_client()
+    print(f"{args.rows:,} records, {len(body) / args.rows:,.0f} bytes per NDJSON line")
+    print(f"{'store':<8} {'one by one/s':>13} {'bulk insert/s':>14} {'bulk update/s':>14}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = iter(os.path.join(tmp, f'{i}.db') for i in range(4))
+        for name, make_store in (('memory', MemoryStore), ('sqlite', lambda: SQLiteStore(next(paths)))):
+            single = Database(make_store())
+            records = [json.loads(line) for line in body.splitlines()[:args.single]]
+            start = time.perf_counter()
+            for record in records:
+                single.insert_business(record)
+            one_by_one = len(records) / (time.perf_counter() - start)
+
+            app.db = Database(make_store())
+            inserted = args.rows / post(client, body)
+            updated = args.rows / post(client, body)
+            print(f"{name:<8} {one_by_one:>13,.0f} {inserted:>14,.0f} {updated:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
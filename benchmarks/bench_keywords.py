@@ -0,0 +1,92 @@
+"""Keyword classification on large synthetic pages: any() chains vs KeywordClassifier
+
+Run from the repo root:  python benchmarks/bench_keywords.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import (
+    BUSINESS_TYPE_RULES, INDUSTRY_RULES, COMPANY_SIZE_RULES, KeywordClassifier,
+)
+
+FILLER = (
+    'our people work with partners around the world to deliver results '
+    'that matter for every customer we serve each and every day'
+).split()
+
+
+def make_text(target_bytes, seed=0):
+    """Lowercased page text with no keyword hits, the worst case for any() chains"""
+    rng = random.Random(seed)
+    words = []
+    size = 0
+    while size < target_bytes:
+        word = rng.choice(FILLER)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)
+
+
+def legacy_classify(rules, default, content):
+    """The old if/elif chain of any(word in content ...) checks"""
+    for category, words in rules:
+        if any(word in content for word in words):
+            return category
+    return default
+
+
+def widen(rules, factor, seed=1):
+    """Pad every category with random keywords to grow the table"""
+    rng = random.Random(seed)
+    wide = []
+    for category, words in rules:
+        extra = [
+            ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+            for _ in range(len(words) * (factor - 1))
+        ]
+        wide.append((category, words + extra))
+    return wide
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'text':>8} {'keywords':>9} {'any() chains (ms)':>18} {'classifier (ms)':>16}")
+    for size in (1_000_000, 3_000_000):
+        text = make_text(size)
+        for factor in (1, 10, 30):
+            tables = {
+                'business_type': (widen(BUSINESS_TYPE_RULES, factor), 'Business Services'),
+                'industry': (widen(INDUSTRY_RULES, factor), 'Other'),
+                'company_size': (widen(COMPANY_SIZE_RULES, factor), 'Unknown'),
+            }
+            keyword_count = sum(len(words) for rules, _ in tables.values() for _, words in rules)
+            classifier = KeywordClassifier(tables)
+
+            def legacy():
+                for rules, default in tables.values():
+                    legacy_classify(rules, default, text)
+
+            def compiled():
+                hits = classifier.scan(text)
+                for table in tables:
+                    classifier.classify(hits, table)
+
+            print(f"{size // 1000:>6}KB {keyword_count:>9} "
+                  f"{timed(legacy) * 1000:>18.1f} {timed(compiled) * 1000:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
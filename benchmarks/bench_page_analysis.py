@@ -0,0 +1,122 @@
+"""Time per page for business extraction: repeated get_text() vs PageAnalysis
+
+Run from the repo root:  python benchmarks/bench_page_analysis.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from scraper import BusinessExtractor, PageAnalysis
+
+WORDS = (
+    'cloud platform customers growth team global solutions enterprise '
+    'innovation partners support secure data analytics marketing revenue'
+).split()
+
+
+def make_page(target_bytes, seed=0):
+    """Build a synthetic marketing page of roughly target_bytes"""
+    rng = random.Random(seed)
+    parts = [
+        '<html><head><title>Acme Corp - Home</title>',
+        '<meta name="description" content="Acme builds software for modern teams">',
+        '</head><body><header><nav><a href="/about">About</a></nav></header><main>',
+    ]
+    size = sum(len(p) for p in parts)
+    while size < target_bytes:
+        sentence = ' '.join(rng.choice(WORDS) for _ in range(40))
+        chunk = (
+            f'<section><div class="card"><h2>{rng.choice(WORDS).title()}</h2>'
+            f'<p>{sentence}</p><a href="https://example.com/{rng.randint(0, 10**6)}">more</a>'
+            f'</div></section>'
+        )
+        parts.append(chunk)
+        size += len(chunk)
+    parts.append('<p>Headquartered in Austin, TX. Founded in 2004.</p>')
+    parts.append('</main><footer><a href="https://linkedin.com/company/acme">LinkedIn</a></footer></body></html>')
+    return ''.join(parts)
+
+
+class LegacyPage:
+    """Stand-in for PageAnalysis with the old cost model: every read of the
+    page text walks the whole tree again, as the extractors used to do"""
+
+    def __init__(self, soup):
+        self.soup = soup
+        title = soup.find('title')
+        self.title = title.get_text() if title is not None else None
+
+    @property
+    def text(self):
+        return self.soup.get_text()
+
+    @property
+    def text_lower(self):
+        return self.soup.get_text().lower()
+
+    @property
+    def clean_text(self):
+        for element in self.soup(['script', 'style', 'nav', 'header', 'footer']):
+            element.decompose()
+        return self.soup.get_text()
+
+    @property
+    def clean_text_lower(self):
+        return self.clean_text.lower()
+
+    @property
+    def links(self):
+        return [a['href'] for a in self.soup.find_all('a', href=True)]
+
+    @property
+    def paragraphs(self):
+        return [p.get_text() for p in self.soup.find_all('p')]
+
+    @property
+    def main_text(self):
+        for element in self.soup(['script', 'style', 'nav', 'header', 'footer']):
+            element.decompose()
+        main = self.soup.find('main') or self.soup.find('body')
+        if main is None:
+            return None
+        return ' '.join(main.get_text(separator=' ', strip=True).split())
+
+    def keyword_hits(self, classifier, clean=False):
+        return classifier.scan(self.clean_text_lower if clean else self.text_lower)
+
+    def get_meta(self, attr, key):
+        tag = self.soup.find('meta', {attr: key})
+        return None if tag is None else tag.get('content', '')
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    extractor = BusinessExtractor()
+    url = 'https://acme.example'
+    print(f"{'page size':>10} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>8}")
+    for size in (100_000, 1_000_000, 3_000_000):
+        html = make_page(size)
+        repeat = 5 if size <= 1_000_000 else 3
+        # Parsing is identical on both paths, so time extraction only
+        soups = [BeautifulSoup(html, 'html.parser') for _ in range(repeat * 2)]
+        before_soups = iter(soups[:repeat])
+        after_soups = iter(soups[repeat:])
+        before = timed(lambda: extractor.extract_business(LegacyPage(next(before_soups)), url), repeat)
+        after = timed(lambda: extractor.extract_business(PageAnalysis(next(after_soups)), url), repeat)
+        print(f"{size // 1000:>8}KB {before * 1000:>12.1f} {after * 1000:>12.1f} {before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
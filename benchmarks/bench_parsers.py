@@ -0,0 +1,79 @@
+"""Parse time per page and peak memory for each HTML parser backend
+
+Parses every saved page in benchmarks/fixtures/ (see make_fixtures.py)
+into a PageAnalysis. Each backend runs in a fresh process so its peak RSS
+growth is its own.
+
+Run from the repo root:  python benchmarks/bench_parsers.py [--budget 65536]
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scraper import PARSER_BACKENDS, parse_page
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+def load_corpus():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def measure(backend, budget, repeat):
+    """Best parse time per page (ms) and peak RSS growth (KB), in this process"""
+    pages = load_corpus()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = {}
+    for name, content in pages.items():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse_page(content, backend, budget)
+            best = min(best, time.perf_counter() - start)
+        times[name] = best * 1000
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    return times, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget', type=int, default=None,
+                        help='parse only this many leading bytes of each page')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_corpus()
+    if not pages:
+        sys.exit('No fixtures found; run benchmarks/make_fixtures.py first')
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for backend in PARSER_BACKENDS:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[backend] = pool.submit(measure, backend, args.budget, args.repeat).result()
+
+    print(f"budget: {args.budget or 'none'}")
+    print(f"{'page':<26} {'bytes':>9}" + ''.join(f" {b + ' ms':>16}" for b in PARSER_BACKENDS))
+    for name, content in pages.items():
+        print(f"{name:<26} {len(content):>9,}"
+              + ''.join(f" {results[b][0][name]:>16.2f}" for b in PARSER_BACKENDS))
+    print(f"{'total':<26} {sum(len(c) for c in pages.values()):>9,}"
+          + ''.join(f" {sum(results[b][0].values()):>16.2f}" for b in PARSER_BACKENDS))
+    print(f"{'peak RSS growth (KB)':<36}"
+          + ''.join(f" {results[b][1]:>16,}" for b in PARSER_BACKENDS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Size and server time of a /api/businesses page: full records vs the card view
+
+For each page size, reads one page from the memory store and encodes it
+the way the API can: every field or CARD_FIELDS, with json or orjson,
+raw or gzipped. Time covers building the page dicts, encoding and
+compressing.
+
+Run from the repo root:  python benchmarks/bench_payload.py [--rows 20000]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_storage import make_records
+from database import BUSINESS_FIELDS, MemoryStore
+from records import CARD_FIELDS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Same level app.py compresses responses with
+GZIP_LEVEL = 5
+
+
+def timed(fn, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--content-bytes', type=int, default=1000)
+    parser.add_argument('--per-page', type=int, nargs='+', default=[12, 100, 500])
+    args = parser.parse_args()
+
+    store = MemoryStore()
+    store.insert_many(list(make_records(args.rows, args.content_bytes)))
+
+    encoders = {'json': lambda page: json.dumps(page).encode()}
+    if orjson:
+        encoders['orjson'] = orjson.dumps
+
+    print(f"{'per_page':>8} {'view':<5} {'encoder':<7} {'bytes':>11} {'gzip bytes':>11} {'ms':>8} {'gzip ms':>8}")
+    for per_page in args.per_page:
+        for view, fields in (('full', BUSINESS_FIELDS), ('card', CARD_FIELDS)):
+            for name, encode in encoders.items():
+                def respond(compress):
+                    page, _ = store.query('', 'scraped_date', 0, per_page, None, fields)
+                    body = encode({'success': True, 'data': page})
+                    return gzip.compress(body, compresslevel=GZIP_LEVEL) if compress else body
+                raw_ms, body = timed(lambda: respond(False))
+                gzip_ms, compressed = timed(lambda: respond(True))
+                print(f'{per_page:>8} {view:<5} {name:<7} {len(body):>11,} {len(compressed):>11,}'
+                      f' {raw_ms:>8.2f} {gzip_ms:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
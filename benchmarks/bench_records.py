@@ -0,0 +1,98 @@
+"""Bytes per stored business: plain dicts vs BusinessRecord
+
+Records come from the scraper's extractor, pickled and unpickled the way
+the parse pool hands them back, so every placeholder string starts out as
+its own object just like in a running server.
+
+Run from the repo root:  python benchmarks/bench_records.py [--rows 100000]
+"""
+import argparse
+import gc
+import os
+import pickle
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from records import BUSINESS_DEFAULTS, BusinessRecord
+from scraper import BusinessExtractor, PageAnalysis
+
+WORDS = (
+    'acme global cloud health retail data systems labs partners digital '
+    'finance learning software group studio works capital network'
+).split()
+TOPICS = ['software platform', 'online store', 'medical clinic', 'consulting services',
+          'university courses', 'digital agency', 'investment banking']
+
+
+def make_page(rng, i):
+    name = ' '.join(rng.choice(WORDS).title() for _ in range(2))
+    body = ' '.join(rng.choice(WORDS) for _ in range(150))
+    return (
+        f"<html><head><title>{name} {i}</title>"
+        f"<meta name='description' content='{name} offers {rng.choice(TOPICS)}'></head>"
+        f"<body><nav>Home About</nav><main><p>{body} {rng.choice(TOPICS)}.</p>"
+        f"<p>Founded in {rng.randint(1950, 2024)}. Based in Austin, TX.</p></main></body></html>"
+    )
+
+
+def scraped_records(count, seed=0):
+    """Extractor output for distinct synthetic pages, cycled to count rows"""
+    rng = random.Random(seed)
+    extractor = BusinessExtractor()
+    pages = []
+    for i in range(min(count, 500)):
+        page = PageAnalysis(BeautifulSoup(make_page(rng, i), 'html.parser'))
+        pages.append(pickle.dumps(extractor.extract_business(page, f'https://example{i}.com')))
+    for i in range(count):
+        data = pickle.loads(pages[i % len(pages)])
+        data['url'] = f'https://example{i}.com'
+        yield data
+
+
+def as_stored_dict(data):
+    """What Database.insert_business used to keep per record"""
+    record = {'id': None}
+    for field, default in BUSINESS_DEFAULTS.items():
+        record[field] = data.get(field, default)
+    record['scraped_date'] = datetime.now().isoformat()
+    record['last_updated'] = datetime.now().isoformat()
+    return record
+
+
+def measure(build, count):
+    """Bytes still allocated per record once build() has stored count records"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sources = list(scraped_records(count))
+    stored = [build(data) for data in sources]
+    # The unpickled dicts are transient in the server; drop them too
+    sources.clear()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(stored) == count
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    dict_bytes = measure(as_stored_dict, args.rows)
+    record_bytes = measure(lambda data: BusinessRecord.from_dict(as_stored_dict(data)), args.rows)
+    print(f"{args.rows:,} records")
+    print(f"  dict            {dict_bytes:>8,.0f} bytes/record")
+    print(f"  BusinessRecord  {record_bytes:>8,.0f} bytes/record "
+          f"({dict_bytes / record_bytes:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Field extraction time: per-call findall() patterns vs the precompiled bank
+
+Times the location, founded year, contact and revenue extractors on large
+realistic text and on inputs built to make backtracking patterns slow.
+
+Run from the repo root:  python benchmarks/bench_regex.py [--kb 1024]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import BusinessExtractor
+
+WORDS = (
+    'cloud platform customers growth team global solutions enterprise '
+    'innovation partners support secure data analytics marketing revenue '
+    'software healthcare learning retail consulting startup services'
+).split()
+
+
+class Page:
+    """Just the text attributes the extractors read"""
+    def __init__(self, text):
+        self.text = text
+        self.clean_text = text.lower()
+
+
+def legacy_extract(page):
+    """What the extractors did before: compile-per-call findall() over the whole text"""
+    content = page.text
+    location = 'Unknown'
+    for pattern in [r'(?:located|based|headquartered)\s+(?:in|at)\s+([A-Z][a-z]+(?:,\s*[A-Z]{2,3})?)',
+                    r'([A-Z][a-z]+,\s*[A-Z]{2})']:
+        matches = re.findall(pattern, content)
+        if matches:
+            location = matches[0]
+            break
+
+    founded = 'Unknown'
+    current_year = datetime.now().year
+    for pattern in [r'founded\s+in\s+(\d{4})', r'established\s+in\s+(\d{4})',
+                    r'started\s+in\s+(\d{4})', r'since\s+(\d{4})']:
+        years = [m for m in re.findall(pattern, content, re.IGNORECASE) if 1800 <= int(m) <= current_year]
+        if years:
+            founded = years[0]
+            break
+
+    emails = re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', content)
+    phones = re.findall(r'(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}', content)
+    contact = []
+    if emails:
+        contact.append(f"Email: {emails[0]}")
+    if phones:
+        contact.append(f"Phone: {phones[0]}")
+
+    revenue = re.findall(r'\$(\d+(?:,\d{3})*(?:\.\d+)?)\s*(?:million|billion|M|B)',
+                         page.clean_text, re.IGNORECASE)
+    return (location, founded, ', '.join(contact) if contact else 'Contact info not found',
+            f"${revenue[0]}" if revenue else 'Not disclosed')
+
+
+def current_extract(page, extractor=BusinessExtractor()):
+    return (extractor._get_location(page), extractor._get_founded_year(page),
+            extractor._get_contact_info(page), extractor._get_revenue(page))
+
+
+def realistic(rng, size):
+    """Marketing copy with the interesting facts near the top and repeated below"""
+    facts = ('Founded in 2012 and headquartered in Austin, TX. Contact sales@acme.example '
+             'or call (512) 555-0199. Revenue of $40 million in 2023. Since 2015 we have grown. ')
+    parts, total = [facts], len(facts)
+    while total < size:
+        line = ' '.join(rng.choice(WORDS) for _ in range(40)).capitalize() + '. '
+        parts.append(line)
+        total += len(line)
+    return ''.join(parts)
+
+
+def corpus(kb):
+    rng = random.Random(2024)
+    size = kb * 1024
+    return {
+        'realistic': realistic(rng, size),
+        'facts at the end': realistic(rng, size)[200:] + ' Established in 1999 in Boston, MA.',
+        # One long token with no '@': the old email pattern rescans it from every offset
+        'address run, no @': 'a' * (size // 64),
+        'digit soup': ''.join(rng.choice('0123456789 -.') for _ in range(size)),
+        '$ and long digits': ('$' + '1' * 200 + ' ') * (size // 202),
+    }
+
+
+def timed(fn, arg, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--kb', type=int, default=1024, help='size of each input text')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'input':<20} {'chars':>10} {'findall ms':>12} {'bank ms':>10} {'same':>6}")
+    for name, text in corpus(args.kb).items():
+        page = Page(text)
+        old_ms, old = timed(legacy_extract, page, args.repeat)
+        new_ms, new = timed(current_extract, page, args.repeat)
+        print(f"{name:<20} {len(text):>10,} {old_ms:>12.2f} {new_ms:>10.2f} {str(old == new):>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Search latency as the catalog grows: linear substring scan vs search indexes
+
+Run from the repo root:  python benchmarks/bench_search.py [--rows 10000 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_storage import make_records
+from database import MemoryStore, SQLiteStore
+
+
+def queries_for(count):
+    """Queries from one exact record up to half the catalog"""
+    return [str(count // 2), 'austin', 'glob', 'cloud health', 'nomatch']
+
+
+def linear_search(businesses, search_term):
+    """The scan get_businesses used to do: rebuild and lowercase every record's text"""
+    search_term = search_term.lower()
+    matches = []
+    for business in businesses:
+        searchable_text = (
+            str(business.get('company_name', '')).lower() + ' ' +
+            str(business.get('business_type', '')).lower() + ' ' +
+            str(business.get('industry', '')).lower() + ' ' +
+            str(business.get('location', '')).lower() + ' ' +
+            str(business.get('description', '')).lower()
+        )
+        if search_term in searchable_text:
+            matches.append(business)
+    return matches
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'query':<14} {'matches':>8} {'linear (ms)':>12} "
+          f"{'memory index (ms)':>18} {'sqlite fts5 (ms)':>17}")
+    for count in args.rows:
+        records = list(make_records(count, content_bytes=100))
+        memory = MemoryStore()
+        memory.insert_many([dict(r) for r in records])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sqlite = SQLiteStore(os.path.join(tmp, 'bench.db'))
+            sqlite.insert_many([dict(r) for r in records])
+
+            for query in queries_for(count):
+                matches = memory.query(query, 'relevance', 0, 12)[1]
+                linear = timed(lambda: linear_search(records, query))
+                indexed = timed(lambda: memory.query(query, 'relevance', 0, 12))
+                fts = timed(lambda: sqlite.query(query, 'relevance', 0, 12))
+                print(f"{count:>8} {query:<14} {matches:>8} {linear * 1000:>12.2f} "
+                      f"{indexed * 1000:>18.2f} {fts * 1000:>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
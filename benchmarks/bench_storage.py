@@ -0,0 +1,110 @@
+"""Load and query times for the memory and SQLite stores at 100k and 1M rows
+
+Deep pages are read both by offset and by keyset cursor (after=).
+
+Run from the repo root:  python benchmarks/bench_storage.py [--rows 100000 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import BUSINESS_DEFAULTS, SORT_KEYS, SORT_SPECS, MemoryStore, SQLiteStore
+
+WORDS = (
+    'acme global cloud health retail data systems labs partners digital '
+    'finance learning software group studio works capital network'
+).split()
+INDUSTRIES = ['Technology', 'Healthcare', 'Finance', 'Education', 'Retail', 'Other']
+TYPES = ['SaaS/Software', 'E-commerce', 'Consulting', 'Healthcare', 'Education', 'Technology']
+
+
+def make_records(count, content_bytes, seed=0):
+    """Yield synthetic business records"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        record = dict(BUSINESS_DEFAULTS)
+        name = ' '.join(rng.choice(WORDS).title() for _ in range(2))
+        record.update({
+            'url': f'https://example{i}.com',
+            'company_name': f'{name} {i}',
+            'business_type': rng.choice(TYPES),
+            'industry': rng.choice(INDUSTRIES),
+            'location': rng.choice(['Austin, TX', 'Boston, MA', 'Denver, CO', 'Unknown']),
+            'founded_year': str(rng.randint(1950, 2024)) if rng.random() < 0.7 else 'Unknown',
+            'description': ' '.join(rng.choice(WORDS) for _ in range(20)),
+            'content': ('lorem ipsum ' * (content_bytes // 12 + 1))[:content_bytes],
+        })
+        stamp = (start + timedelta(seconds=i)).isoformat()
+        record['scraped_date'] = stamp
+        record['last_updated'] = stamp
+        yield record
+
+
+def load(store, count, content_bytes, chunk=10_000):
+    records = make_records(count, content_bytes)
+    start = time.perf_counter()
+    while True:
+        batch = [r for _, r in zip(range(chunk), records)]
+        if not batch:
+            break
+        store.insert_many(batch)
+    return time.perf_counter() - start
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report_queries(name, store, count, per_page=12):
+    deep_page = max(1, count // per_page // 2)
+    for sort_by in SORT_KEYS:
+        first = timed(lambda: store.query('', sort_by, 0, per_page))
+        offset = (deep_page - 1) * per_page
+        deep = timed(lambda: store.query('', sort_by, offset, per_page))
+        # Cursor taken from the last row of the page before the deep one
+        last, _ = store.query('', sort_by, offset - 1, 1)
+        after = (last[0][SORT_SPECS[sort_by][0]], last[0]['id'])
+        keyset = timed(lambda: store.query('', sort_by, 0, per_page, after))
+        print(f"  {name:<7} sort={sort_by:<14} page 1: {first * 1000:>8.2f}ms"
+              f"   page {deep_page}: {deep * 1000:>8.2f}ms   after=: {keyset * 1000:>8.2f}ms")
+    search = timed(lambda: store.query('capital', 'scraped_date', 0, per_page), repeat=1)
+    print(f"  {name:<7} search='capital' page 1: {search * 1000:>8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--content-bytes', type=int, default=300)
+    parser.add_argument('--memory-max', type=int, default=100_000,
+                        help='skip the memory store above this many rows')
+    args = parser.parse_args()
+
+    for count in args.rows:
+        print(f"{count:,} rows")
+        with tempfile.TemporaryDirectory() as tmp:
+            sqlite = SQLiteStore(os.path.join(tmp, 'bench.db'))
+            elapsed = load(sqlite, count, args.content_bytes)
+            print(f"  sqlite  load: {elapsed:.1f}s ({count / elapsed:,.0f} rows/s)")
+            report_queries('sqlite', sqlite, count)
+
+        if count <= args.memory_max:
+            memory = MemoryStore()
+            elapsed = load(memory, count, args.content_bytes)
+            print(f"  memory  load: {elapsed:.1f}s ({count / elapsed:,.0f} rows/s)")
+            report_queries('memory', memory, count)
+
+
+if __name__ == '__main__':
+    main()
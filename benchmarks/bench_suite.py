@@ -0,0 +1,384 @@
+"""Benchmark suite for the scrape, query and HTTP paths, with results saved as JSON
+
+Three sections, each run in a fresh process so its peak RSS is its own:
+
+  scrape  BusinessScraper.scrape_business against a local fixture server
+          serving benchmarks/fixtures/ plus the generated adversarial pages
+          (huge, deeply nested, regex-hostile, link-heavy): latency per page,
+          then throughput with several threads scraping at once
+  query   Database.get_businesses on the memory and SQLite stores at each
+          --rows size: every sort_by, first / deep / cursor pages, searches
+          and facets, with the query cache cleared before every call
+  http    the Flask app on a local server over a SQLite catalog, hit by
+          concurrent clients on the list, search, facets and detail endpoints
+
+Every measurement is keyed like "query/sqlite/100000/sort=company_name/deep"
+with p50/p99 latency, throughput and the section's peak RSS. Inputs are
+seeded, so two runs on the same machine measure the same work.
+
+Run from the repo root:
+    python benchmarks/bench_suite.py [--sections scrape query http] [--rows 1000 100000 1000000]
+    python benchmarks/bench_suite.py --compare OLD.json NEW.json [--threshold 10]
+"""
+import argparse
+import glob
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULTS = os.path.join(ROOT, 'benchmarks', 'results')
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+SEARCHES = ['cloud', 'capital data', 'zzzz']
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summary(latencies, elapsed=None, **extra):
+    """p50/p99/mean in ms from latencies in seconds; ops/s over elapsed (default: their sum)"""
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'ops_per_s': round(len(latencies) / elapsed, 1) if elapsed else None,
+        **extra,
+    }
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def quiet():
+    """Keep the app's logging and sample data out of the way"""
+    os.environ['LOG_LEVEL'] = 'WARNING'
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+# Fixture server
+
+def load_corpus():
+    from make_fixtures import adversarial_pages
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    pages.update(adversarial_pages())
+    return pages
+
+
+class Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under a burst of clients
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def start_fixture_server(pages):
+    """Serve pages by name at /<name>, ignoring any query string"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body = pages.get(self.path.split('?')[0].lstrip('/'))
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Sections
+
+def bench_scrape(args):
+    quiet()
+    os.environ.pop('DATABASE_PATH', None)
+    from scraper import BusinessScraper
+
+    pages = load_corpus()
+    server = start_fixture_server(pages)
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    scraper = BusinessScraper()
+    # Every run should fetch and parse, not answer from the response cache
+    scraper.cache = None
+    run = iter(range(10**9))
+
+    def scrape(name):
+        # A fresh url each time, so the stored content hash never short-cuts parsing
+        start = time.perf_counter()
+        result = scraper.scrape_business(f'{base}/{name}?run={next(run)}')
+        return time.perf_counter() - start, result['success']
+
+    results = {}
+    for name in pages:
+        scrape(name)
+        timings = [scrape(name) for _ in range(args.repeat)]
+        failures = sum(1 for _, ok in timings if not ok)
+        results[f'scrape/page/{name}'] = summary([t for t, _ in timings], bytes=len(pages[name]),
+                                                 failures=failures)
+
+    names = [name for name in pages for _ in range(args.repeat)]
+    random.Random(0).shuffle(names)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.scrape_workers) as pool:
+        timings = list(pool.map(scrape, names))
+    elapsed = time.perf_counter() - start
+    results[f'scrape/concurrent/workers={args.scrape_workers}'] = summary(
+        [t for t, _ in timings], elapsed, failures=sum(1 for _, ok in timings if not ok))
+    return results
+
+
+def bench_query(args, store_kind, rows):
+    quiet()
+    from bench_storage import load
+    from database import RELEVANCE, SORT_KEYS, Database, MemoryStore, SQLiteStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(os.path.join(tmp, 'bench.db')) if store_kind == 'sqlite' else MemoryStore()
+        load_seconds = load(store, rows, args.content_bytes)
+        db = Database(store)
+        prefix = f'query/{store_kind}/{rows}'
+        results = {f'{prefix}/load': {'seconds': round(load_seconds, 2),
+                                      'ops_per_s': round(rows / load_seconds, 1)}}
+
+        def measure(call):
+            latencies = []
+            for _ in range(args.repeat):
+                with db.cache_lock:
+                    db.query_cache.clear()
+                start = time.perf_counter()
+                result = call()
+                latencies.append(time.perf_counter() - start)
+                assert result['success'], result.get('error')
+            return summary(latencies)
+
+        per_page = 12
+        deep_page = max(1, rows // per_page // 2)
+        for sort_by in SORT_KEYS:
+            results[f'{prefix}/sort={sort_by}/first'] = measure(
+                lambda: db.get_businesses(sort_by=sort_by, per_page=per_page))
+            results[f'{prefix}/sort={sort_by}/deep'] = measure(
+                lambda: db.get_businesses(sort_by=sort_by, page=deep_page, per_page=per_page))
+            cursor = db.get_businesses(sort_by=sort_by, page=deep_page - 1, per_page=per_page)['pagination']
+            if cursor['next_cursor']:
+                results[f'{prefix}/sort={sort_by}/cursor'] = measure(
+                    lambda: db.get_businesses(sort_by=sort_by, per_page=per_page, after=cursor['next_cursor']))
+        for search in SEARCHES:
+            for sort_by in ('scraped_date', RELEVANCE):
+                results[f'{prefix}/search={search}/sort={sort_by}'] = measure(
+                    lambda: db.get_businesses(search=search, sort_by=sort_by, per_page=per_page))
+        results[f'{prefix}/facets'] = measure(lambda: db.get_facets())
+        results[f'{prefix}/facets/search=cloud'] = measure(lambda: db.get_facets(search='cloud'))
+        return results
+
+
+def bench_http(args):
+    quiet()
+    import requests
+    from bench_storage import load
+    from database import SQLiteStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        load(SQLiteStore(path), args.http_rows, args.content_bytes)
+        os.environ['DATABASE_PATH'] = path
+        from werkzeug.serving import make_server
+        from app import app
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_port}'
+        local = threading.local()
+        rng = random.Random(0)
+
+        endpoints = {
+            'list': lambda: f'/api/businesses?page={rng.randint(1, 50)}',
+            'list_per_page_100': lambda: f'/api/businesses?per_page=100&page={rng.randint(1, 20)}',
+            'search': lambda: f'/api/businesses?search={rng.choice(SEARCHES)}&sort_by=relevance',
+            'facets': lambda: '/api/businesses/facets',
+            'detail': lambda: f'/api/businesses/{rng.randint(1, args.http_rows)}',
+        }
+
+        def get(path):
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+            start = time.perf_counter()
+            response = session.get(base + path)
+            return time.perf_counter() - start, response.status_code == 200
+
+        results = {}
+        with ThreadPoolExecutor(args.http_clients) as pool:
+            for name, make_path in endpoints.items():
+                paths = [make_path() for _ in range(args.http_requests)]
+                list(pool.map(get, paths[:args.http_clients]))
+                start = time.perf_counter()
+                timings = list(pool.map(get, paths))
+                elapsed = time.perf_counter() - start
+                results[f'http/{args.http_rows}/clients={args.http_clients}/{name}'] = summary(
+                    [t for t, _ in timings], elapsed, failures=sum(1 for _, ok in timings if not ok))
+        server.shutdown()
+        return results
+
+
+def run_section(fn, *fn_args):
+    """Run one section here and tag its results with this process's peak RSS"""
+    results = fn(*fn_args)
+    rss = peak_rss_kb()
+    for entry in results.values():
+        entry['peak_rss_kb'] = rss
+    return results
+
+
+# Reporting
+
+def git_state():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def compare(old_path, new_path, threshold):
+    """Print p50/p99/throughput changes per key; True if anything got worse than threshold %"""
+    with open(old_path) as f:
+        old = json.load(f)['results']
+    with open(new_path) as f:
+        new = json.load(f)['results']
+    regressed = False
+    print(f"{'key':<70} {'p50 ms':>18} {'p99 ms':>18} {'ops/s':>18}")
+    for key in sorted(old.keys() & new.keys()):
+        cells = []
+        for metric, higher_is_better in (('p50_ms', False), ('p99_ms', False), ('ops_per_s', True)):
+            before, after = old[key].get(metric), new[key].get(metric)
+            if not before or after is None:
+                cells.append(f"{'-':>18}")
+                continue
+            change = (after - before) / before * 100
+            worse = -change if higher_is_better else change
+            flag = '!' if worse > threshold else ' '
+            regressed = regressed or worse > threshold
+            cells.append(f'{after:>10.2f} {change:+6.1f}%{flag}')
+        print(f'{key:<70} ' + ' '.join(cells))
+    for key in sorted(old.keys() - new.keys()):
+        print(f'{key:<70} only in {old_path}')
+    for key in sorted(new.keys() - old.keys()):
+        print(f'{key:<70} only in {new_path}')
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sections', nargs='+', choices=['scrape', 'query', 'http'],
+                        default=['scrape', 'query', 'http'])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000, 1_000_000],
+                        help='catalog sizes for the query section')
+    parser.add_argument('--stores', nargs='+', choices=['memory', 'sqlite'], default=['memory', 'sqlite'])
+    parser.add_argument('--memory-max', type=int, default=100_000,
+                        help='skip the memory store above this many rows')
+    parser.add_argument('--content-bytes', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=20, help='timed calls per scrape page or query')
+    parser.add_argument('--scrape-workers', type=int, default=8)
+    parser.add_argument('--http-rows', type=int, default=10_000)
+    parser.add_argument('--http-clients', type=int, default=16)
+    parser.add_argument('--http-requests', type=int, default=1_000, help='requests per endpoint')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two results files')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='percent change that counts as a regression in --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    jobs = []
+    if 'scrape' in args.sections:
+        jobs.append(('scrape', bench_scrape, (args,)))
+    if 'query' in args.sections:
+        for rows in args.rows:
+            for store in args.stores:
+                if store == 'memory' and rows > args.memory_max:
+                    continue
+                jobs.append((f'query {store} {rows:,}', bench_query, (args, store, rows)))
+    if 'http' in args.sections:
+        jobs.append(('http', bench_http, (args,)))
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for label, fn, fn_args in jobs:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            section = pool.submit(run_section, fn, *fn_args).result()
+        results.update(section)
+        print(f'{label:<24} {time.perf_counter() - start:>7.1f}s  {len(section)} measurements')
+
+    commit, dirty = git_state()
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': commit,
+            'git_dirty': dirty,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('compare', 'output')},
+        },
+        'results': results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS, f"{stamp}-{commit or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    print(f"\n{'key':<70} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>10} {'RSS MB':>8}")
+    for key, entry in results.items():
+        if 'p50_ms' in entry:
+            print(f"{key:<70} {entry['p50_ms']:>10.2f} {entry['p99_ms']:>10.2f} "
+                  f"{entry['ops_per_s'] or 0:>10,.0f} {entry['peak_rss_kb'] / 1024:>8.0f}")
+    print(f'\nSaved {output}')
+
+
+if __name__ == '__main__':
+    main()
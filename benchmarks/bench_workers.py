@@ -0,0 +1,146 @@
+"""Requests per second of serve.py as the number of worker processes grows
+
+Loads a SQLite catalog once, then for each --workers count starts
+serve.py on it and drives it for --seconds from several client processes
+(so the clients' own GIL isn't the limit). The request mix pages, sorts and
+searches at random, so most requests miss the per-worker query cache and
+cost real CPU. Before each run a delete through one connection is checked
+from fresh connections, which land on other workers, to make sure they all
+see it.
+
+Throughput can only scale up to the number of cores, shared with the
+clients; compare the cpu_count printed first.
+
+Run from the repo root:
+    python benchmarks/bench_workers.py [--rows 100000] [--workers 1 2 4 8] [--seconds 10]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_storage import load
+from bench_suite import SEARCHES, percentile
+from database import SORT_KEYS, SQLiteStore
+
+PORT = 5093
+
+
+def random_path(rng, rows):
+    kind = rng.random()
+    if kind < 0.5:
+        return f'/api/businesses?page={rng.randint(1, 500)}&sort_by={rng.choice(SORT_KEYS)}'
+    if kind < 0.7:
+        return f'/api/businesses?search={rng.choice(SEARCHES)}&sort_by=relevance&page={rng.randint(1, 5)}'
+    if kind < 0.8:
+        return f'/api/businesses/facets?search={rng.choice(SEARCHES)}'
+    return f'/api/businesses/{rng.randint(1, rows)}'
+
+
+def drive(base, rows, seconds, threads, seed):
+    """Send requests from threads until seconds pass; return (latencies, errors)"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        mine, failed = [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = session.get(base + random_path(rng, rows), timeout=30).status_code in (200, 404)
+            except requests.RequestException:
+                ok = False
+            mine.append(time.perf_counter() - start)
+            failed += not ok
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    pool = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, errors[0]
+
+
+def wait_until_up(base, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(base + '/api/health', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError('serve.py did not start')
+
+
+def check_shared(base, business_id, workers):
+    """Delete a business, then make sure every worker reports it gone"""
+    requests.delete(f'{base}/api/businesses/{business_id}', timeout=10)
+    pids = set()
+    for _ in range(workers * 10):
+        # A new connection each time, so requests spread over the workers
+        pids.add(requests.get(base + '/api/health', timeout=10).json()['pid'])
+        status = requests.get(f'{base}/api/businesses/{business_id}', timeout=10).status_code
+        if status != 404:
+            raise AssertionError(f'business {business_id} still visible after delete ({status})')
+    return len(pids)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--content-bytes', type=int, default=300)
+    parser.add_argument('--client-procs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--client-threads', type=int, default=8, help='per client process')
+    args = parser.parse_args()
+
+    print(f'cpu_count {os.cpu_count()}, {args.client_procs} client processes x {args.client_threads} threads')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        load(SQLiteStore(path), args.rows, args.content_bytes)
+        env = {**os.environ, 'DATABASE_PATH': path, 'FETCH_CACHE_PATH': os.path.join(tmp, 'fetch_cache.db'),
+               'LOG_LEVEL': 'WARNING'}
+        base = f'http://127.0.0.1:{PORT}'
+
+        print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'seen':>5}")
+        for run, workers in enumerate(args.workers):
+            server = subprocess.Popen(
+                [sys.executable, os.path.join(ROOT, 'serve.py'), '--host', '127.0.0.1', '--port', str(PORT),
+                 '--workers', str(workers)], env=env, cwd=tmp
+            )
+            try:
+                wait_until_up(base)
+                seen = check_shared(base, run + 1, workers)
+                with ProcessPoolExecutor(args.client_procs) as pool:
+                    futures = [pool.submit(drive, base, args.rows, args.seconds, args.client_threads, i)
+                               for i in range(args.client_procs)]
+                    results = [future.result() for future in futures]
+                latencies = [t for result in results for t in result[0]]
+                errors = sum(result[1] for result in results)
+                print(f'{workers:>7} {len(latencies) / args.seconds:>9,.0f} '
+                      f'{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} '
+                      f'{errors:>7} {seen:>5}')
+            finally:
+                server.terminate()
+                server.wait(10)
+
+
+if __name__ == '__main__':
+    main()
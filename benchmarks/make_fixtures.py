@@ -0,0 +1,174 @@
+"""Regenerate the saved HTML pages in benchmarks/fixtures/
+
+The pages are synthetic but shaped like what the scraper meets in the wild:
+small landing pages, long marketing pages, script-heavy app shells, broken
+markup, legacy encodings and deep nesting. Output is deterministic.
+
+Run from the repo root:  python benchmarks/make_fixtures.py
+"""
+import os
+import random
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+WORDS = (
+    'cloud platform customers growth team global solutions enterprise '
+    'innovation partners support secure data analytics marketing revenue '
+    'software healthcare learning retail consulting startup services'
+).split()
+
+
+def sentence(rng, n=30):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def head(title, description, charset='utf-8', extra=''):
+    return (
+        f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="{charset}">\n'
+        f'<title>{title}</title>\n<meta name="description" content="{description}">\n'
+        f'<meta property="og:site_name" content="{title.split(" - ")[0]}">\n{extra}</head>\n'
+    )
+
+
+def chrome_top():
+    return ('<header><nav><a href="/">Home</a> <a href="/about">About</a> '
+            '<a href="/contact">Contact</a> <a href="/careers">Careers</a></nav></header>\n')
+
+
+def chrome_bottom():
+    return ('<footer><p>&copy; 2024</p><a href="https://www.linkedin.com/company/acme">LinkedIn</a> '
+            '<a href="https://twitter.com/acme">Twitter</a></footer>\n')
+
+
+def landing(rng):
+    body = ''.join(f'<section><h2>{rng.choice(WORDS).title()}</h2><p>{sentence(rng)}</p></section>\n'
+                   for _ in range(12))
+    return (head('Acme Cloud - Home', 'Acme Cloud builds secure software platforms for modern teams')
+            + '<body>\n' + chrome_top() + '<main>\n<h1>Acme Cloud</h1>\n' + body
+            + '<p>Founded in 2012 and headquartered in Austin, TX. Contact sales@acme.example '
+              'or call (512) 555-0199. Revenue of $40 million in 2023.</p>\n'
+            + '</main>\n' + chrome_bottom() + '</body>\n</html>\n')
+
+
+def marketing(rng, target):
+    parts = [head('Globex Health - Welcome', 'Globex Health delivers healthcare analytics to hospitals',
+                  extra='<style>' + '.card{margin:0 auto;padding:8px}' * 200 + '</style>\n'),
+             '<body>\n', chrome_top(), '<main>\n']
+    size = sum(len(p) for p in parts)
+    while size < target:
+        chunk = (f'<section class="card"><div class="inner"><h3>{rng.choice(WORDS).title()}</h3>'
+                 f'<p>{sentence(rng, 45)}</p><ul>'
+                 + ''.join(f'<li><a href="/p/{rng.randint(0, 10**6)}">{rng.choice(WORDS)}</a></li>'
+                           for _ in range(5))
+                 + '</ul></div></section>\n')
+        parts.append(chunk)
+        size += len(chunk)
+    parts += ['<p>Established in 1998, based in Boston, MA. A large enterprise medical provider.</p>\n',
+              '</main>\n', chrome_bottom(), '</body>\n</html>\n']
+    return ''.join(parts)
+
+
+def app_shell(rng, script_bytes):
+    bundle = ''.join(f'var m{i}=function(a,b){{return a<b?"{rng.choice(WORDS)}":b>a}};'
+                     for i in range(script_bytes // 50))
+    state = '{"items":[' + ','.join(f'{{"id":{i},"name":"{rng.choice(WORDS)}"}}' for i in range(2000)) + ']}'
+    return (head('Initech App', 'Initech is a SaaS platform for retail inventory')
+            + f'<script>{bundle}</script>\n<script type="application/json" id="state">{state}</script>\n'
+            + '<body>\n<div id="root"><main><h1>Initech</h1>'
+            + f'<p>{sentence(rng)}</p><p>Since 2016, serving retail in Denver, CO.</p></main></div>\n'
+            + f'<script>{bundle[:script_bytes // 4]}</script>\n</body>\n</html>\n')
+
+
+def malformed(rng):
+    rows = ''.join(f'<tr><td>{rng.choice(WORDS)}<td>{sentence(rng, 8)}\n' for _ in range(200))
+    return ('<html><head><title>Umbrella Corp | Official Site</title>\n'
+            '<meta name=description content="Umbrella does pharma research and investment banking">\n'
+            '<body><div><div><p>Unclosed paragraph <b>bold <i>both</b> italic</i>\n'
+            '<p>Another &amp; &copy; &nbsp; &#8212; &bogus; entity soup</div></div></div>\n'
+            '<![CDATA[ odd cdata ]]><!-- a comment --> trailing text\n'
+            f'<table>{rows}</table>\n<p>Started in 1975 in Raccoon City, MO. info@umbrella.example\n'
+            '<nav>stray nav <a href="https://facebook.com/umbrella">fb</a>\n'
+            '</span></section></html></body>\n<p>after html')
+
+
+def latin1(rng):
+    text = ' '.join(f'<p>Café résumé naïve façade Zürich {sentence(rng, 12)}</p>' for _ in range(40))
+    page = (head('Société Générale Conseil - Accueil', 'Conseil en stratégie pour entreprises européennes',
+                 charset='windows-1252')
+            + '<body>\n' + chrome_top() + f'<main>{text}<p>Fondée en 1987, located in Paris, FR.</p></main>\n'
+            + chrome_bottom() + '</body>\n</html>\n')
+    return page.encode('cp1252')
+
+
+def utf8_no_charset(rng):
+    text = ' '.join(f'<p>Ünïcödé ☁️ 数据 {sentence(rng, 12)}</p>' for _ in range(40))
+    return ('<html><head><title>Ünïcode Labs</title></head><body>'
+            f'<main>{text}<p>Founded in 2020. Based in Berlin, DE.</p></main></body></html>').encode('utf-8')
+
+
+def deep_nesting(rng, depth):
+    return (head('Deep Co', 'Nested markup generated by an old page builder')
+            + '<body><main>' + '<div>' * depth + f'<p>{sentence(rng)}</p>' + '</div>' * depth
+            + '<p>Founded in 2001.</p></main></body></html>')
+
+
+def regex_hostile(rng, run):
+    """Long runs that make naive extractor patterns backtrack: address characters
+    with no '@', digit runs that almost look like phones, unclosed anchors,
+    capitalized word chains, repeated prefixes with no year after them"""
+    runs = [
+        'x.' * run,
+        '1-2' * run,
+        '<a title=' + 'y' * run,
+        'Aa Bb ' * (run // 6),
+        'founded in ' * (run // 11),
+        '$1,000' * (run // 6),
+    ]
+    return (head('Hostile Inc', 'Text built to make regular expressions slow')
+            + '<body><main>' + ''.join(f'<p>{text}</p>\n' for text in runs)
+            + f'<p>{sentence(rng)}</p></main></body></html>')
+
+
+def many_links(rng, count):
+    links = ''.join(f'<li><a href="/{rng.choice(WORDS)}/{i}">{rng.choice(WORDS)}</a></li>' for i in range(count))
+    return (head('Linkfarm - Home', 'A directory page with a very long list of links')
+            + '<body>' + chrome_top() + f'<main><ul>{links}</ul></main>' + chrome_bottom() + '</body></html>')
+
+
+def adversarial_pages():
+    """Pages too big to keep in the repo, generated on demand (bench_suite.py serves them).
+
+    huge_page is past the fetcher's 2 MB default body limit, so it also
+    exercises truncation.
+    """
+    rng = random.Random(7)
+    pages = {
+        'huge_page.html': marketing(rng, 4_000_000),
+        'deep_nesting_extreme.html': deep_nesting(rng, 20_000),
+        'regex_hostile.html': regex_hostile(rng, 200_000),
+        'many_links.html': many_links(rng, 20_000),
+    }
+    return {name: page.encode('utf-8') for name, page in pages.items()}
+
+
+def main():
+    rng = random.Random(2024)
+    pages = {
+        'landing_small.html': landing(rng),
+        'marketing_large.html': marketing(rng, 150_000),
+        'app_shell_scripts.html': app_shell(rng, 120_000),
+        'malformed_markup.html': malformed(rng),
+        'latin1_declared.html': latin1(rng),
+        'utf8_no_charset.html': utf8_no_charset(rng),
+        'deep_nesting.html': deep_nesting(rng, 1500),
+    }
+    os.makedirs(FIXTURES, exist_ok=True)
+    for name, page in pages.items():
+        data = page if isinstance(page, bytes) else page.encode('utf-8')
+        with open(os.path.join(FIXTURES, name), 'wb') as f:
+            f.write(data)
+        print(f"{name:<26} {len(data):>9,} bytes")
+
+
+if __name__ == '__main__':
+    main()
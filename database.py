@@ -1,23 +1,1007 @@
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime
+import base64
+import json
 import logging
+import os
+import sqlite3
+import heapq
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from fetcher import canonical_url
+from records import BUSINESS_DEFAULTS, BUSINESS_FIELDS, BUSINESS_FIELDS_SET, BusinessRecord
+from search_index import SearchIndex, SEARCH_WEIGHTS, tokenize
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class Database:
+# Sort keys accepted by get_businesses (anything else sorts by scraped_date)
+SORT_KEYS = ['scraped_date', 'company_name', 'business_type', 'industry', 'founded_year']
+
+# How each sort key orders records: (field, case-insensitive, descending).
+# Ties always go by ascending id.
+SORT_SPECS = {
+    'scraped_date': ('scraped_date', False, True),
+    'company_name': ('company_name', True, False),
+    'business_type': ('business_type', True, False),
+    'industry': ('industry', True, False),
+    'founded_year': ('founded_year', False, True),
+}
+
+# Fields matched by the search box
+SEARCH_FIELDS = list(SEARCH_WEIGHTS)
+
+# Extra sort key that ranks search results by how well they match
+RELEVANCE = 'relevance'
+
+# Bulk deletes larger than this rebuild the memory store's sort indexes in
+# one pass instead of removing keys one at a time
+BULK_DELETE_THRESHOLD = 64
+
+# Ids per DELETE statement, below SQLite's bound-parameter limit
+SQLITE_DELETE_CHUNK = 500
+
+# Records per chunk when streaming the whole catalog out
+EXPORT_CHUNK = 500
+
+# Records per write transaction in bulk imports
+IMPORT_BATCH = 5000
+
+# get_businesses results kept for repeated list views, least recently used
+# dropped first
+QUERY_CACHE_SIZE = 256
+
+# Facets counted by get_facets(); founded_decade groups founded_year by decade
+FACETS = ('industry', 'business_type', 'company_size', 'founded_decade')
+
+
+def validate_business(data):
+    """Check an incoming business record and coerce its field values.
+
+    Returns a dict of the known fields; id and the timestamps are left to
+    the database and unknown keys are dropped. Raises ValueError if data
+    isn't an object, has no url, or has a value that isn't text.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('record must be a JSON object')
+    url = data.get('url')
+    if not isinstance(url, str) or not url.strip():
+        raise ValueError('url is required')
+    record = {}
+    for field, value in data.items():
+        if value is None or field not in BUSINESS_DEFAULTS:
+            continue
+        if type(value) is not str:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f'{field} must be a string')
+            value = str(value)
+        record[field] = value
+    record['url'] = url.strip()
+    return record
+
+
+def parse_fields(fields):
+    """Turn a comma-separated fields= parameter into a tuple of field names.
+
+    id is always included, first. Raises ValueError for unknown fields.
+    """
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BUSINESS_FIELDS_SET]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(['id'] + names))
+
+
+def facet_values(record):
+    """The value a record counts under for each of FACETS, in order"""
+    values = []
+    for facet in FACETS[:-1]:
+        value = record.get(facet)
+        values.append('Unknown' if value is None else value)
+    year = record.get('founded_year') or ''
+    values.append(year[:3] + '0s' if len(year) == 4 and year.isascii() and year.isdigit() else 'Unknown')
+    return values
+
+
+def sort_spec(sort_by):
+    """Resolve a sort key, falling back to scraped_date"""
+    if sort_by not in SORT_SPECS:
+        sort_by = 'scraped_date'
+    return sort_by, SORT_SPECS[sort_by]
+
+
+def encode_cursor(sort_by, record):
+    """Opaque cursor pointing just past record in sort_by order"""
+    sort_by, (field, _, _) = sort_spec(sort_by)
+    payload = json.dumps([sort_by, record.get(field), record['id']])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, sort_by):
+    """Get (sort value, id) from a cursor made for the same sort key"""
+    sort_by, _ = sort_spec(sort_by)
+    try:
+        cursor_sort, value, business_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if cursor_sort != sort_by or not isinstance(business_id, int):
+        raise ValueError('Cursor does not match sort_by')
+    return value, business_id
+
+
+class MemoryStore:
     def __init__(self):
-        """Simple database for demo"""
-        self.businesses = []
+        """Businesses kept in memory; everything is lost on restart.
+
+        Records are held as BusinessRecord and only turned back into dicts
+        when they leave the store.
+        """
+        # Primary index; dicts keep insertion order, so this is also id order
+        self.by_id = {}
+        # url -> id, for upserts
+        self.by_url = {}
+        self.index = SearchIndex()
+        # One ascending list of index keys per sort key, see _sort_key()
+        self.sorted = {sort_by: [] for sort_by in SORT_SPECS}
+        # Records per value of each facet, kept up to date on every write
+        self.facets = {facet: Counter() for facet in FACETS}
         self.next_id = 1
-        print("✅ Database initialized")
-        self._add_sample_data()
+        # Writes so far, see Database._changed(); the epoch keeps this run's
+        # versions apart from an earlier run's
+        self.version = 0
+        self.epoch = os.urandom(4).hex()
+        # Always a fresh catalog, see SQLiteStore.created
+        self.created = True
+        # Batch scrapes insert and delete from several threads
+        self.lock = threading.Lock()
+
+    def count(self):
+        return len(self.by_id)
+
+    def catalog_version(self):
+        return self.version
+
+    def bump_version(self):
+        with self.lock:
+            self.version += 1
+
+    def put_job(self, snapshot, keep):
+        """Jobs on a memory store only live in this process's JobManager"""
+
+    def get_job(self, job_id):
+        return None
+
+    def get(self, business_id):
+        record = self.by_id.get(business_id)
+        return record.to_dict() if record else None
+
+    @staticmethod
+    def _sort_key(sort_by, value, business_id):
+        """Index key for a record under one sort key.
+
+        Lists are kept ascending; descending sorts read them back to front,
+        so those store -id to keep ties in ascending id order.
+        """
+        _, lower, descending = SORT_SPECS[sort_by]
+        value = str(value or '')
+        if lower:
+            value = value.lower()
+        return (value, -business_id) if descending else (value, business_id)
+
+    def _record_key(self, sort_by, record):
+        field = SORT_SPECS[sort_by][0]
+        return self._sort_key(sort_by, record.get(field), record['id'])
+
+    def insert(self, record):
+        """Store a record, assigning it the next id"""
+        with self.lock:
+            compact = self._add(record)
+            for sort_by, keys in self.sorted.items():
+                insort(keys, self._record_key(sort_by, compact))
+        return record
+
+    def insert_many(self, records):
+        """Store several records at once, re-sorting each index once"""
+        with self.lock:
+            added = [self._add(record) for record in records]
+            for sort_by, keys in self.sorted.items():
+                keys.extend(self._record_key(sort_by, compact) for compact in added)
+                keys.sort()
+        return records
+
+    def _add(self, record):
+        """Store and search-index a record (caller holds the lock).
+
+        Sets the new id on record and returns the compact copy that is kept.
+        """
+        record['id'] = self.next_id
+        compact = BusinessRecord.from_dict(record)
+        self.by_id[compact.id] = compact
+        if compact.url:
+            self.by_url[compact.url] = compact.id
+        self.index.add(compact.id, compact)
+        self._tally([compact], 1)
+        self.next_id += 1
+        return compact
+
+    def _tally(self, records, step):
+        """Count records in (step 1) or out of (step -1) the facets (caller holds the lock)"""
+        for record in records:
+            for counts, value in zip(self.facets.values(), facet_values(record)):
+                counts[value] += step
+                if not counts[value]:
+                    del counts[value]
+
+    def content_hash(self, url):
+        """Content hash stored for url, or None"""
+        business_id = self.by_url.get(url)
+        return self.by_id[business_id].content_hash if business_id else None
+
+    def upsert(self, record):
+        """Insert a record, or update the one already stored for its url.
+
+        Returns (stored record, status) with status 'inserted', 'updated'
+        or 'unchanged'. An unchanged content_hash only moves last_updated
+        and leaves the sort and search indexes alone.
+        """
+        with self.lock:
+            existing = self.by_id.get(self.by_url.get(record['url']))
+            if existing is None:
+                compact = self._add(record)
+                for sort_by, keys in self.sorted.items():
+                    insort(keys, self._record_key(sort_by, compact))
+                return compact.to_dict(), 'inserted'
+
+            if existing.content_hash and existing.content_hash == record['content_hash']:
+                existing['last_updated'] = record['last_updated']
+                return existing.to_dict(), 'unchanged'
+
+            record['id'] = existing.id
+            record['scraped_date'] = existing.scraped_date
+            compact = BusinessRecord.from_dict(record)
+            for sort_by, keys in self.sorted.items():
+                del keys[bisect_left(keys, self._record_key(sort_by, existing))]
+                insort(keys, self._record_key(sort_by, compact))
+            self.by_id[compact.id] = compact
+            self.index.add(compact.id, compact)
+            self._tally([existing], -1)
+            self._tally([compact], 1)
+            return compact.to_dict(), 'updated'
+
+    def upsert_many(self, records):
+        """Upsert records with distinct urls, indexing the batch once.
+
+        Returns how many were inserted, updated and unchanged. New and
+        changed records are collected first, then merged into the sort
+        and search indexes together.
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        with self.lock:
+            added = []
+            replaced = []
+            for record in records:
+                existing = self.by_id.get(self.by_url.get(record['url']))
+                if existing is None:
+                    record['id'] = self.next_id
+                    self.next_id += 1
+                    counts['inserted'] += 1
+                elif existing.content_hash and existing.content_hash == record['content_hash']:
+                    existing['last_updated'] = record['last_updated']
+                    counts['unchanged'] += 1
+                    continue
+                else:
+                    record['id'] = existing.id
+                    record['scraped_date'] = existing.scraped_date
+                    replaced.append(existing)
+                    counts['updated'] += 1
+                compact = BusinessRecord.from_dict(record)
+                self.by_id[compact.id] = compact
+                if compact.url:
+                    self.by_url[compact.url] = compact.id
+                added.append(compact)
+
+            self._unsort(replaced)
+            self._sort(added)
+            self.index.add_many((compact.id, compact) for compact in added)
+            self._tally(replaced, -1)
+            self._tally(added, 1)
+        return counts
+
+    def stale(self, before, limit):
+        """Up to limit (id, url, content_hash) of records last updated before the given timestamp, oldest first"""
+        with self.lock:
+            stale = [r for r in self.by_id.values() if r.url and (r.last_updated or '') < before]
+        stale.sort(key=lambda r: (r.last_updated or '', r.id))
+        return [(r.id, r.url, r.content_hash) for r in stale[:limit]]
+
+    def delete(self, business_id):
+        """Delete by id, returning whether anything was deleted"""
+        return bool(self.delete_many([business_id]))
+
+    def delete_many(self, business_ids):
+        """Delete every given id that exists, returning the deleted ids"""
+        with self.lock:
+            removed = []
+            for business_id in business_ids:
+                record = self.by_id.pop(business_id, None)
+                if record is not None:
+                    if self.by_url.get(record.url) == business_id:
+                        del self.by_url[record.url]
+                    self.index.remove(business_id)
+                    removed.append(record)
+
+            self._unsort(removed)
+            self._tally(removed, -1)
+            return [record['id'] for record in removed]
+
+    def _unsort(self, removed):
+        """Take records out of the sort indexes (caller holds the lock)"""
+        if len(removed) <= BULK_DELETE_THRESHOLD:
+            for sort_by, keys in self.sorted.items():
+                for record in removed:
+                    del keys[bisect_left(keys, self._record_key(sort_by, record))]
+        elif removed:
+            # Deleting one by one shifts the list every time; past a few
+            # records a single filtering pass is cheaper
+            for sort_by, keys in self.sorted.items():
+                gone = {self._record_key(sort_by, record) for record in removed}
+                keys[:] = [key for key in keys if key not in gone]
+
+    def _sort(self, added):
+        """Put records into the sort indexes (caller holds the lock)"""
+        for sort_by, keys in self.sorted.items():
+            if len(added) <= BULK_DELETE_THRESHOLD:
+                for record in added:
+                    insort(keys, self._record_key(sort_by, record))
+            else:
+                # Timsort merges the sorted list with the new tail in one pass
+                keys.extend(self._record_key(sort_by, record) for record in added)
+                keys.sort()
+
+    def _page(self, sort_by, offset, limit, after, fields=BUSINESS_FIELDS):
+        """Read one page straight off a sorted index"""
+        keys = self.sorted[sort_by]
+        descending = SORT_SPECS[sort_by][2]
+
+        if after is not None:
+            cursor_key = self._sort_key(sort_by, *after)
+            if descending:
+                end = bisect_left(keys, cursor_key)
+                selected = keys[max(0, end - limit):end]
+            else:
+                start = bisect_right(keys, cursor_key)
+                selected = keys[start:start + limit]
+        elif descending:
+            end = max(0, len(keys) - offset)
+            selected = keys[max(0, end - limit):end]
+        else:
+            selected = keys[offset:offset + limit]
+
+        if descending:
+            selected.reverse()
+        return [self.by_id[abs(key[1])].to_dict(fields) for key in selected]
+
+    def query(self, search, sort_by, offset, limit, after=None, fields=BUSINESS_FIELDS):
+        """Return one page of matching businesses and the total match count.
+
+        after is a (sort value, id) pair from a cursor; when given, the page
+        starts right after that record and offset is ignored. Relevance
+        order has no cursor. Each dict holds only the given fields.
+        """
+        # Held throughout: a write in between would leave the index pointing
+        # at ids that are gone
+        with self.lock:
+            scores = self.index.search(search) if search else None
+            
+            if scores is not None and sort_by == RELEVANCE:
+                # Only the best offset + limit matches need ordering
+                best = heapq.nsmallest(offset + limit, scores, key=lambda i: (-scores[i], i))
+                return [self.by_id[i].to_dict(fields) for i in best[offset:]], len(scores)
+            
+            sort_by, (_, _, descending) = sort_spec(sort_by)
+            
+            if scores is None:
+                return self._page(sort_by, offset, limit, after, fields), len(self.by_id)
+            
+            # Search results are usually far fewer than the catalog: sort just those
+            matches = sorted(self._record_key(sort_by, self.by_id[i]) for i in scores)
+            if descending:
+                matches.reverse()
+            if after is not None:
+                cursor_key = self._sort_key(sort_by, *after)
+                if descending:
+                    matches = [key for key in matches if key < cursor_key]
+                else:
+                    matches = [key for key in matches if key > cursor_key]
+                offset = 0
+            return [self.by_id[abs(key[1])].to_dict(fields) for key in matches[offset:offset + limit]], len(scores)
+
+    def facet_counts(self, search=''):
+        """{facet: {value: count}} over the whole catalog, or over search matches.
+
+        The catalog-wide counts are read off the running counters; a search
+        counts just its matches.
+        """
+        counts = {facet: Counter() for facet in FACETS}
+        with self.lock:
+            if not search:
+                return {facet: dict(values) for facet, values in self.facets.items()}
+            for business_id in self.index.search(search):
+                record = self.by_id.get(business_id)
+                if record is not None:
+                    for facet, value in zip(FACETS, facet_values(record)):
+                        counts[facet][value] += 1
+        return {facet: dict(values) for facet, values in counts.items()}
+
+    def iterate(self, search, sort_by, since=None, chunk_size=EXPORT_CHUNK):
+        """Yield every matching business in sort order, chunk_size dicts at a time.
+
+        since keeps only records last updated at or after that timestamp.
+        The lock is only held per chunk, so writes go on during a long
+        export; without a search the sort index is walked with a cursor.
+        """
+        if search:
+            # Just the matching ids, ordered once up front; records deleted
+            # after that are skipped
+            with self.lock:
+                scores = self.index.search(search)
+                if sort_by == RELEVANCE:
+                    ids = sorted(scores, key=lambda i: (-scores[i], i))
+                else:
+                    sort_by, (_, _, descending) = sort_spec(sort_by)
+                    keys = sorted(self._record_key(sort_by, self.by_id[i]) for i in scores)
+                    ids = [abs(key[1]) for key in (reversed(keys) if descending else keys)]
+            for start in range(0, len(ids), chunk_size):
+                with self.lock:
+                    records = [self.by_id[i] for i in ids[start:start + chunk_size] if i in self.by_id]
+                chunk = [r.to_dict() for r in records if since is None or (r.last_updated or '') >= since]
+                if chunk:
+                    yield chunk
+            return
+        
+        sort_by, (field, _, _) = sort_spec(sort_by)
+        after = None
+        while True:
+            with self.lock:
+                page = self._page(sort_by, 0, chunk_size, after)
+            chunk = [r for r in page if since is None or (r['last_updated'] or '') >= since]
+            if chunk:
+                yield chunk
+            if len(page) < chunk_size:
+                return
+            after = (page[-1][field], page[-1]['id'])
+
+
+# ORDER BY clause for each sort key. Ties fall back to id so results match
+# the memory store's stable sort; each clause has a matching index below.
+SQLITE_ORDER = {
+    'company_name': 'company_name COLLATE NOCASE, id',
+    'business_type': 'business_type COLLATE NOCASE, id',
+    'industry': 'industry COLLATE NOCASE, id',
+    'founded_year': 'founded_year DESC, id',
+    'scraped_date': 'scraped_date DESC, id',
+}
+
+SQLITE_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS businesses (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    + ', '.join(f'{field} TEXT' for field in BUSINESS_FIELDS[1:]) + ')',
+    'CREATE INDEX IF NOT EXISTS idx_businesses_scraped_date ON businesses (scraped_date DESC, id)',
+    'CREATE INDEX IF NOT EXISTS idx_businesses_company_name ON businesses (company_name COLLATE NOCASE, id)',
+    'CREATE INDEX IF NOT EXISTS idx_businesses_industry ON businesses (industry COLLATE NOCASE, id)',
+    'CREATE INDEX IF NOT EXISTS idx_businesses_business_type ON businesses (business_type COLLATE NOCASE, id)',
+    'CREATE INDEX IF NOT EXISTS idx_businesses_founded_year ON businesses (founded_year DESC, id)',
+    'CREATE INDEX IF NOT EXISTS idx_businesses_url ON businesses (url)',
+    'CREATE INDEX IF NOT EXISTS idx_businesses_last_updated ON businesses (last_updated)',
+]
+
+# Full-text index over the search fields, kept in sync by triggers.
+# remove_diacritics 0 keeps tokens identical to search_index.tokenize().
+SQLITE_FTS_SCHEMA = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS businesses_fts USING fts5("
+    f"{', '.join(SEARCH_FIELDS)}, content='businesses', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 0')",
+    f"CREATE TRIGGER IF NOT EXISTS businesses_fts_insert AFTER INSERT ON businesses BEGIN "
+    f"INSERT INTO businesses_fts(rowid, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES (new.id, {', '.join('new.' + f for f in SEARCH_FIELDS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS businesses_fts_delete AFTER DELETE ON businesses BEGIN "
+    f"INSERT INTO businesses_fts(businesses_fts, rowid, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + f for f in SEARCH_FIELDS)}); END",
+    # Only edits to searchable fields touch the full-text index
+    "DROP TRIGGER IF EXISTS businesses_fts_update",
+    f"CREATE TRIGGER businesses_fts_update AFTER UPDATE OF {', '.join(SEARCH_FIELDS)} "
+    f"ON businesses BEGIN "
+    f"INSERT INTO businesses_fts(businesses_fts, rowid, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + f for f in SEARCH_FIELDS)}); "
+    f"INSERT INTO businesses_fts(rowid, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES (new.id, {', '.join('new.' + f for f in SEARCH_FIELDS)}); END",
+]
+
+# SQL for the value a row counts under for each of FACETS, matching
+# facet_values(); {row} is new., old. or empty
+SQLITE_FACET_VALUES = {
+    **{facet: f"COALESCE({{row}}{facet}, 'Unknown')" for facet in FACETS[:-1]},
+    'founded_decade': "CASE WHEN {row}founded_year GLOB '[0-9][0-9][0-9][0-9]' "
+                      "THEN substr({row}founded_year, 1, 3) || '0s' ELSE 'Unknown' END",
+}
+
+
+def _facet_upserts(row, step):
+    """Trigger statements adding step to the facet counts of a new. or old. row"""
+    return ''.join(
+        f"INSERT INTO business_facets (facet, value, count) VALUES ('{facet}', {value.format(row=row)}, {step}) "
+        f"ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count; "
+        for facet, value in SQLITE_FACET_VALUES.items()
+    )
+
+
+# Running facet counts, kept in sync by triggers like the full-text index.
+# Rows whose count drops to 0 stay behind and are skipped when read.
+SQLITE_FACET_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS business_facets (facet TEXT NOT NULL, value TEXT NOT NULL, '
+    'count INTEGER NOT NULL, PRIMARY KEY (facet, value)) WITHOUT ROWID',
+    f"CREATE TRIGGER IF NOT EXISTS businesses_facets_insert AFTER INSERT ON businesses BEGIN "
+    f"{_facet_upserts('new.', 1)}END",
+    f"CREATE TRIGGER IF NOT EXISTS businesses_facets_delete AFTER DELETE ON businesses BEGIN "
+    f"{_facet_upserts('old.', -1)}END",
+    f"CREATE TRIGGER IF NOT EXISTS businesses_facets_update "
+    f"AFTER UPDATE OF industry, business_type, company_size, founded_year ON businesses BEGIN "
+    f"{_facet_upserts('old.', -1)}{_facet_upserts('new.', 1)}END",
+]
+
+# State shared by every process serving from the same file: the catalog
+# version their query caches are checked against, and the latest snapshot of
+# each scrape job, so any process can report on a job another one runs
+SQLITE_SHARED_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS catalog_version (epoch TEXT NOT NULL, version INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS scrape_jobs (job_id TEXT PRIMARY KEY, snapshot TEXT NOT NULL)',
+]
+
+# bm25() column weights, in SEARCH_FIELDS order
+SQLITE_RANK = f"bm25(businesses_fts, {', '.join(str(w) for w in SEARCH_WEIGHTS.values())})"
+
+
+class SQLiteStore:
+    def __init__(self, path):
+        """Businesses persisted in a SQLite file in WAL mode.
+
+        Several processes can open the same file: writes are serialized by
+        SQLite's lock and the catalog version lives in the file.
+        """
+        self.path = path
+        # sqlite3 connections can't be shared between threads
+        self.local = threading.local()
+        # WAL allows one writer alongside any number of readers
+        self.write_lock = threading.Lock()
+
+        self._conn().execute('PRAGMA journal_mode=WAL')
+        # Processes starting together mustn't both build the indexes
+        with self._write() as conn:
+            # Only a new file gets the sample data; an existing catalog that
+            # has been emptied stays empty
+            self.created = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'businesses'"
+            ).fetchone() is None
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'businesses_fts'"
+            ).fetchone() is not None
+            has_facets = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'business_facets'"
+            ).fetchone() is not None
+            conn.execute(SQLITE_SCHEMA[0])
+            # Files made by older versions lack newer fields
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(businesses)')}
+            for field in BUSINESS_FIELDS:
+                if field not in columns:
+                    conn.execute(f'ALTER TABLE businesses ADD COLUMN {field} TEXT')
+            for statement in SQLITE_SCHEMA[1:] + SQLITE_FTS_SCHEMA + SQLITE_FACET_SCHEMA:
+                conn.execute(statement)
+            if not has_fts:
+                # Index rows written before full-text search existed
+                conn.execute("INSERT INTO businesses_fts(businesses_fts) VALUES ('rebuild')")
+            if not has_facets:
+                self._count_facets(conn, '1', [], 1)
+            for statement in SQLITE_SHARED_SCHEMA:
+                conn.execute(statement)
+            row = conn.execute('SELECT epoch FROM catalog_version').fetchone()
+            if row is None:
+                row = (os.urandom(4).hex(),)
+                conn.execute('INSERT INTO catalog_version (epoch, version) VALUES (?, 0)', row)
+            self.epoch = row[0]
+
+    def _conn(self):
+        """Get this thread's connection"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """A write transaction on this thread's connection.
+
+        BEGIN IMMEDIATE takes the database's write lock up front, so what
+        the transaction reads can't change under it from another process,
+        and schema changes inside it roll back with the rest.
+        """
+        conn = self._conn()
+        with self.write_lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def close(self):
+        """Close this thread's connection; the next call opens a new one"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def count(self):
+        return self._conn().execute('SELECT COUNT(*) FROM businesses').fetchone()[0]
+
+    def catalog_version(self):
+        return self._conn().execute('SELECT version FROM catalog_version').fetchone()[0]
+
+    def bump_version(self):
+        with self._write() as conn:
+            conn.execute('UPDATE catalog_version SET version = version + 1')
+
+    def put_job(self, snapshot, keep):
+        """Save a job's latest snapshot, keeping the keep most recently saved jobs"""
+        with self._write() as conn:
+            cursor = conn.execute('INSERT OR REPLACE INTO scrape_jobs (job_id, snapshot) VALUES (?, ?)',
+                                  (snapshot['job_id'], json.dumps(snapshot)))
+            # REPLACE gives the row a new rowid, so rowids follow save order
+            conn.execute('DELETE FROM scrape_jobs WHERE rowid <= ?', (cursor.lastrowid - keep,))
+
+    def get_job(self, job_id):
+        row = self._conn().execute('SELECT snapshot FROM scrape_jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def insert(self, record):
+        """Store a record, assigning it the next id"""
+        return self.insert_many([record])[0]
+
+    def insert_many(self, records):
+        """Store several records in one transaction"""
+        fields = BUSINESS_FIELDS[1:]
+        sql = (f"INSERT INTO businesses ({', '.join(fields)}) "
+               f"VALUES ({', '.join('?' for _ in fields)})")
+        with self._write() as conn:
+            conn.executemany(sql, ([record.get(field) for field in fields] for record in records))
+            # Rows inserted in one write transaction get consecutive ids
+            last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        for offset, record in enumerate(records):
+            record['id'] = last_id - len(records) + 1 + offset
+        return records
+
+    def get(self, business_id):
+        row = self._conn().execute('SELECT * FROM businesses WHERE id = ?', (business_id,)).fetchone()
+        return dict(row) if row else None
+
+    def content_hash(self, url):
+        """Content hash stored for url, or None"""
+        row = self._conn().execute(
+            'SELECT content_hash FROM businesses WHERE url = ? ORDER BY id LIMIT 1', (url,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, record):
+        """Insert a record, or update the one already stored for its url.
+
+        Returns (stored record, status) like MemoryStore.upsert(). Touching
+        last_updated alone doesn't fire the full-text update trigger.
+        """
+        with self._write() as conn:
+            row = conn.execute(
+                'SELECT * FROM businesses WHERE url = ? ORDER BY id LIMIT 1', (record['url'],)
+            ).fetchone()
+            if row is None:
+                fields = BUSINESS_FIELDS[1:]
+                cursor = conn.execute(
+                    f"INSERT INTO businesses ({', '.join(fields)}) "
+                    f"VALUES ({', '.join('?' for _ in fields)})",
+                    [record.get(field) for field in fields]
+                )
+                record['id'] = cursor.lastrowid
+                return dict(record), 'inserted'
+
+            existing = dict(row)
+            if existing['content_hash'] and existing['content_hash'] == record['content_hash']:
+                conn.execute('UPDATE businesses SET last_updated = ? WHERE id = ?',
+                             (record['last_updated'], existing['id']))
+                existing['last_updated'] = record['last_updated']
+                return existing, 'unchanged'
+
+            record['id'] = existing['id']
+            record['scraped_date'] = existing['scraped_date']
+            # Only changed columns, so the FTS trigger fires just when needed
+            changed = [f for f in BUSINESS_FIELDS[1:] if record.get(f) != existing[f]]
+            if changed:
+                conn.execute(
+                    f"UPDATE businesses SET {', '.join(f'{f} = ?' for f in changed)} WHERE id = ?",
+                    [record.get(f) for f in changed] + [record['id']]
+                )
+            return dict(record), 'updated'
+
+    def upsert_many(self, records):
+        """Upsert records with distinct urls in one transaction.
+
+        Returns counts like MemoryStore.upsert_many(). Existing rows are
+        looked up in chunks, then inserts, updates and last_updated bumps
+        each go through a single executemany().
+        """
+        fields = BUSINESS_FIELDS[1:]
+        update_fields = [f for f in fields if f != 'scraped_date']
+        urls = list({record['url'] for record in records if record['url']})
+        with self._write() as conn:
+            existing = {}
+            for start in range(0, len(urls), SQLITE_DELETE_CHUNK):
+                chunk = urls[start:start + SQLITE_DELETE_CHUNK]
+                rows = conn.execute(
+                    f"SELECT id, url, content_hash FROM businesses WHERE url IN ({', '.join('?' for _ in chunk)}) "
+                    f"ORDER BY id DESC", chunk
+                ).fetchall()
+                # Descending, so the oldest row for a url wins like in upsert()
+                existing.update((row[1], (row[0], row[2])) for row in rows)
+
+            inserts, updates, touches = [], [], []
+            for record in records:
+                row = existing.get(record['url'])
+                if row is None:
+                    inserts.append([record.get(f) for f in fields])
+                elif row[1] and row[1] == record['content_hash']:
+                    touches.append((record['last_updated'], row[0]))
+                else:
+                    updates.append([record.get(f) for f in update_fields] + [row[0]])
+
+            # The full-text triggers cost more per row than the rest of the
+            # write together. A big batch drops them inside this transaction
+            # and indexes its rows with one statement per chunk instead; the
+            # drop commits or rolls back with the batch, so no other
+            # connection ever sees the table without them.
+            # The facet triggers go the same way, with the counts moved by
+            # one GROUP BY per facet.
+            bulk = len(inserts) + len(updates) > BULK_DELETE_THRESHOLD
+            if bulk:
+                for trigger in ('fts_insert', 'fts_update', 'facets_insert', 'facets_update'):
+                    conn.execute(f'DROP TRIGGER businesses_{trigger}')
+                first_new = conn.execute('SELECT COALESCE(MAX(id), 0) FROM businesses').fetchone()[0] + 1
+                updated_ids = [row[-1] for row in updates]
+                self._fts_chunks(conn, updated_ids, delete=True)
+                self._facet_chunks(conn, updated_ids, -1)
+
+            conn.executemany(
+                f"INSERT INTO businesses ({', '.join(fields)}) VALUES ({', '.join('?' for _ in fields)})", inserts
+            )
+            conn.executemany(
+                f"UPDATE businesses SET {', '.join(f'{f} = ?' for f in update_fields)} WHERE id = ?", updates
+            )
+            conn.executemany('UPDATE businesses SET last_updated = ? WHERE id = ?', touches)
+
+            if bulk:
+                self._fts_chunks(conn, updated_ids)
+                conn.execute(
+                    f"INSERT INTO businesses_fts(rowid, {', '.join(SEARCH_FIELDS)}) "
+                    f"SELECT id, {', '.join(SEARCH_FIELDS)} FROM businesses WHERE id >= ?", (first_new,)
+                )
+                self._facet_chunks(conn, updated_ids, 1)
+                self._count_facets(conn, 'id >= ?', [first_new], 1)
+                for statement in SQLITE_FTS_SCHEMA[1:] + SQLITE_FACET_SCHEMA[1:]:
+                    conn.execute(statement)
+        return {'inserted': len(inserts), 'updated': len(updates), 'unchanged': len(touches)}
+
+    @staticmethod
+    def _fts_chunks(conn, business_ids, delete=False):
+        """Add rows to the full-text index from their current values, or remove them"""
+        columns = ', '.join(SEARCH_FIELDS)
+        target = f'businesses_fts(businesses_fts, rowid, {columns})' if delete else f'businesses_fts(rowid, {columns})'
+        values = f"'delete', id, {columns}" if delete else f'id, {columns}'
+        for start in range(0, len(business_ids), SQLITE_DELETE_CHUNK):
+            chunk = business_ids[start:start + SQLITE_DELETE_CHUNK]
+            conn.execute(
+                f"INSERT INTO {target} SELECT {values} FROM businesses "
+                f"WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+
+    @staticmethod
+    def _count_facets(conn, where, params, step):
+        """Add step to the facet counts for every row matching where, from its current values"""
+        for facet, value in SQLITE_FACET_VALUES.items():
+            conn.execute(
+                f"INSERT INTO business_facets (facet, value, count) "
+                f"SELECT '{facet}', {value.format(row='')}, {step} * COUNT(*) FROM businesses "
+                f"WHERE {where} GROUP BY 2 "
+                f"ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count", params
+            )
+
+    def _facet_chunks(self, conn, business_ids, step):
+        """_count_facets() for the given ids, a bound-parameter chunk at a time"""
+        for start in range(0, len(business_ids), SQLITE_DELETE_CHUNK):
+            chunk = business_ids[start:start + SQLITE_DELETE_CHUNK]
+            self._count_facets(conn, f"id IN ({', '.join('?' for _ in chunk)})", chunk, step)
+
+    def facet_counts(self, search=''):
+        """{facet: {value: count}} over the whole catalog, or over search matches.
+
+        The catalog-wide counts come straight from business_facets; a
+        search groups just its full-text matches.
+        """
+        terms = tokenize(search) if search else []
+        conn = self._conn()
+        if terms:
+            match = ' '.join(f'"{term}"*' for term in terms)
+            rows = conn.execute(' UNION ALL '.join(
+                f"SELECT '{facet}', {value.format(row='')}, COUNT(*) FROM businesses "
+                f"WHERE id IN (SELECT rowid FROM businesses_fts WHERE businesses_fts MATCH ?) GROUP BY 2"
+                for facet, value in SQLITE_FACET_VALUES.items()
+            ), [match] * len(FACETS)).fetchall()
+        else:
+            rows = conn.execute('SELECT facet, value, count FROM business_facets WHERE count > 0').fetchall()
+        counts = {facet: {} for facet in FACETS}
+        for facet, value, count in rows:
+            counts[facet][value] = count
+        return counts
+
+    def stale(self, before, limit):
+        """Up to limit (id, url, content_hash) of records last updated before the given timestamp, oldest first"""
+        rows = self._conn().execute(
+            'SELECT id, url, content_hash FROM businesses WHERE last_updated < ? AND url IS NOT NULL '
+            'ORDER BY last_updated, id LIMIT ?', (before, limit)
+        ).fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    def delete(self, business_id):
+        """Delete by id, returning whether anything was deleted"""
+        with self._write() as conn:
+            cursor = conn.execute('DELETE FROM businesses WHERE id = ?', (business_id,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, business_ids):
+        """Delete every given id that exists in one transaction, returning the deleted ids"""
+        business_ids = list(business_ids)
+        removed = []
+        with self._write() as conn:
+            for start in range(0, len(business_ids), SQLITE_DELETE_CHUNK):
+                chunk = business_ids[start:start + SQLITE_DELETE_CHUNK]
+                rows = conn.execute(
+                    f"DELETE FROM businesses WHERE id IN ({', '.join('?' for _ in chunk)}) RETURNING id",
+                    chunk
+                ).fetchall()
+                removed.extend(row[0] for row in rows)
+        return removed
+
+    def query(self, search, sort_by, offset, limit, after=None, fields=BUSINESS_FIELDS):
+        """Return one page of matching businesses and the total match count.
+
+        The ORDER BY walks an index, so only offset + limit rows are read,
+        or just limit rows when paging with an after=(value, id) cursor.
+        Searches go through the FTS5 index, with every term as a prefix.
+        Only the given fields are selected.
+        """
+        terms = tokenize(search) if search else []
+        conn = self._conn()
+        columns = ', '.join(fields)
+
+        if sort_by == RELEVANCE and terms:
+            match = ' '.join(f'"{term}"*' for term in terms)
+            total = conn.execute(
+                'SELECT COUNT(*) FROM businesses_fts WHERE businesses_fts MATCH ?', (match,)
+            ).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {', '.join('b.' + field for field in fields)} "
+                f'FROM businesses_fts JOIN businesses b ON b.id = businesses_fts.rowid '
+                f'WHERE businesses_fts MATCH ? ORDER BY {SQLITE_RANK}, b.id LIMIT ? OFFSET ?',
+                (match, limit, offset)
+            ).fetchall()
+            return [dict(row) for row in rows], total
+
+        sort_by, (field, nocase, descending) = sort_spec(sort_by)
+        collate = ' COLLATE NOCASE' if nocase else ''
+        conditions = []
+        params = []
+
+        if terms:
+            match = ' '.join(f'"{term}"*' for term in terms)
+            conditions.append('id IN (SELECT rowid FROM businesses_fts WHERE businesses_fts MATCH ?)')
+            params.append(match)
+            total = conn.execute(
+                'SELECT COUNT(*) FROM businesses_fts WHERE businesses_fts MATCH ?', (match,)
+            ).fetchone()[0]
+        else:
+            total = conn.execute('SELECT COUNT(*) FROM businesses').fetchone()[0]
+
+        def select(extra, extra_params, limit, offset):
+            where = ' AND '.join(conditions + extra)
+            where = f'WHERE {where}' if where else ''
+            rows = conn.execute(
+                f'SELECT {columns} FROM businesses {where} ORDER BY {SQLITE_ORDER[sort_by]} LIMIT ? OFFSET ?',
+                params + extra_params + [limit, offset]
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+        if after is None:
+            return select([], [], limit, offset), total
+
+        # Keyset pagination: the rest of the cursor's tie group, then the rows
+        # past its value. Two range seeks on the sort index; a single OR or
+        # row-value condition makes SQLite scan instead.
+        value, business_id = after
+        value = '' if value is None else str(value)
+        rows = select([f'{field}{collate} = ?', 'id > ?'], [value, business_id], limit, 0)
+        if len(rows) < limit:
+            compare = '<' if descending else '>'
+            rows += select([f'{field}{collate} {compare} ?'], [value], limit - len(rows), 0)
+        return rows, total
+
+    def iterate(self, search, sort_by, since=None, chunk_size=EXPORT_CHUNK):
+        """Yield every matching business in sort order, chunk_size dicts at a time.
+
+        since keeps only records last updated at or after that timestamp.
+        Runs as one statement on a connection of its own, so the whole
+        export reads a single snapshot and other work on this thread
+        isn't stuck behind the open statement.
+        """
+        terms = tokenize(search) if search else []
+        match = ' '.join(f'"{term}"*' for term in terms)
+
+        if sort_by == RELEVANCE and terms:
+            since_clause = 'AND b.last_updated >= ? ' if since is not None else ''
+            sql = (f'SELECT b.* FROM businesses_fts JOIN businesses b ON b.id = businesses_fts.rowid '
+                   f'WHERE businesses_fts MATCH ? {since_clause}ORDER BY {SQLITE_RANK}, b.id')
+            params = [match]
+        else:
+            sort_by, _ = sort_spec(sort_by)
+            conditions = []
+            params = []
+            if terms:
+                conditions.append('id IN (SELECT rowid FROM businesses_fts WHERE businesses_fts MATCH ?)')
+                params.append(match)
+            if since is not None:
+                conditions.append('last_updated >= ?')
+            where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+            sql = f'SELECT * FROM businesses {where}ORDER BY {SQLITE_ORDER[sort_by]}'
+        if since is not None:
+            params.append(since)
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+
+class Database:
+    def __init__(self, store=None):
+        """Business catalog on top of a pluggable storage backend"""
+        self.store = store if store is not None else MemoryStore()
+        # The store's version is bumped on every write, by this process or
+        # any other sharing the store. This is the one the cached query
+        # results were computed at; the catalog ETag is built from it.
+        self.version = self.store.catalog_version()
+        self.query_cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        logger.info('Database initialized (%s)', type(self.store).__name__)
+        if self.store.created:
+            self._add_sample_data()
     
     def _add_sample_data(self):
         """Add sample businesses"""
         sample_businesses = [
             {
-                'id': 1,
                 'url': 'https://google.com',
                 'company_name': 'Google LLC',
                 'business_type': 'Technology',
@@ -50,7 +1034,6 @@ class Database:
                 'last_updated': datetime.now().isoformat()
             },
             {
-                'id': 2,
                 'url': 'https://microsoft.com',
                 'company_name': 'Microsoft Corporation',
                 'business_type': 'Technology',
@@ -83,7 +1066,6 @@ class Database:
                 'last_updated': datetime.now().isoformat()
             },
             {
-                'id': 3,
                 'url': 'https://apple.com',
                 'company_name': 'Apple Inc.',
                 'business_type': 'Technology',
@@ -117,114 +1099,159 @@ class Database:
             }
         ]
         
-        self.businesses = sample_businesses
-        self.next_id = 4
+        for business in sample_businesses:
+            business['url'] = canonical_url(business['url'])
+            self.store.insert(business)
 
-    def _simple_search(self, search_term, business):
-        """Simple search function"""
-        if not search_term:
-            return True
-        
-        search_term = search_term.lower()
-        
-        # Search in these fields
-        searchable_text = (
-            str(business.get('company_name', '')).lower() + ' ' +
-            str(business.get('business_type', '')).lower() + ' ' +
-            str(business.get('industry', '')).lower() + ' ' +
-            str(business.get('location', '')).lower() + ' ' +
-            str(business.get('description', '')).lower()
-        )
-        
-        # Check if search term is in any of the text
-        return search_term in searchable_text
+    def _changed(self):
+        """Note a write: bump the version and drop cached query results"""
+        self.store.bump_version()
+        self._sync()
+
+    def _sync(self):
+        """Catch up with the store's version, dropping the cache if it moved.
+
+        Returns the version. A write by another process shows up here.
+        """
+        version = self.store.catalog_version()
+        with self.cache_lock:
+            if version != self.version:
+                self.version = version
+                self.query_cache.clear()
+        return version
+
+    def etag(self):
+        """ETag for the current state of the catalog"""
+        return f'{self.store.epoch}-{self._sync()}'
+
+    def content_hash(self, url):
+        """Content hash of the business stored for url, or None"""
+        return self.store.content_hash(canonical_url(url))
+
+    def stale_urls(self, max_age, limit=1000):
+        """(url, content_hash) of businesses not updated within max_age (a timedelta), oldest first"""
+        before = (datetime.now() - max_age).isoformat()
+        return [(url, stored_hash) for _, url, stored_hash in self.store.stale(before, limit)]
+
+    @staticmethod
+    def _normalize(business_data, now=None):
+        """A full record in stored form: defaults filled in, canonical url, fresh timestamps"""
+        new_business = {'id': None, **BUSINESS_DEFAULTS}
+        for field, value in business_data.items():
+            if field in BUSINESS_DEFAULTS:
+                new_business[field] = value
+        if new_business['url']:
+            new_business['url'] = canonical_url(new_business['url'])
+        new_business['scraped_date'] = now or datetime.now().isoformat()
+        new_business['last_updated'] = now or datetime.now().isoformat()
+        return new_business
 
     def insert_business(self, business_data):
-        """Add new business"""
+        """Add a business, or refresh the one already stored for its URL.
+
+        URLs are compared in canonical form. If the stored content_hash
+        matches, only last_updated changes. The result's status says
+        whether the record was inserted, updated or unchanged.
+        """
         try:
-            new_business = {
-                'id': self.next_id,
-                'url': business_data.get('url'),
-                'company_name': business_data.get('company_name', 'Unknown Company'),
-                'business_type': business_data.get('business_type', 'Unknown'),
-                'industry': business_data.get('industry', 'Unknown'),
-                'location': business_data.get('location', 'Unknown'),
-                'founded_year': business_data.get('founded_year', 'Unknown'),
-                'description': business_data.get('description', 'No description'),
-                'business_model': business_data.get('business_model', 'Unknown'),
-                'company_size': business_data.get('company_size', 'Unknown'),
-                'estimated_revenue': business_data.get('estimated_revenue', 'Not disclosed'),
-                'employee_count': business_data.get('employee_count', 'Not specified'),
-                'target_market': business_data.get('target_market', 'General Market'),
-                'key_services': business_data.get('key_services', 'Not specified'),
-                'contact_info': business_data.get('contact_info', 'Not found'),
-                'social_media': business_data.get('social_media', 'Not found'),
-                'technologies': business_data.get('technologies', 'Not specified'),
-                'competitive_advantages': business_data.get('competitive_advantages', 'Not specified'),
-                'key_executives': business_data.get('key_executives', 'Not found'),
-                'awards_recognition': business_data.get('awards_recognition', 'None'),
-                'recent_news': business_data.get('recent_news', 'None'),
-                'product_categories': business_data.get('product_categories', 'Not specified'),
-                'client_testimonials': business_data.get('client_testimonials', 'None'),
-                'partnerships': business_data.get('partnerships', 'None'),
-                'certifications': business_data.get('certifications', 'None'),
-                'market_focus': business_data.get('market_focus', 'Unknown'),
-                'business_maturity': business_data.get('business_maturity', 'Unknown'),
-                'content': business_data.get('content', 'No content'),
-                'summary': business_data.get('summary', 'No summary'),
-                'scraped_date': datetime.now().isoformat(),
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            self.businesses.append(new_business)
-            self.next_id += 1
+            new_business = self._normalize(business_data)
+            stored, status = self.store.upsert(new_business)
+            self._changed()
             
-            print(f"✅ Added business: {new_business['company_name']}")
-            return {"success": True, "data": new_business}
+            logger.debug('%s business: %s', status.capitalize(), stored['company_name'])
+            return {"success": True, "data": stored, "status": status}
                 
         except Exception as e:
-            print(f"❌ Error adding business: {e}")
+            logger.exception('Error adding business: %s', e)
             return {"success": False, "error": str(e)}
 
-    def get_businesses(self, search='', sort_by='scraped_date', page=1, per_page=12):
-        """Get businesses with search and pagination"""
+    def import_businesses(self, records):
+        """Upsert a batch of records as one write.
+
+        Each record is normalized like insert_business() does; call
+        validate_business() on untrusted input first. When a url repeats in
+        the batch, the last record for it is kept and the earlier ones
+        count as duplicates. Returns the counts per outcome.
+        """
+        now = datetime.now().isoformat()
+        batch = {}
+        unkeyed = []
+        duplicates = 0
+        for record in records:
+            new_business = self._normalize(record, now)
+            url = new_business['url']
+            if not url:
+                unkeyed.append(new_business)
+                continue
+            if url in batch:
+                duplicates += 1
+            batch[url] = new_business
+        
+        counts = self.store.upsert_many(list(batch.values()) + unkeyed)
+        counts['duplicates'] = duplicates
+        self._changed()
+        logger.debug('Imported %d businesses (%d new)', len(batch) + len(unkeyed), counts['inserted'])
+        return counts
+
+    def get_businesses(self, search='', sort_by='scraped_date', page=1, per_page=12, after=None,
+                       fields=BUSINESS_FIELDS):
+        """Get businesses with search and pagination.
+
+        Pass the next_cursor from a previous response as after to get the
+        following page without counting past every earlier row; page is then
+        only echoed back. Raises ValueError for a bad cursor.
+
+        fields limits each business to those fields (see parse_fields); the
+        store only reads and copies what is asked for.
+
+        Results are cached until the next write; treat them as read-only.
+        """
+        cursor = None
+        if after:
+            if sort_by == RELEVANCE:
+                raise ValueError('Cursor pagination is not supported for relevance sort')
+            cursor = decode_cursor(after, sort_by)
+
+        search_term = search.strip() if search else ''
+        fields = tuple(fields)
+        key = (search_term, sort_by, page, per_page, after or None, fields)
+        version = self._sync()
+        with self.cache_lock:
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                self.query_cache.move_to_end(key)
+                return cached
+
         try:
-            # Start with all businesses
-            filtered_businesses = self.businesses.copy()
-            
-            print(f"📊 Total businesses: {len(filtered_businesses)}")
+            start_idx = (page - 1) * per_page
             
-            # Apply search
-            if search and search.strip():
-                search_term = search.strip()
-                filtered_businesses = [
-                    b for b in filtered_businesses 
-                    if self._simple_search(search_term, b)
-                ]
-                print(f"🔍 Search '{search_term}' found {len(filtered_businesses)} results")
+            # The cursor is built from id and the sort field, so read those too
+            sort_field = sort_spec(sort_by)[1][0]
+            extra = tuple(field for field in ('id', sort_field) if field not in fields)
+            page_businesses, total = self.store.query(search_term, sort_by, start_idx, per_page, cursor,
+                                                      fields + extra)
             
-            # Sort businesses
-            if sort_by == 'company_name':
-                filtered_businesses.sort(key=lambda x: x.get('company_name', '').lower())
-            elif sort_by == 'business_type':
-                filtered_businesses.sort(key=lambda x: x.get('business_type', '').lower())
-            elif sort_by == 'industry':
-                filtered_businesses.sort(key=lambda x: x.get('industry', '').lower())
-            elif sort_by == 'founded_year':
-                filtered_businesses.sort(key=lambda x: x.get('founded_year', '0'), reverse=True)
-            else:  # Default to scraped_date
-                filtered_businesses.sort(key=lambda x: x.get('scraped_date', ''), reverse=True)
+            if search_term:
+                logger.debug('Search %r found %d results', search_term, total)
             
             # Pagination
-            total = len(filtered_businesses)
             total_pages = (total + per_page - 1) // per_page if total > 0 else 1
-            start_idx = (page - 1) * per_page
-            end_idx = start_idx + per_page
-            page_businesses = filtered_businesses[start_idx:end_idx]
+            has_next = page < total_pages
+            next_cursor = None
+            if sort_by != RELEVANCE and len(page_businesses) == per_page:
+                next_cursor = encode_cursor(sort_by, page_businesses[-1])
+            if cursor is not None:
+                has_next = next_cursor is not None
+            if not has_next:
+                next_cursor = None
+            if extra:
+                for business in page_businesses:
+                    for field in extra:
+                        del business[field]
             
-            print(f"✅ Returning {len(page_businesses)} businesses on page {page}")
+            logger.debug('Returning %d businesses on page %d', len(page_businesses), page)
             
-            return {
+            result = {
                 "success": True,
                 "data": page_businesses,
                 "pagination": {
@@ -232,13 +1259,22 @@ class Database:
                     "per_page": per_page,
                     "total_items": total,
                     "total_pages": total_pages,
-                    "has_next": page < total_pages,
-                    "has_prev": page > 1
+                    "has_next": has_next,
+                    "has_prev": page > 1 or cursor is not None,
+                    "next_cursor": next_cursor
                 }
             }
             
+            with self.cache_lock:
+                # A write during the query may not be in the result
+                if self.version == version:
+                    self.query_cache[key] = result
+                    if len(self.query_cache) > QUERY_CACHE_SIZE:
+                        self.query_cache.popitem(last=False)
+            return result
+            
         except Exception as e:
-            print(f"❌ Database error: {e}")
+            logger.exception('Database error: %s', e)
             return {
                 "success": False, 
                 "error": str(e), 
@@ -249,32 +1285,127 @@ class Database:
                     "total_items": 0,
                     "total_pages": 1,
                     "has_next": False,
-                    "has_prev": False
+                    "has_prev": False,
+                    "next_cursor": None
                 }
             }
 
+    def get_facets(self, search=''):
+        """Count businesses per value of each of FACETS, optionally within a search.
+
+        Without a search the store's running counters are read, so the cost
+        is the number of distinct values, not the catalog size. Each facet
+        lists its values by count, highest first. Cached like
+        get_businesses().
+        """
+        search_term = search.strip() if search else ''
+        key = ('facets', search_term)
+        version = self._sync()
+        with self.cache_lock:
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                self.query_cache.move_to_end(key)
+                return cached
+
+        try:
+            counts = self.store.facet_counts(search_term)
+            result = {
+                "success": True,
+                "data": {
+                    facet: [{"value": value, "count": count}
+                            for value, count in sorted(values.items(), key=lambda item: (-item[1], item[0]))]
+                    for facet, values in counts.items()
+                },
+                "total_items": sum(counts[FACETS[0]].values())
+            }
+            
+            with self.cache_lock:
+                if self.version == version:
+                    self.query_cache[key] = result
+                    if len(self.query_cache) > QUERY_CACHE_SIZE:
+                        self.query_cache.popitem(last=False)
+            return result
+            
+        except Exception as e:
+            logger.exception('Database error: %s', e)
+            return {"success": False, "error": str(e)}
+
+    def export_businesses(self, search='', sort_by='scraped_date', since=None):
+        """Yield every matching business in chunks of dicts, for streaming exports.
+
+        Uses the same search and sort as get_businesses. since is an ISO
+        timestamp; only businesses last updated at or after it are kept.
+        Raises ValueError for a bad since, before anything is read.
+        """
+        if since:
+            since = datetime.fromisoformat(since).isoformat()
+        search_term = search.strip() if search else ''
+        return self.store.iterate(search_term, sort_by, since or None)
+
+    def get_business(self, business_id):
+        """Get one business by ID"""
+        try:
+            business = self.store.get(business_id)
+            if business is None:
+                return {"success": False, "error": "Business not found"}
+            return {"success": True, "data": business}
+
+        except Exception as e:
+            logger.exception('Database error: %s', e)
+            return {"success": False, "error": str(e)}
+
+    def save_job(self, snapshot, keep):
+        """Share a scrape job's snapshot with other processes using the store"""
+        try:
+            self.store.put_job(snapshot, keep)
+        except Exception as e:
+            logger.exception('Error saving job %s: %s', snapshot['job_id'], e)
+
+    def get_job(self, job_id):
+        """Snapshot of a job saved by save_job(), or None"""
+        return self.store.get_job(job_id)
+
     def delete_business(self, business_id):
         """Delete business by ID"""
         try:
-            original_count = len(self.businesses)
-            self.businesses = [b for b in self.businesses if b['id'] != business_id]
-            
-            if len(self.businesses) < original_count:
-                print(f"✅ Deleted business ID: {business_id}")
+            if self.store.delete(business_id):
+                self._changed()
+                logger.debug('Deleted business ID: %s', business_id)
                 return {"success": True, "message": "Business deleted"}
             else:
                 return {"success": False, "error": "Business not found"}
             
         except Exception as e:
-            print(f"❌ Delete error: {e}")
+            logger.exception('Delete error: %s', e)
+            return {"success": False, "error": str(e)}
+
+    def delete_businesses(self, business_ids):
+        """Delete several businesses by ID, reporting which ones were missing"""
+        try:
+            business_ids = list(dict.fromkeys(business_ids))
+            deleted = self.store.delete_many(business_ids)
+            if deleted:
+                self._changed()
+            found = set(deleted)
+            not_found = [i for i in business_ids if i not in found]
+            logger.debug('Deleted %d businesses', len(deleted))
+            return {"success": True, "deleted": deleted, "not_found": not_found}
+
+        except Exception as e:
+            logger.exception('Delete error: %s', e)
             return {"success": False, "error": str(e)}
 
 # Single database instance
 _db_instance = None
 
 def get_db():
-    """Get database instance"""
+    """Get database instance.
+
+    Set DATABASE_PATH to keep the catalog in a SQLite file; otherwise it
+    lives in memory.
+    """
     global _db_instance
     if _db_instance is None:
-        _db_instance = Database()
-    return _db_instance
\ No newline at end of file
+        path = os.environ.get('DATABASE_PATH')
+        _db_instance = Database(SQLiteStore(path) if path else MemoryStore())
+    return _db_instance
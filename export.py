@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+
+from records import BUSINESS_FIELDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet exports are unavailable
+    pa = None
+
+# Export format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def ndjson_stream(chunks):
+    """One JSON object per line, a chunk of lines per yield"""
+    for records in chunks:
+        yield ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def csv_stream(chunks):
+    """A header row, then one row per record in BUSINESS_FIELDS order"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=BUSINESS_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for records in chunks:
+        writer.writerows(records)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _Drain:
+    """Write-only file that hands over what was written since the last drain()"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def parquet_stream(chunks):
+    """A Parquet file written one row group per chunk.
+
+    Each row group is sent as soon as it is encoded; the footer that
+    indexes them goes out last.
+    """
+    schema = pa.schema([('id', pa.int64())] + [(field, pa.string()) for field in BUSINESS_FIELDS[1:]])
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    try:
+        for records in chunks:
+            columns = {field: [record.get(field) for record in records] for field in BUSINESS_FIELDS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_stream(chunks, export_format):
+    """Encode chunks of business dicts in one of EXPORT_FORMATS.
+
+    Raises ValueError for an unknown format, or parquet without pyarrow.
+    """
+    if export_format == 'ndjson':
+        return ndjson_stream(chunks)
+    if export_format == 'csv':
+        return csv_stream(chunks)
+    if export_format == 'parquet':
+        if pa is None:
+            raise ValueError('Parquet export needs pyarrow installed')
+        return parquet_stream(chunks)
+    raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
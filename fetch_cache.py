@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+
+from fetcher import canonical_url
+
+# Entries older than this are revalidated with the origin before reuse
+CACHE_TTL_SECONDS = 6 * 60 * 60
+# Least recently used entries are evicted beyond this many stored bytes
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+CACHE_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS fetch_cache (url TEXT PRIMARY KEY, body BLOB, etag TEXT, '
+    'last_modified TEXT, data TEXT, size INTEGER, fetched_at REAL, last_access REAL)',
+    'CREATE INDEX IF NOT EXISTS idx_fetch_cache_last_access ON fetch_cache (last_access)',
+    # Running total of the size column, moved by every store and eviction,
+    # so processes sharing the file agree on it without re-summing
+    'CREATE TABLE IF NOT EXISTS fetch_cache_size (bytes INTEGER NOT NULL)',
+    'INSERT INTO fetch_cache_size SELECT COALESCE(SUM(size), 0) FROM fetch_cache '
+    'WHERE NOT EXISTS (SELECT 1 FROM fetch_cache_size)',
+]
+
+# What the cache holds for a URL; data is the extraction made from body
+CacheEntry = namedtuple('CacheEntry', ['etag', 'last_modified', 'fetched_at', 'data'])
+
+
+class FetchCache:
+    def __init__(self, path, max_bytes=MAX_CACHE_BYTES, ttl=CACHE_TTL_SECONDS):
+        """On-disk cache of fetched pages and their extractions, keyed by canonical URL.
+
+        Bodies are kept zlib-compressed next to their ETag / Last-Modified
+        validators, so a stale entry can be revalidated with a conditional
+        request instead of downloaded again.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evictions': 0}
+
+        self._conn().execute('PRAGMA journal_mode=WAL')
+        # Processes starting together mustn't both seed the size row
+        with self._write() as conn:
+            for statement in CACHE_SCHEMA:
+                conn.execute(statement)
+            self.total_bytes = conn.execute('SELECT bytes FROM fetch_cache_size').fetchone()[0]
+
+    def _conn(self):
+        """This thread's connection"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """A write transaction on this thread's connection.
+
+        BEGIN IMMEDIATE takes the file's write lock before anything is read,
+        so a size read and the counter update made from it can't interleave
+        with another process's store.
+        """
+        conn = self._conn()
+        with self.write_lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def count(self, outcome):
+        """Bump one of the hits / revalidated / misses counters"""
+        with self.write_lock:
+            self.stats[outcome] += 1
+
+    def lookup(self, url):
+        """The cached entry for url, or None. Marks it as recently used."""
+        conn = self._conn()
+        key = canonical_url(url)
+        row = conn.execute(
+            'SELECT etag, last_modified, fetched_at, data FROM fetch_cache WHERE url = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._write() as conn:
+            conn.execute('UPDATE fetch_cache SET last_access = ? WHERE url = ?', (time.time(), key))
+        etag, last_modified, fetched_at, data = row
+        return CacheEntry(etag, last_modified, fetched_at, json.loads(data))
+
+    def is_fresh(self, entry):
+        """Whether an entry can be used without asking the origin"""
+        return time.time() - entry.fetched_at < self.ttl
+
+    def revalidated(self, url):
+        """Restart an entry's TTL after the origin answered 304 Not Modified"""
+        with self._write() as conn:
+            conn.execute('UPDATE fetch_cache SET fetched_at = ? WHERE url = ?',
+                         (time.time(), canonical_url(url)))
+
+    def store(self, url, response, data):
+        """Cache a fetched Response and the extraction made from it"""
+        body = zlib.compress(response.body or b'', 1)
+        data = json.dumps(data)
+        size = len(body) + len(data)
+        now = time.time()
+        key = canonical_url(url)
+
+        with self._write() as conn:
+            old = conn.execute('SELECT size FROM fetch_cache WHERE url = ?', (key,)).fetchone()
+            conn.execute(
+                'INSERT OR REPLACE INTO fetch_cache '
+                '(url, body, etag, last_modified, data, size, fetched_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, body, response.etag, response.last_modified, data, size, now, now)
+            )
+            total = conn.execute('UPDATE fetch_cache_size SET bytes = bytes + ? RETURNING bytes',
+                                 (size - (old[0] if old else 0),)).fetchone()[0]
+            if total > self.max_bytes:
+                total = self._evict(conn, total)
+            self.total_bytes = total
+
+    def _evict(self, conn, total):
+        """Drop least recently used entries until under max_bytes, returning the new total.
+
+        Walks the last_access index from the oldest entry and stops as soon
+        as enough is freed. Runs inside the caller's write transaction.
+        """
+        victims = []
+        freed = 0
+        for url, size in conn.execute('SELECT url, size FROM fetch_cache ORDER BY last_access'):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((url,))
+            freed += size
+        conn.executemany('DELETE FROM fetch_cache WHERE url = ?', victims)
+        conn.execute('UPDATE fetch_cache_size SET bytes = bytes - ?', (freed,))
+        self.stats['evictions'] += len(victims)
+        return total - freed
+
+    def info(self):
+        """Counters plus current size, for the health endpoint"""
+        entries = self._conn().execute('SELECT COUNT(*) FROM fetch_cache').fetchone()[0]
+        with self.write_lock:
+            return dict(self.stats, entries=entries, bytes=self.total_bytes)
+
+
+# Single cache instance
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_fetch_cache():
+    """Get the response cache, or None if disabled.
+
+    FETCH_CACHE_PATH picks the file (fetch_cache.db by default); set it to
+    an empty string to turn caching off.
+    """
+    global _cache_instance
+    path = os.environ.get('FETCH_CACHE_PATH', 'fetch_cache.db')
+    if not path:
+        return None
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = FetchCache(path)
+    return _cache_instance
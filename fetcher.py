@@ -0,0 +1,250 @@
+import asyncio
+import atexit
+import logging
+import os
+import re
+import threading
+import zlib
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+REQUEST_TIMEOUT = 10
+MAX_CONNECTIONS = 200
+PER_HOST_CONNECTIONS = 6
+# Idle connections are kept open this long for reuse
+KEEPALIVE_SECONDS = 30
+
+# Bodies are cut off after this many (decompressed) bytes
+MAX_RESPONSE_BYTES = int(os.environ.get('MAX_RESPONSE_BYTES', 2 * 1024 * 1024))
+# Bytes read from the socket at a time
+CHUNK_BYTES = 64 * 1024
+# Responses with another Content-Type are refused before the body is read;
+# a missing Content-Type is let through
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml'}
+# Only encodings we can decompress incrementally are requested
+ACCEPT_ENCODING = 'gzip, deflate'
+
+
+METRICS.counter('fetcher_truncated_total', 'Response bodies cut off at max_bytes')
+
+
+class UnsupportedContent(aiohttp.ClientError):
+    """The response isn't an HTML page we can read"""
+
+
+# Errors callers should report as "Failed to access website"
+FetchError = (aiohttp.ClientError, asyncio.TimeoutError)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# URLs canonical_url() would leave alone apart from adding the root path:
+# lowercase http(s) scheme and host, no port, userinfo, query-only or fragment
+CANONICAL_FORM = re.compile(r'(?:https?)://[a-z0-9.-]+(/[^#\s]*)?')
+
+# Result of a (possibly conditional) GET; body is None on 304 Not Modified
+# and truncated is set when the body was cut at the size limit
+Response = namedtuple('Response', ['status', 'body', 'etag', 'last_modified', 'truncated'],
+                      defaults=[False])
+
+
+def canonical_url(url):
+    """Normalize a URL so the same page always gets the same key.
+
+    Lowercases the scheme and host, drops default ports and the fragment,
+    and gives an empty path a trailing slash.
+    """
+    url = url.strip()
+    match = CANONICAL_FORM.fullmatch(url)
+    if match:
+        return url if match.group(1) else url + '/'
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+class _Decompressor:
+    """Incremental Content-Encoding decoder with bounded output per call"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self.zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self.zlib = zlib.decompressobj()
+        elif encoding in ('', 'identity'):
+            self.zlib = None
+        else:
+            raise UnsupportedContent(f'Unsupported content encoding: {encoding}')
+        self.started = False
+
+    def decompress(self, data, max_length):
+        """Decode a chunk, producing at most max_length bytes"""
+        if self.zlib is None:
+            return data[:max_length]
+        try:
+            out = self.zlib.decompress(data, max_length)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib header
+            if self.encoding != 'deflate' or self.started:
+                raise aiohttp.ClientPayloadError('Invalid compressed body')
+            self.zlib = zlib.decompressobj(-zlib.MAX_WBITS)
+            out = self.zlib.decompress(data, max_length)
+        self.started = True
+        return out
+
+    def flush(self, max_length):
+        """Whatever output the decoder still holds, up to max_length bytes"""
+        return self.zlib.flush()[:max_length] if self.zlib is not None else b''
+
+
+class AsyncFetcher:
+    def __init__(self, max_connections=MAX_CONNECTIONS, per_host=PER_HOST_CONNECTIONS,
+                 timeout=REQUEST_TIMEOUT, max_bytes=MAX_RESPONSE_BYTES):
+        """Pooled asyncio HTTP client running on its own event loop thread.
+
+        One loop serves every caller: coroutines can be scheduled on it with
+        run(), and blocking code can use fetch_sync(). The connector keeps
+        connections alive between requests for reuse. Bodies are streamed
+        and decompressed in chunks and stop at max_bytes, so one huge or
+        endless page can't take more than that much memory.
+        """
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        # Waiting for a free connection happens on these semaphores, before
+        # the request starts, so queued fetches don't eat into the timeout
+        self.slots = None
+        self.host_limits = {}
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='fetcher-loop', daemon=True)
+        self.thread.start()
+        # The session has to be created on the loop that will use it
+        self.session = self.call(self._make_session())
+
+    async def _make_session(self):
+        self.slots = asyncio.Semaphore(self.max_connections)
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host,
+            keepalive_timeout=KEEPALIVE_SECONDS,
+            ttl_dns_cache=300
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers={'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            # Bodies are decompressed in read_body(), where output is bounded
+            auto_decompress=False
+        )
+
+    def _host_limit(self, url):
+        """Semaphore capping connections to one host (only used on the loop)"""
+        host = urlsplit(url).hostname or ''
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self.host_limits[host]
+
+    async def fetch(self, url):
+        """Download a page, raising FetchError on network or HTTP errors"""
+        return (await self.fetch_response(url)).body
+
+    async def fetch_response(self, url, etag=None, last_modified=None):
+        """Download a page, revalidating a cached copy if validators are given.
+
+        Sends If-None-Match / If-Modified-Since when etag / last_modified are
+        set; a 304 comes back as a Response with no body. Raises FetchError
+        on network or other HTTP errors, and UnsupportedContent (also a
+        FetchError) for non-HTML responses.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        async with self._host_limit(url), self.slots:
+            async with self.session.get(url, headers=headers) as response:
+                if response.status == 304 and headers:
+                    return Response(304, None, etag, last_modified)
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type')
+                if content_type:
+                    mimetype = content_type.split(';')[0].strip().lower()
+                    if mimetype not in HTML_CONTENT_TYPES:
+                        raise UnsupportedContent(f'Unsupported content type: {mimetype}')
+                body, truncated = await self.read_body(response)
+                return Response(
+                    response.status,
+                    body,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    truncated
+                )
+
+    async def read_body(self, response):
+        """Stream and decompress a body, stopping at max_bytes.
+
+        Returns (body, truncated). Whatever is left unread is dropped with
+        the connection.
+        """
+        encoding = response.headers.get('Content-Encoding', '').strip().lower()
+        decoder = _Decompressor(encoding)
+        parts = []
+        size = raw_size = 0
+        async for chunk in response.content.iter_chunked(CHUNK_BYTES):
+            raw_size += len(chunk)
+            data = decoder.decompress(chunk, self.max_bytes - size)
+            parts.append(data)
+            size += len(data)
+            # The raw count bounds bodies that decompress to almost nothing
+            if size >= self.max_bytes or raw_size >= self.max_bytes:
+                response.close()
+                logger.warning('Body of %s cut off at %d bytes', response.url, self.max_bytes)
+                METRICS.inc('fetcher_truncated_total')
+                return b''.join(parts), True
+        parts.append(decoder.flush(self.max_bytes - size))
+        return b''.join(parts), False
+
+    def run(self, coro):
+        """Schedule a coroutine on the fetcher loop and return its future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro):
+        """Run a coroutine on the fetcher loop and wait for its result"""
+        return self.run(coro).result()
+
+    def fetch_sync(self, url):
+        """Blocking wrapper around fetch() for synchronous callers"""
+        return self.call(self.fetch(url))
+
+    def close(self):
+        self.call(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+# Single fetcher instance
+_fetcher_instance = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Get fetcher instance"""
+    global _fetcher_instance
+    with _fetcher_lock:
+        if _fetcher_instance is None:
+            _fetcher_instance = AsyncFetcher()
+            atexit.register(_fetcher_instance.close)
+    return _fetcher_instance
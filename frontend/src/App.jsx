@@ -54,11 +54,29 @@ function App() {
     }
   }
 
+  // Wait for a background scrape job to finish
+  const waitForJob = async (jobId) => {
+    while (true) {
+      const response = await fetch(`${config.API_BASE_URL}/api/jobs/${jobId}`)
+      const data = await response.json()
+      if (!data.success) {
+        return { success: false, error: data.error }
+      }
+      if (data.data.state === 'stored') {
+        return { success: true, data: data.data.data }
+      }
+      if (data.data.state === 'failed') {
+        return { success: false, error: data.data.error }
+      }
+      await new Promise((resolve) => setTimeout(resolve, 500))
+    }
+  }
+
   // Scrape new business
   const scrapeBusiness = async (url) => {
     setLoading(true)
     try {
-      const response = await fetch(`${config.API_BASE_URL}/api/scrape`, {
+      const response = await fetch(`${config.API_BASE_URL}/api/jobs`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json'
@@ -66,7 +84,12 @@ function App() {
         body: JSON.stringify({ url })
       })
       
-      const data = await response.json()
+      const submitted = await response.json()
+      if (!submitted.success) {
+        return { success: false, error: submitted.error }
+      }
+      
+      const data = await waitForJob(submitted.data[0].job_id)
       
       if (data.success) {
         // Refresh business list and stats immediately
@@ -125,9 +148,19 @@ function App() {
     setSelectedBusiness(null)
   }
 
-  const viewBusinessDetail = (business) => {
+  // List pages only carry card fields; load the full record for the detail view
+  const viewBusinessDetail = async (business) => {
     setSelectedBusiness(business)
     setCurrentPage('detail')
+    try {
+      const response = await fetch(`${config.API_BASE_URL}/api/businesses/${business.id}`)
+      const data = await response.json()
+      if (data.success) {
+        setSelectedBusiness(data.data)
+      }
+    } catch (error) {
+      console.error('Error fetching business:', error)
+    }
   }
 
   const goBack = () => {
@@ -1,16 +1,27 @@
 import { ChevronDown, SortAsc } from 'lucide-react'
 
-function FilterSort({ sortBy, onSortChange }) {
+// Facet whose counts are shown for each sort; other sorts show industries
+const SORT_FACETS = {
+  business_type: 'business_type',
+  industry: 'industry',
+  founded_year: 'founded_decade'
+}
+
+function FilterSort({ sortBy, onSortChange, facets = {} }) {
   const sortOptions = [
     { value: 'scraped_date', label: 'Recently Added', icon: '🕒' },
     { value: 'company_name', label: 'Company Name (A-Z)', icon: '🔤' },
     { value: 'business_type', label: 'Business Type', icon: '🏢' },
     { value: 'industry', label: 'Industry', icon: '🏭' },
-    { value: 'founded_year', label: 'Founded Year (Newest)', icon: '📅' }
+    { value: 'founded_year', label: 'Founded Year (Newest)', icon: '📅' },
+    { value: 'relevance', label: 'Best Match (when searching)', icon: '🎯' }
   ]
 
   const currentSort = sortOptions.find(option => option.value === sortBy) || sortOptions[0]
 
+  // Top counts of the facet matching the sort, so the grouping shows its sizes
+  const facetCounts = (facets[SORT_FACETS[sortBy] || 'industry'] || []).slice(0, 5)
+
   return (
     <div className="flex items-center space-x-4">
       {/* Sort Dropdown */}
@@ -41,6 +52,17 @@ function FilterSort({ sortBy, onSortChange }) {
           Sort by {currentSort.label}
         </span>
       </div>
+
+      {/* Facet counts */}
+      {facetCounts.length > 0 && (
+        <div className="hidden md:flex items-center space-x-2">
+          {facetCounts.map((facet) => (
+            <span key={facet.value} className="px-2 py-1 rounded-full bg-green-50 text-xs text-green-700">
+              {facet.value} · {facet.count}
+            </span>
+          ))}
+        </div>
+      )}
     </div>
   )
 }
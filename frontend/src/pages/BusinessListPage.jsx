@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react'
 import BusinessCard from '../components/BusinessCard'
 import FilterSort from '../components/FilterSort'
 import { Search, Grid, List, ChevronLeft, ChevronRight } from 'lucide-react'
+import config from '../config.js'
 
 function BusinessListPage({ businesses, onFetchBusinesses, onViewBusiness, onDeleteBusiness, loading }) {
   const [searchTerm, setSearchTerm] = useState('')
@@ -10,12 +11,29 @@ function BusinessListPage({ businesses, onFetchBusinesses, onViewBusiness, onDel
   const [currentPage, setCurrentPage] = useState(1)
   const [pagination, setPagination] = useState({})
   const [localBusinesses, setLocalBusinesses] = useState([])
+  const [facets, setFacets] = useState({})
 
   // Fetch businesses when component mounts or filters change
   useEffect(() => {
     fetchData()
   }, [searchTerm, sortBy, currentPage])
 
+  // Counts per industry and business type for the current search
+  useEffect(() => {
+    const fetchFacets = async () => {
+      try {
+        const response = await fetch(`${config.API_BASE_URL}/api/businesses/facets?${new URLSearchParams({ search: searchTerm })}`)
+        const data = await response.json()
+        if (data.success) {
+          setFacets(data.data)
+        }
+      } catch (error) {
+        console.error('Error fetching facets:', error)
+      }
+    }
+    fetchFacets()
+  }, [searchTerm])
+
   const fetchData = async () => {
     const result = await onFetchBusinesses({
       search: searchTerm,
@@ -61,7 +79,8 @@ function BusinessListPage({ businesses, onFetchBusinesses, onViewBusiness, onDel
       'company_name': 'Company Name',
       'business_type': 'Business Type',
       'industry': 'Industry',
-      'founded_year': 'Founded Year'
+      'founded_year': 'Founded Year',
+      'relevance': 'Best Match'
     }
     return sortLabels[sortValue] || 'Recently Added'
   }
@@ -100,6 +119,7 @@ function BusinessListPage({ businesses, onFetchBusinesses, onViewBusiness, onDel
           <FilterSort 
             sortBy={sortBy} 
             onSortChange={handleSort}
+            facets={facets}
           />
           
           {/* View Mode Toggle */}
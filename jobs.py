@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from batch import parse_site
+from fetcher import FetchError
+from scraper import crawl_depth
+
+# Job states, in the order a job moves through them
+QUEUED = 'queued'
+FETCHING = 'fetching'
+PARSING = 'parsing'
+STORED = 'stored'
+FAILED = 'failed'
+FINISHED_STATES = (STORED, FAILED)
+
+# Jobs running at once; the rest wait in the queued state
+DEFAULT_CONCURRENCY = 64
+# Finished jobs beyond this many are forgotten, oldest first
+MAX_RETAINED_JOBS = 10000
+# How often watch() re-reads jobs that another process is running
+SHARED_POLL_SECONDS = 0.5
+
+
+class Job:
+    def __init__(self, url, depth=None):
+        """A single background scrape, crawling depth levels of subpages"""
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.depth = crawl_depth(depth)
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.updated_at = self.created_at
+
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'url': self.url,
+            'state': self.state,
+            'data': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+
+class JobManager:
+    def __init__(self, scraper, concurrency=DEFAULT_CONCURRENCY, max_jobs=MAX_RETAINED_JOBS):
+        """Runs scrapes in the background and tracks their progress.
+
+        Jobs are coroutines on the scraper's fetcher loop, so waiting on the
+        network costs no threads. New and finished jobs are also saved to
+        the database, so other processes serving the same store can report
+        on them.
+        """
+        self.scraper = scraper
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.condition = threading.Condition()
+        self.slots = asyncio.Semaphore(concurrency)
+
+    def submit(self, url, depth=None):
+        """Queue a scrape and return its job right away"""
+        job = Job(url, depth)
+        with self.condition:
+            self.jobs[job.id] = job
+            self._evict_finished()
+        self.scraper.db.save_job(job.to_dict(), self.max_jobs)
+        self.scraper.fetcher.run(self._run(job))
+        return job
+
+    def get(self, job_id):
+        with self.condition:
+            return self.jobs.get(job_id)
+
+    def snapshot(self, job_id):
+        """A job's to_dict(), from this process or the database; None if unknown"""
+        job = self.get(job_id)
+        return job.to_dict() if job is not None else self.scraper.db.get_job(job_id)
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs once over the retention limit"""
+        excess = len(self.jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self.jobs.values() if j.finished][:excess]:
+            del self.jobs[job_id]
+
+    def _update(self, job, state, result=None, error=None):
+        with self.condition:
+            job.state = state
+            job.result = result
+            job.error = error
+            job.updated_at = datetime.now().isoformat()
+            self.condition.notify_all()
+            snapshot = job.to_dict() if job.finished else None
+        if snapshot:
+            # A SQLite write can wait on other processes; keep it off the loop
+            asyncio.get_running_loop().run_in_executor(None, self.scraper.db.save_job, snapshot, self.max_jobs)
+
+    async def _run(self, job):
+        """Fetch, parse and store one job's URL"""
+        try:
+            async with self.slots:
+                self._update(job, FETCHING)
+                fetched = await self.scraper.fetch_page(job.url, job.depth)
+
+                # Database calls are SQLite queries; keep them off the loop
+                loop = asyncio.get_running_loop()
+                business_data = fetched.data
+                if business_data is None:
+                    self._update(job, PARSING)
+                    known_hash = await loop.run_in_executor(None, self.scraper.known_hash, job.url, fetched.response)
+                    business_data = await parse_site(self.scraper, job.url, fetched.response.body, known_hash,
+                                                     job.depth)
+
+                result = await loop.run_in_executor(None, self.scraper.save, business_data)
+                if result['success']:
+                    await loop.run_in_executor(None, self.scraper.remember, job.url, fetched, result['data'])
+                    self._update(job, STORED, result=result['data'])
+                else:
+                    self._update(job, FAILED, error=result['error'])
+
+        except FetchError as e:
+            self._update(job, FAILED, error=f"Failed to access website: {str(e)}")
+        except Exception as e:
+            self._update(job, FAILED, error=f"Scraping failed: {str(e)}")
+
+    def watch(self, job_ids, timeout=300):
+        """Yield job snapshots as they change until all jobs finish.
+
+        Every known job is yielded once up front, then again on each state
+        change. Jobs run by another process are read from the database every
+        SHARED_POLL_SECONDS. Unknown ids are skipped, and if no id is known
+        nothing is yielded. Stops early after timeout seconds.
+        """
+        seen = {}
+        deadline = time.monotonic() + timeout
+        while True:
+            # Read outside the condition, which job updates on the loop need
+            shared = [self.scraper.db.get_job(i) for i in job_ids if i not in self.jobs]
+            with self.condition:
+                jobs = [self.jobs[i].to_dict() for i in job_ids if i in self.jobs]
+                polling = len(jobs) < len(job_ids)
+                jobs += filter(None, shared)
+                if not jobs:
+                    # Nothing to wait for: none of the ids are known
+                    return
+                # Every update moves a job to a new state
+                changed = [j for j in jobs if seen.get(j['job_id']) != j['state']]
+                remaining = deadline - time.monotonic()
+                if not changed and remaining > 0:
+                    self.condition.wait(min(remaining, SHARED_POLL_SECONDS) if polling else remaining)
+                    continue
+                for job in jobs:
+                    seen[job['job_id']] = job['state']
+                done = all(job['state'] in FINISHED_STATES for job in jobs)
+
+            for snapshot in changed:
+                yield snapshot
+            if done or time.monotonic() >= deadline:
+                return
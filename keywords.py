@@ -0,0 +1,143 @@
+import re
+
+try:
+    import ahocorasick
+except ImportError:  # fall back to the compiled regex matcher
+    ahocorasick = None
+
+# Keyword rule tables. Rules are checked in order and the first category
+# with any hit wins, so list the more specific categories first. Keywords
+# match as plain substrings of the lowercased page text.
+
+BUSINESS_TYPE_RULES = [
+    ('SaaS/Software', ['software', 'saas', 'platform', 'api']),
+    ('E-commerce', ['shop', 'store', 'buy', 'sell', 'retail']),
+    ('Consulting', ['consulting', 'advisory', 'services']),
+    ('Healthcare', ['healthcare', 'medical', 'health']),
+    ('Education', ['education', 'learning', 'training']),
+    ('Technology', ['technology', 'tech', 'digital']),
+]
+
+INDUSTRY_RULES = [
+    ('Technology', ['software', 'tech', 'ai', 'cloud']),
+    ('Healthcare', ['healthcare', 'medical', 'pharma']),
+    ('Finance', ['finance', 'banking', 'investment']),
+    ('Education', ['education', 'learning', 'university']),
+    ('Retail', ['retail', 'ecommerce', 'shopping']),
+]
+
+COMPANY_SIZE_RULES = [
+    ('Startup (1-10 employees)', ['startup', 'small team']),
+    ('Small (11-50 employees)', ['small business']),
+    ('Medium (51-200 employees)', ['medium']),
+    ('Large (201-1000 employees)', ['large', 'enterprise']),
+]
+
+
+def _trie_pattern(words):
+    """Build a regex for words with shared prefixes factored out.
+
+    Python's re tries every branch of a flat alternation at each position;
+    the trie shape means it only follows the branch for the next character,
+    so matching cost stays nearly flat as the keyword list grows.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Optional groups are greedy, so the longest keyword is tried first
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordClassifier:
+    """Several keyword rule tables compiled into a single matcher.
+
+    scan() walks the text once and counts every keyword occurrence across
+    all tables; classify() and category_counts() then answer per table from
+    those counts without touching the text again. An Aho-Corasick automaton
+    is used when pyahocorasick is installed, a trie-shaped regex otherwise.
+    """
+
+    def __init__(self, tables):
+        # tables: {name: (rules, default)}
+        self.tables = tables
+
+        keywords = set()
+        for rules, _ in tables.values():
+            for _, words in rules:
+                keywords.update(word.lower() for word in words)
+
+        self.automaton = None
+        self.pattern = None
+        if ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for word in keywords:
+                self.automaton.add_word(word, word)
+            self.automaton.make_automaton()
+        else:
+            # The lookahead matches at every position (so overlapping keywords
+            # are all seen) and captures the longest keyword starting there.
+            # Shorter keywords that are prefixes of it start there too.
+            self.pattern = re.compile('(?=(' + _trie_pattern(keywords) + '))')
+            self.prefixes = {
+                word: [other for other in keywords if word.startswith(other)]
+                for word in keywords
+            }
+
+    def scan(self, text):
+        """Count occurrences of every keyword in text (expected lowercased)"""
+        if self.automaton is not None:
+            hits = {}
+            for _, word in self.automaton.iter(text):
+                hits[word] = hits.get(word, 0) + 1
+            return hits
+
+        longest = {}
+        for match in self.pattern.finditer(text):
+            word = match.group(1)
+            longest[word] = longest.get(word, 0) + 1
+
+        hits = {}
+        for word, count in longest.items():
+            for prefix in self.prefixes[word]:
+                hits[prefix] = hits.get(prefix, 0) + count
+        return hits
+
+    def category_counts(self, hits, table):
+        """Total keyword hits for each category of a table"""
+        rules, _ = self.tables[table]
+        return {
+            category: sum(hits.get(word, 0) for word in words)
+            for category, words in rules
+        }
+
+    def classify(self, hits, table):
+        """First category in rule order with any hit, else the table default"""
+        rules, default = self.tables[table]
+        for category, words in rules:
+            if any(word in hits for word in words):
+                return category
+        return default
+
+
+# Business type and industry read the full page text, so they share a scan.
+# Company size reads the text without page chrome and gets its own.
+PAGE_KEYWORDS = KeywordClassifier({
+    'business_type': (BUSINESS_TYPE_RULES, 'Business Services'),
+    'industry': (INDUSTRY_RULES, 'Other'),
+})
+
+SIZE_KEYWORDS = KeywordClassifier({
+    'company_size': (COMPANY_SIZE_RULES, 'Unknown'),
+})
@@ -0,0 +1,98 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Request id of the API call being served; asyncio tasks and executor
+# jobs started while handling it inherit the value
+request_id = contextvars.ContextVar('request_id', default='-')
+
+# Per-request lines go to this logger, which keeps only LOG_SAMPLE_RATE of them
+REQUEST_LOGGER = 'requests'
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+# LogRecord attributes that aren't extra fields passed by the caller
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp every record with the current request id"""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Let through a random rate (0 to 1) of the records it sees"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra= fields as top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_listener = None
+
+
+def configure_logging(level=None, log_format=None, sample_rate=None):
+    """Route all logging through a queue to one stderr writer thread.
+
+    Callers only put records on the queue, so a slow or contended stderr
+    never blocks a request. LOG_LEVEL (INFO), LOG_FORMAT (text or json)
+    and LOG_SAMPLE_RATE (1.0) are read from the environment unless given.
+    Safe to call more than once; later calls are ignored.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    level = level or os.environ.get('LOG_LEVEL', 'INFO').upper()
+    log_format = log_format or os.environ.get('LOG_FORMAT', 'text')
+    if sample_rate is None:
+        sample_rate = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    # Runs in the calling thread, so the id is the caller's
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    logging.getLogger(REQUEST_LOGGER).addFilter(SampleFilter(sample_rate))
+    # Requests get our own access line instead of the dev server's
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    atexit.register(_listener.stop)
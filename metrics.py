@@ -0,0 +1,83 @@
+import threading
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    pairs = ','.join('{}="{}"'.format(
+        key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    ) for key, value in labels)
+    return '{' + pairs + '}'
+
+
+def _number(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Metrics:
+    def __init__(self):
+        """Counters and histograms kept in memory, rendered in Prometheus text format.
+
+        Metrics are declared once with counter() / histogram() and then
+        updated by name with labels passed as keyword arguments.
+        """
+        self.lock = threading.Lock()
+        # name -> (type, help text, buckets or None)
+        self.declared = {}
+        # name -> {label tuple: value} for counters,
+        # name -> {label tuple: [bucket counts..., sum, count]} for histograms
+        self.series = {}
+
+    def counter(self, name, help_text):
+        self.declared[name] = ('counter', help_text, None)
+        self.series.setdefault(name, {})
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.declared[name] = ('histogram', help_text, tuple(buckets))
+        self.series.setdefault(name, {})
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = self.declared[name][2]
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series[name]
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(buckets) + 3)
+            # Counts per bucket here; render() makes them cumulative
+            state[bisect_left(buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name, (kind, help_text, buckets) in self.declared.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for key, value in sorted(self.series[name].items()):
+                    if kind == 'counter':
+                        lines.append(f'{name}{_label_text(key)} {_number(value)}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float('inf'),), value):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_label_text(key + (("le", _number(bound)),))} {cumulative}')
+                    lines.append(f'{name}_sum{_label_text(key)} {_number(value[-2])}')
+                    lines.append(f'{name}_count{_label_text(key)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide metrics, served at /api/metrics
+METRICS = Metrics()
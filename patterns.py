@@ -0,0 +1,67 @@
+import re
+
+# Compiled once at import; extractors only ever need the first match, so
+# they use search() or finditer() and stop early instead of findall().
+
+# Trailing " - Home" / " | Welcome" style suffixes on page titles
+TITLE_SUFFIX = re.compile(r'\s*[-|–]\s*(Home|Welcome|Official).*$')
+
+# Tried in order; the first pattern with a match wins
+LOCATION_PATTERNS = [
+    re.compile(r'(?:located|based|headquartered)\s+(?:in|at)\s+([A-Z][a-z]+(?:,\s*[A-Z]{2,3})?)'),
+    re.compile(r'([A-Z][a-z]+,\s*[A-Z]{2})'),
+]
+
+# Tried in order; the first plausible year from the earliest pattern wins.
+# Separate patterns keep their literal prefix, which re scans for much
+# faster than it can try a four-way alternation at every offset.
+FOUNDED_YEAR_PATTERNS = [
+    re.compile(r'founded\s+in\s+(\d{4})', re.IGNORECASE),
+    re.compile(r'established\s+in\s+(\d{4})', re.IGNORECASE),
+    re.compile(r'started\s+in\s+(\d{4})', re.IGNORECASE),
+    re.compile(r'since\s+(\d{4})', re.IGNORECASE),
+]
+
+# The lookbehind only lets a match start where a run of address characters
+# starts. Without it a long run with no '@' is rescanned from every offset,
+# which is quadratic; the first match is the same either way.
+EMAIL = re.compile(r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# The lookahead rejects most offsets on the first character; without it the
+# optional prefix groups are tried everywhere
+PHONE = re.compile(r'(?=[+(0-9])(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}')
+
+REVENUE = re.compile(r'\$(\d+(?:,\d{3})*(?:\.\d+)?)\s*(?:million|billion|M|B)', re.IGNORECASE)
+
+# Declared charset in the first few KB of raw HTML
+CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+# Anchor hrefs in raw HTML, so a site's subpages can be fetched while its
+# landing page is still being parsed. The attribute scan stops at the next
+# '<' as well as '>', which keeps unclosed tags from making it quadratic.
+HREF = re.compile(rb'<a\s[^<>]*?\bhref\s*=\s*["\']?([^"\'\s<>]+)', re.IGNORECASE)
+
+# Subpages worth crawling, by kind, matched against the lowercased URL path.
+# Earlier kinds win when fields are merged.
+SUBPAGE_PATTERNS = [
+    ('about', re.compile(r'\b(?:about|company|who-we-are|our-story)\b')),
+    ('contact', re.compile(r'\bcontact')),
+    ('team', re.compile(r'\b(?:team|leadership|management|people|founders)\b')),
+    ('careers', re.compile(r'\b(?:careers?|jobs)\b')),
+]
+
+# A person's name next to a leadership title, either way round. Both ways
+# need a separator (comma, colon, dash, pipe or line break) between them, so
+# phrases like "Meet Our CEO" or "CTO Guide To" aren't taken for names, and
+# a name can't end in a company suffix ("Acme Corp, CEO"). Text from
+# adjacent elements runs together ("OfficerJohn"), so only a lowercase
+# letter ends a title early.
+_EXECUTIVE_TITLE = (r'(?:CEO|CTO|CFO|COO|CMO|Co-Founder|Founder|President|Managing\s+Director'
+                    r'|Chief\s+[A-Z][a-z]+\s+Officer)')
+_COMPANY_SUFFIX = r'(?:Corp|Inc|Ltd|Llc|Co|Company|Group|Labs|Systems|Solutions|Technologies)\b'
+_PERSON_NAME = rf'[A-Z][a-z]+(?:\s+[A-Z]\.)?\s+(?!{_COMPANY_SUFFIX})[A-Z][a-z]+(?:-[A-Z][a-z]+)?'
+_SEPARATOR = r'[ \t]*(?:[,:|–—-]|\n)\s*'
+EXECUTIVE_PATTERNS = [
+    re.compile(rf'({_PERSON_NAME}){_SEPARATOR}({_EXECUTIVE_TITLE})(?![a-z])'),
+    re.compile(rf'\b({_EXECUTIVE_TITLE}){_SEPARATOR}({_PERSON_NAME})'),
+]
@@ -0,0 +1,112 @@
+import sys
+
+# Every stored business field with the value used when it is missing.
+# id, scraped_date and last_updated are filled in by the database.
+BUSINESS_DEFAULTS = {
+    'url': None,
+    'company_name': 'Unknown Company',
+    'business_type': 'Unknown',
+    'industry': 'Unknown',
+    'location': 'Unknown',
+    'founded_year': 'Unknown',
+    'description': 'No description',
+    'business_model': 'Unknown',
+    'company_size': 'Unknown',
+    'estimated_revenue': 'Not disclosed',
+    'employee_count': 'Not specified',
+    'target_market': 'General Market',
+    'key_services': 'Not specified',
+    'contact_info': 'Not found',
+    'social_media': 'Not found',
+    'technologies': 'Not specified',
+    'competitive_advantages': 'Not specified',
+    'key_executives': 'Not found',
+    'awards_recognition': 'None',
+    'recent_news': 'None',
+    'product_categories': 'Not specified',
+    'client_testimonials': 'None',
+    'partnerships': 'None',
+    'certifications': 'None',
+    'market_focus': 'Unknown',
+    'business_maturity': 'Unknown',
+    'content': 'No content',
+    'summary': 'No summary',
+    'content_hash': None
+}
+
+BUSINESS_FIELDS = ['id'] + list(BUSINESS_DEFAULTS) + ['scraped_date', 'last_updated']
+BUSINESS_FIELDS_SET = frozenset(BUSINESS_FIELDS)
+
+# What a business card in the list view shows; the default projection for
+# list queries. The full record comes from the detail endpoint.
+CARD_FIELDS = ('id', 'url', 'company_name', 'business_type', 'industry', 'location', 'founded_year',
+               'description', 'company_size', 'estimated_revenue', 'scraped_date')
+
+# Low-cardinality fields; every distinct value is stored once
+CATEGORICAL_FIELDS = ('business_type', 'industry', 'company_size', 'business_maturity')
+
+# Fields that are unique per record and not worth sharing
+UNIQUE_FIELDS = ('id', 'url', 'content_hash', 'scraped_date', 'last_updated')
+
+# Other strings up to this length are shared too: placeholders such as
+# 'Not specified', founded years, locations
+SHARED_MAX_LENGTH = 64
+
+
+def _share(field, value):
+    """One string object for every record holding the same value"""
+    if not isinstance(value, str) or field in UNIQUE_FIELDS:
+        return value
+    if field in CATEGORICAL_FIELDS or len(value) <= SHARED_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+# (field, default, longest value to share) for BusinessRecord.from_dict;
+# 0 never shares, and categorical fields are always shared
+_FIELD_PLAN = tuple(
+    (field, BUSINESS_DEFAULTS.get(field),
+     0 if field in UNIQUE_FIELDS else sys.maxsize if field in CATEGORICAL_FIELDS else SHARED_MAX_LENGTH)
+    for field in BUSINESS_FIELDS
+)
+
+
+class BusinessRecord:
+    """Compact in-memory form of a stored business.
+
+    A slot per field instead of a per-record dict, and repeated strings
+    (categories, placeholder defaults) shared between records. Supports
+    record['field'] and record.get('field') so store code can treat it
+    like the dict it replaces; to_dict() gives the API the plain form.
+    """
+
+    __slots__ = tuple(BUSINESS_FIELDS)
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        get = data.get
+        # _share() inlined: this runs for every field of every stored record
+        for field, default, max_length in _FIELD_PLAN:
+            value = get(field, default)
+            if max_length and type(value) is str and len(value) <= max_length:
+                value = sys.intern(value)
+            setattr(record, field, value)
+        return record
+
+    def get(self, field, default=None):
+        return getattr(self, field, default) if field in BUSINESS_FIELDS_SET else default
+
+    def __getitem__(self, field):
+        if field not in BUSINESS_FIELDS_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in BUSINESS_FIELDS_SET:
+            raise KeyError(field)
+        setattr(self, field, _share(field, value))
+
+    def to_dict(self, fields=BUSINESS_FIELDS):
+        return {field: getattr(self, field) for field in fields}
+
@@ -0,0 +1,94 @@
+import logging
+import threading
+from datetime import timedelta
+
+from scraper import hashed_depth
+
+logger = logging.getLogger(__name__)
+
+# Businesses not updated for this long are re-scraped
+DEFAULT_MAX_AGE = timedelta(hours=24)
+# Re-scrapes started per second, at most
+DEFAULT_RATE = 2.0
+# Time between scheduled passes
+DEFAULT_INTERVAL_SECONDS = 15 * 60
+# Stale businesses picked up by one pass
+MAX_PER_PASS = 1000
+
+
+class RefreshScheduler:
+    def __init__(self, db, jobs, max_age=DEFAULT_MAX_AGE, rate=DEFAULT_RATE,
+                 interval=DEFAULT_INTERVAL_SECONDS):
+        """Re-scrapes businesses whose last_updated is older than max_age.
+
+        Scrapes are submitted as background jobs, at most rate per second.
+        Each business is re-scraped at the crawl depth it was stored with.
+        Pages that haven't changed only get last_updated bumped, so a
+        refresh of an unchanged catalog is mostly fetches.
+        Raises ValueError unless rate is positive.
+        """
+        if not rate > 0:
+            raise ValueError(f'Refresh rate must be positive, got {rate}')
+        self.db = db
+        self.jobs = jobs
+        self.max_age = max_age
+        self.rate = rate
+        self.interval = interval
+        self.stop_event = threading.Event()
+        # One pass at a time
+        self.lock = threading.Lock()
+        self.thread = None
+        # url -> job from earlier passes, so slow jobs aren't submitted twice
+        self.pending = {}
+
+    def _pass(self, max_age, limit):
+        """Submit jobs for stale businesses (caller holds the lock)"""
+        self.pending = {url: job for url, job in self.pending.items() if not job.finished}
+        submitted = []
+        for url, stored_hash in self.db.stale_urls(max_age, limit):
+            if url in self.pending:
+                continue
+            if submitted and self.stop_event.wait(1 / self.rate):
+                break
+            # Re-scrape at the depth the record was crawled to, or its
+            # subpage fields would be dropped
+            job = self.jobs.submit(url, hashed_depth(stored_hash))
+            self.pending[url] = job
+            submitted.append(job)
+        if submitted:
+            logger.info('Refresh submitted %d re-scrapes', len(submitted))
+        return submitted
+
+    def run_once(self, max_age=None, limit=MAX_PER_PASS):
+        """Run one pass now, returning the submitted jobs"""
+        with self.lock:
+            return self._pass(self.max_age if max_age is None else max_age, limit)
+
+    def trigger(self, max_age=None, limit=MAX_PER_PASS):
+        """Start a pass in the background; False if one is already running"""
+        if not self.lock.acquire(blocking=False):
+            return False
+        if max_age is None:
+            max_age = self.max_age
+
+        def run():
+            try:
+                self._pass(max_age, limit)
+            finally:
+                self.lock.release()
+
+        threading.Thread(target=run, name='refresh-pass', daemon=True).start()
+        return True
+
+    def start(self):
+        """Run a pass every interval seconds on a background thread"""
+        def loop():
+            while not self.stop_event.is_set():
+                self.run_once()
+                self.stop_event.wait(self.interval)
+
+        self.thread = threading.Thread(target=loop, name='refresh-scheduler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
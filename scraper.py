@@ -1,225 +1,889 @@
-import requests
 from bs4 import BeautifulSoup
-import re
+from bs4.element import Tag, NavigableString, CData
+import asyncio
+import codecs
+import hashlib
+import html
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from urllib.parse import urljoin, urlsplit
 from database import get_db
+from fetch_cache import get_fetch_cache
+from fetcher import FetchError, canonical_url, get_fetcher
+from keywords import PAGE_KEYWORDS, SIZE_KEYWORDS
+from metrics import METRICS
+import patterns
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # fall back to BeautifulSoup's html.parser
+    lxml_html = None
+
+logger = logging.getLogger(__name__)
+
+# Tags whose text the content extractor ignores
+CHROME_TAGS = {'script', 'style', 'nav', 'header', 'footer'}
+
+# Tags whose contents are code, not page text (html.parser keeps them out
+# of get_text())
+RAW_TEXT_TAGS = {'script', 'style'}
+
+# String types that soup.get_text() yields
+TEXT_TYPES = (NavigableString, CData)
+
+# 'lxml' walks an lxml tree directly; the others build a BeautifulSoup
+# tree with that tree builder
+PARSER_BACKENDS = ('lxml', 'bs4-lxml', 'html.parser')
+DEFAULT_PARSER = os.environ.get('PARSER_BACKEND') or ('lxml' if lxml_html is not None else 'html.parser')
+
+# Parse only this many leading bytes of each page; unset parses everything
+PARSE_BYTE_BUDGET = int(os.environ['PARSE_BYTE_BUDGET']) if os.environ.get('PARSE_BYTE_BUDGET') else None
+
+# Worker processes for the cpu_heavy extractors of single scrapes; 0 runs
+# every extractor inline. Batch and job scrapes already parse whole pages
+# in the parse pool, so they always run extractors inline.
+EXTRACTOR_WORKERS = int(os.environ.get('EXTRACTOR_WORKERS', 0))
+
+# Levels of about/contact/team/careers links followed from a site's landing
+# page; 0 scrapes the landing page only. Requests can ask for up to
+# MAX_CRAWL_DEPTH.
+CRAWL_DEPTH = int(os.environ.get('CRAWL_DEPTH', 0))
+MAX_CRAWL_DEPTH = 2
+# Per-site budget for those subpages: pages fetched, and seconds to wait
+# for them after the landing page arrives
+CRAWL_MAX_PAGES = int(os.environ.get('CRAWL_MAX_PAGES', 4))
+CRAWL_TIME_BUDGET = float(os.environ.get('CRAWL_TIME_BUDGET', 5))
+
+METRICS.histogram('scraper_stage_seconds', 'Wall time per page of each scrape stage')
+METRICS.counter('scraper_stage_cpu_seconds_total', 'CPU time spent in each scrape stage')
+METRICS.counter('scraper_pages_total', 'Pages parsed, by whether fields were extracted')
+METRICS.counter('scraper_extractor_calls_total', 'Extractor runs per field')
+METRICS.counter('scraper_extractor_seconds_total', 'Wall time spent in each field extractor')
+METRICS.counter('scraper_extractor_cpu_seconds_total', 'CPU time spent in each field extractor')
+
+
+def _last_descendant(tag):
+    """Last node inside tag in document order (the tag itself if empty)"""
+    node = tag
+    while isinstance(node, Tag) and node.contents:
+        node = node.contents[-1]
+    return node
+
+
+class PageAnalysis:
+    """Everything the extractors need, collected in one walk over the DOM"""
+
+    def __init__(self, soup):
+        self.soup = soup
+        self.title = None
+        self.meta = {}
+        self.links = []
+        self._paragraph_tags = []
+        self._paragraphs = None
+        self._keyword_hits = {}
+
+        page_parts = []
+        clean_parts = []
+        main_parts = []
+        body_parts = []
+        main_tag = body_tag = None
+
+        # descendants follows the parser's next_element chain, which is much
+        # cheaper than recursing through .contents. A subtree is left once
+        # its last descendant has been seen.
+        chrome_end = main_end = body_end = None
+        for node in soup.descendants:
+            node_type = type(node)
+            if node_type in TEXT_TYPES:
+                page_parts.append(node)
+                if chrome_end is None:
+                    clean_parts.append(node)
+                    if main_end is not None:
+                        main_parts.append(node)
+                    if body_end is not None:
+                        body_parts.append(node)
+            elif node_type is Tag:
+                name = node.name
+                if name == 'title':
+                    if self.title is None:
+                        self.title = node.get_text()
+                elif name == 'meta':
+                    self._add_meta(node)
+                elif name == 'a':
+                    href = node.get('href')
+                    if href is not None:
+                        self.links.append(href)
+                elif name == 'p':
+                    self._paragraph_tags.append(node)
+
+                if chrome_end is None:
+                    if name in CHROME_TAGS:
+                        chrome_end = _last_descendant(node)
+                    # Match soup.find('main') / soup.find('body') after chrome removal
+                    elif name == 'main' and main_tag is None:
+                        main_tag = node
+                        main_end = _last_descendant(node)
+                    elif name == 'body' and body_tag is None:
+                        body_tag = node
+                        body_end = _last_descendant(node)
+
+            if node is chrome_end:
+                chrome_end = None
+            if node is main_end:
+                main_end = None
+            if node is body_end:
+                body_end = None
+
+        self._set_text(page_parts, clean_parts,
+                       main_parts if main_tag is not None else body_parts if body_tag is not None else None)
+
+    def _set_text(self, page_parts, clean_parts, main_parts):
+        # Full page text, as soup.get_text() returns it
+        self.text = ''.join(page_parts)
+        self.text_lower = self.text.lower()
+
+        # Page text without script/style/nav/header/footer
+        self.clean_text = ''.join(clean_parts)
+        self.clean_text_lower = self.clean_text.lower()
+
+        # Whitespace-normalized text of <main>, falling back to <body>
+        if main_parts is not None:
+            self.main_text = ' '.join(' '.join(main_parts).split())
+        else:
+            self.main_text = None
+
+    def _add_meta(self, tag):
+        """Remember the first meta tag for each name/property"""
+        for attr in ('name', 'property'):
+            key = tag.get(attr)
+            if isinstance(key, str) and (attr, key) not in self.meta:
+                self.meta[(attr, key)] = tag
+
+    def get_meta(self, attr, key):
+        """Get the content of a meta tag, or None if the page has none"""
+        tag = self.meta.get((attr, key))
+        if tag is None:
+            return None
+        return tag.get('content', '')
+
+    def keyword_hits(self, classifier, clean=False):
+        """Keyword counts from one classifier scan, cached per page"""
+        key = (id(classifier), clean)
+        if key not in self._keyword_hits:
+            text = self.clean_text_lower if clean else self.text_lower
+            self._keyword_hits[key] = classifier.scan(text)
+        return self._keyword_hits[key]
+
+    @property
+    def paragraphs(self):
+        """Text of every <p>, computed on first use"""
+        if self._paragraphs is None:
+            self._paragraphs = [p.get_text() for p in self._paragraph_tags]
+        return self._paragraphs
+
+
+class LxmlPageAnalysis(PageAnalysis):
+    """PageAnalysis built from an lxml.html tree instead of a soup.
+
+    Text, title, meta, links and paragraphs follow the same rules as the
+    BeautifulSoup walk, so extractors can't tell the two apart.
+    """
+
+    def __init__(self, root):
+        self.soup = None
+        self.title = None
+        self.meta = {}
+        self.links = []
+        self._paragraph_tags = []
+        self._paragraphs = None
+        self._keyword_hits = {}
+
+        page_parts = []
+        clean_parts = []
+        main_parts = []
+        body_parts = []
+        chrome = main_tag = body_tag = None
+        in_main = in_body = False
+
+        def add(text):
+            page_parts.append(text)
+            if chrome is None:
+                clean_parts.append(text)
+                if in_main:
+                    main_parts.append(text)
+                if in_body:
+                    body_parts.append(text)
+
+        # An element's text comes right after its start event and its tail
+        # right after its end event, which is document order
+        for event, node in etree.iterwalk(root, events=('start', 'end', 'comment', 'pi')):
+            if event == 'start':
+                name = node.tag
+                if name == 'title':
+                    if self.title is None:
+                        self.title = node.text_content()
+                elif name == 'meta':
+                    self._add_meta(node)
+                elif name == 'a':
+                    href = node.get('href')
+                    if href is not None:
+                        self.links.append(href)
+                elif name == 'p':
+                    self._paragraph_tags.append(node)
+
+                if chrome is None:
+                    if name in CHROME_TAGS:
+                        chrome = node
+                    elif name == 'main' and main_tag is None:
+                        main_tag = node
+                        in_main = True
+                    elif name == 'body' and body_tag is None:
+                        body_tag = node
+                        in_body = True
+
+                if node.text and name not in RAW_TEXT_TAGS:
+                    add(node.text)
+                continue
+
+            if event == 'end':
+                if node is chrome:
+                    chrome = None
+                elif node is main_tag:
+                    in_main = False
+                elif node is body_tag:
+                    in_body = False
+            if node.tail:
+                add(node.tail)
+
+        self._set_text(page_parts, clean_parts,
+                       main_parts if main_tag is not None else body_parts if body_tag is not None else None)
+
+    @property
+    def paragraphs(self):
+        """Text of every <p>, computed on first use"""
+        if self._paragraphs is None:
+            self._paragraphs = [p.text_content() for p in self._paragraph_tags]
+        return self._paragraphs
+
+
+def _html_encoding(content):
+    """Best guess at a page's encoding: declared charset, else UTF-8 if it decodes, else cp1252"""
+    match = patterns.CHARSET.search(content, 0, 4096)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode('ascii')).name
+        except (LookupError, UnicodeDecodeError):
+            pass
+    try:
+        content.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def _lxml_document(content):
+    """Parse bytes with lxml.html, never failing on empty or odd input"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    # huge_tree lifts libxml2's nesting limit, which would silently cut
+    # deeply nested pages short
+    parser = lxml_html.HTMLParser(encoding=_html_encoding(content), huge_tree=True)
+    try:
+        return lxml_html.document_fromstring(content, parser=parser)
+    except (etree.ParserError, ValueError):
+        return lxml_html.document_fromstring(b'<html></html>')
+
+
+def parse_page(content, parser=None, byte_budget=None):
+    """Parse HTML into a PageAnalysis with one of PARSER_BACKENDS.
+
+    parser defaults to DEFAULT_PARSER (PARSER_BACKEND env var, else lxml
+    when installed). With a byte_budget (default PARSE_BYTE_BUDGET) only
+    that many leading bytes are parsed: head metadata and the top of the
+    body, which is where most fields come from on large pages.
+    """
+    parser = parser or DEFAULT_PARSER
+    if byte_budget is None:
+        byte_budget = PARSE_BYTE_BUDGET
+    if byte_budget is not None:
+        content = content[:byte_budget]
+
+    if parser == 'lxml':
+        if lxml_html is None:
+            raise ValueError('The lxml parser backend needs lxml installed')
+        return LxmlPageAnalysis(_lxml_document(content))
+    if parser == 'bs4-lxml':
+        return PageAnalysis(BeautifulSoup(content, 'lxml'))
+    if parser == 'html.parser':
+        return PageAnalysis(BeautifulSoup(content, 'html.parser'))
+    raise ValueError(f'Unknown parser backend: {parser}')
+
+
+def content_hash(page):
+    """Fingerprint of everything the extractors read, to spot unchanged pages.
+
+    Covers the title, meta tags, links and full text (which holds the clean
+    and main text and the paragraphs), so a change in the footer or the
+    meta description counts as a change too.
+    """
+    parts = [page.title or '', page.text]
+    parts += (f'{attr}\0{key}\0{page.get_meta(attr, key)}' for attr, key in page.meta)
+    parts += page.links
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode('utf-8', 'surrogatepass'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+# Field extractors in output order, field -> Extractor. Filled in by the
+# @extractor decorator on BusinessExtractor methods.
+EXTRACTORS = {}
+
+# inputs names the page attributes the method reads, plus 'url' if it takes
+# the page URL too. cpu_heavy extractors scan the whole text, so they are
+# the ones worth sending to the extractor pool. missing is the value the
+# extractor gives when the page has nothing; those fields are looked for
+# on crawled subpages. subpages, if given, names the only subpage kinds the
+# extractor runs on; everywhere else, the landing page included, the field
+# is left missing.
+Extractor = namedtuple('Extractor', ['field', 'method', 'inputs', 'cpu_heavy', 'missing', 'subpages'])
+
+PAGE_INPUTS = {'title', 'meta', 'links', 'paragraphs', 'text', 'clean_text', 'main_text', 'url'}
+
+
+def extractor(field, inputs=(), cpu_heavy=False, missing=None, subpages=None):
+    """Register a BusinessExtractor method as the extractor for field"""
+    unknown = set(inputs) - PAGE_INPUTS
+    if unknown:
+        raise ValueError(f'Unknown extractor inputs for {field}: {sorted(unknown)}')
+    if subpages is not None and missing is None:
+        raise ValueError(f'{field} only runs on subpages, so it needs a missing value')
+    if cpu_heavy and 'meta' in inputs:
+        # Meta tags are soup nodes, which don't pickle cheaply
+        raise ValueError(f'{field} reads meta tags, so it cannot run in the extractor pool')
+    
+    def register(method):
+        EXTRACTORS[field] = Extractor(field, method.__name__, tuple(inputs), cpu_heavy, missing,
+                                      None if subpages is None else tuple(subpages))
+        return method
+    return register
+
+
+class PageInputs:
+    """Picklable copy of the page attributes some extractors read"""
+
+    def __init__(self, page, inputs):
+        self._keyword_hits = {}
+        for name in inputs:
+            if name == 'url':
+                continue
+            setattr(self, name, getattr(page, name))
+            if name in ('text', 'clean_text'):
+                setattr(self, name + '_lower', getattr(page, name + '_lower'))
+
+    keyword_hits = PageAnalysis.keyword_hits
+
+
+def _timed_extract(spec, page, url, extractor=None):
+    """Run one registered extractor: (value, wall seconds, CPU seconds)"""
+    method = getattr(extractor or BusinessExtractor(), spec.method)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    value = method(page, url) if 'url' in spec.inputs else method(page)
+    return value, time.perf_counter() - wall, time.thread_time() - cpu
+
+
+def _timed_extract_all(specs, page, url):
+    """Run several extractors over one page: {field: (value, wall, CPU)}.
+
+    One pool task per page, so the page is pickled once and its
+    keyword_hits scans are shared by every extractor.
+    """
+    extractor = BusinessExtractor()
+    return {spec.field: _timed_extract(spec, page, url, extractor) for spec in specs}
+
+
+_extractor_pool = None
+_extractor_pool_lock = threading.Lock()
+
+
+def get_extractor_pool():
+    """Get the shared process pool for cpu_heavy extractors, or None if disabled"""
+    global _extractor_pool
+    if EXTRACTOR_WORKERS <= 0:
+        return None
+    with _extractor_pool_lock:
+        if _extractor_pool is None:
+            _extractor_pool = ProcessPoolExecutor(max_workers=EXTRACTOR_WORKERS)
+    return _extractor_pool
+
+
+def crawl_hash(page_hash, depth):
+    """The content_hash stored for a landing page crawled depth levels deep.
+
+    The depth is part of it, so a record crawled at another depth never
+    counts as unchanged and its subpages are merged in afresh.
+    """
+    return f'{page_hash}:{depth}' if depth else page_hash
+
+
+def hashed_depth(stored_hash):
+    """The crawl depth a crawl_hash() was made for"""
+    _, _, depth = (stored_hash or '').partition(':')
+    return int(depth) if depth else 0
+
+
+def analyze_business(content, url, known_hash=None, pool=None, fields=None, depth=0):
+    """Parse raw HTML and extract business info, timing each step.
+
+    Returns (business_data, timings). timings holds (wall, CPU) seconds for
+    'parse' and, unless the page was unchanged, 'extract' and every field
+    under 'fields'. Module-level so it can run in a process pool; pass the
+    timings to record_timings() in the process that serves metrics.
+    fields limits extraction to those fields; depth is how deep the caller
+    crawls the site, see crawl_hash().
+    """
+    timings = {}
+    wall, cpu = time.perf_counter(), time.thread_time()
+    page = parse_page(content)
+    page_hash = crawl_hash(content_hash(page), depth)
+    timings['parse'] = (time.perf_counter() - wall, time.thread_time() - cpu)
+    if page_hash == known_hash:
+        return {'url': url, 'content_hash': page_hash}, timings
+    
+    timings['fields'] = {}
+    wall, cpu = time.perf_counter(), time.thread_time()
+    business_data = BusinessExtractor().extract_business(page, url, timings['fields'], pool, fields)
+    timings['extract'] = (time.perf_counter() - wall, time.thread_time() - cpu)
+    business_data['content_hash'] = page_hash
+    return business_data, timings
+
+
+def record_timings(timings):
+    """Add the timings from analyze_business() to the metrics"""
+    for stage in ('parse', 'extract'):
+        if stage in timings:
+            wall, cpu = timings[stage]
+            METRICS.observe('scraper_stage_seconds', wall, stage=stage)
+            METRICS.inc('scraper_stage_cpu_seconds_total', cpu, stage=stage)
+    
+    fields = timings.get('fields')
+    METRICS.inc('scraper_pages_total', outcome='unchanged' if fields is None else 'extracted')
+    for field, (wall, cpu) in (fields or {}).items():
+        METRICS.inc('scraper_extractor_calls_total', field=field)
+        METRICS.inc('scraper_extractor_seconds_total', wall, field=field)
+        METRICS.inc('scraper_extractor_cpu_seconds_total', cpu, field=field)
+
+
+def parse_business(content, url, known_hash=None, pool=None, fields=None, depth=0):
+    """Parse raw HTML and extract business info.
+
+    known_hash is the content_hash stored for url; if the page still hashes
+    the same, extraction is skipped and only url and content_hash come back.
+    Timings are recorded in this process's metrics.
+    """
+    business_data, timings = analyze_business(content, url, known_hash, pool, fields, depth)
+    record_timings(timings)
+    return business_data
+
+
+def is_unchanged(business_data):
+    """Whether analyze_business() skipped extraction for an unchanged page"""
+    return business_data.keys() == {'url', 'content_hash'}
+
+
+def crawl_depth(depth=None):
+    """A requested crawl depth clamped to 0..MAX_CRAWL_DEPTH; None means CRAWL_DEPTH"""
+    return max(0, min(CRAWL_DEPTH if depth is None else int(depth), MAX_CRAWL_DEPTH))
+
+
+def links_in(content):
+    """Anchor hrefs in raw HTML bytes, without parsing the page"""
+    return [html.unescape(match.group(1).decode('utf-8', 'replace'))
+            for match in patterns.HREF.finditer(content)]
+
+
+def _site(host):
+    return (host or '').lower().removeprefix('www.')
+
+
+def find_subpages(links, base_url):
+    """The first same-site link of each SUBPAGE_PATTERNS kind: {kind: url}"""
+    site = _site(urlsplit(base_url).hostname)
+    found = {}
+    for href in links:
+        try:
+            url = urljoin(base_url, href)
+            parts = urlsplit(url)
+            host = parts.hostname
+        except ValueError:
+            continue
+        if parts.scheme not in ('http', 'https') or _site(host) != site:
+            continue
+        path = parts.path.lower()
+        for kind, pattern in patterns.SUBPAGE_PATTERNS:
+            if kind not in found and pattern.search(path):
+                found[kind] = canonical_url(url)
+                break
+    return found
+
+
+def merge_business(business_data, subpages):
+    """Fill the fields business_data came up empty on from subpage data.
+
+    subpages is a list of dicts from the same extractors, best first; the
+    first one with a value for a field wins. Updates business_data in place
+    and returns it.
+    """
+    for field in SUBPAGE_FIELDS:
+        missing = EXTRACTORS[field].missing
+        if business_data.get(field) != missing:
+            continue
+        for data in subpages:
+            if data.get(field, missing) != missing:
+                business_data[field] = data[field]
+                break
+    return business_data
+
+
+# A fetched page: either a response to parse, or data already extracted
+# from an unchanged cached copy
+Fetched = namedtuple('Fetched', ['response', 'data'])
+
 
 class BusinessScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.fetcher = get_fetcher()
+        self.cache = get_fetch_cache()
         self.db = get_db()
-        print("🔍 Business Scraper ready")
+        logger.info('Business scraper ready')
     
-    def scrape_business(self, url):
-        """Main scraping function"""
+    def fetch(self, url):
+        """Download a page, raising on HTTP errors"""
+        return self.fetcher.fetch_sync(url)
+    
+    async def fetch_subpages(self, url, body, depth):
+        """Fetch the about/contact/team/careers pages a site links to.
+
+        Links come from the landing page's raw body, so this can run while
+        that page is parsed. Each level of depth follows links from the
+        pages the level before fetched, and all pages of a level are
+        fetched at once over the fetcher's pooled connections. At most
+        CRAWL_MAX_PAGES are requested, and whatever hasn't arrived
+        CRAWL_TIME_BUDGET seconds after the start is dropped. Returns
+        (kind, url, body) per fetched page, in SUBPAGE_PATTERNS order.
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + CRAWL_TIME_BUDGET
+        seen = {canonical_url(url)}
+        found = {}
+        pages = [(url, body)]
+        requested = 0
+        tasks = {}
+        try:
+            for _ in range(depth):
+                wanted = {}
+                for page_url, content in pages:
+                    for kind, link in find_subpages(links_in(content), page_url).items():
+                        if kind not in found and kind not in wanted and link not in seen:
+                            wanted[kind] = link
+                wanted = dict(list(wanted.items())[:CRAWL_MAX_PAGES - requested])
+                remaining = deadline - time.monotonic()
+                if not wanted or remaining <= 0:
+                    break
+                seen.update(wanted.values())
+                requested += len(wanted)
+                
+                tasks = {kind: asyncio.ensure_future(self.fetcher.fetch(link)) for kind, link in wanted.items()}
+                done, _ = await asyncio.wait(tasks.values(), timeout=remaining)
+                pages = []
+                for kind, task in tasks.items():
+                    if task not in done:
+                        logger.debug('Subpage %s missed the crawl budget', wanted[kind])
+                    elif task.exception() is not None:
+                        logger.debug('Subpage %s failed: %s', wanted[kind], task.exception())
+                    else:
+                        found[kind] = (wanted[kind], task.result())
+                        pages.append(found[kind])
+            return [(kind, *found[kind]) for kind, _ in patterns.SUBPAGE_PATTERNS if kind in found]
+        finally:
+            # Fetches past the budget, or all of them if the crawl itself
+            # was cancelled, mustn't go on running unowned
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            METRICS.observe('scraper_stage_seconds', time.perf_counter() - start, stage='crawl')
+    
+    async def fetch_page(self, url, depth=0):
+        """Fetch a page through the response cache.
+
+        A fresh cache entry, or a stale one the site confirms with a 304,
+        comes back as Fetched(None, data) and needs no parsing. Anything
+        else is Fetched(response, None); pass the saved record to remember().
+        Entries for a record crawled at another depth than depth are
+        ignored, so the crawl happens.
+        """
+        start = time.perf_counter()
         try:
-            print(f"🔍 Scraping: {url}")
+            if self.cache is None:
+                return Fetched(await self.fetcher.fetch_response(url), None)
             
-            # Get the website
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
+            # Cache reads and writes are SQLite calls; keep them off the loop
+            loop = asyncio.get_running_loop()
+            entry = await loop.run_in_executor(None, self.cache.lookup, url)
+            if entry and hashed_depth(entry.data.get('content_hash')) != depth:
+                entry = None
+            if entry and self.cache.is_fresh(entry):
+                self.cache.count('hits')
+                return Fetched(None, entry.data)
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if entry:
+                response = await self.fetcher.fetch_response(url, entry.etag, entry.last_modified)
+            else:
+                response = await self.fetcher.fetch_response(url)
             
-            # Extract business info
-            business_data = {
-                'url': url,
-                'company_name': self._get_company_name(soup, url),
-                'business_type': self._get_business_type(soup),
-                'industry': self._get_industry(soup),
-                'description': self._get_description(soup),
-                'location': self._get_location(soup),
-                'founded_year': self._get_founded_year(soup),
-                'contact_info': self._get_contact_info(soup),
-                'social_media': self._get_social_media(soup),
-                'content': self._get_content(soup),
-                'company_size': self._get_company_size(soup),
-                'estimated_revenue': self._get_revenue(soup),
-                'key_services': self._get_services(soup),
-                'target_market': self._get_target_market(soup),
-                'technologies': self._get_technologies(soup),
-                'employee_count': self._get_employees(soup),
-                'summary': self._get_summary(soup),
-                'business_model': self._get_business_model(soup),
-                'competitive_advantages': self._get_advantages(soup),
-                'key_executives': self._get_executives(soup),
-                'awards_recognition': self._get_awards(soup),
-                'recent_news': self._get_news(soup),
-                'product_categories': self._get_products(soup),
-                'client_testimonials': self._get_testimonials(soup),
-                'partnerships': self._get_partnerships(soup),
-                'certifications': self._get_certifications(soup),
-                'market_focus': self._get_market_focus(soup),
-                'business_maturity': self._get_maturity(soup)
-            }
+            if response.status == 304:
+                await loop.run_in_executor(None, self.cache.revalidated, url)
+                self.cache.count('revalidated')
+                return Fetched(None, entry.data)
             
-            # Save to database
-            db_result = self.db.insert_business(business_data)
+            self.cache.count('misses')
+            return Fetched(response, None)
+        finally:
+            METRICS.observe('scraper_stage_seconds', time.perf_counter() - start, stage='fetch')
+    
+    def known_hash(self, url, response):
+        """The stored content_hash to compare a fetched page against, or None.
+
+        A truncated body only hashes its first max_bytes, so it never
+        counts as unchanged. A SQLite query; coroutines run it in an executor.
+        """
+        return None if response.truncated else self.db.content_hash(url)
+    
+    def remember(self, url, fetched, business_data):
+        """Cache the record stored from a fetched response.
+
+        Truncated bodies aren't cached, so the next scrape fetches the page
+        again instead of reusing what was extracted from part of it.
+        Compresses and writes to SQLite, so coroutines run it in an executor.
+        """
+        if self.cache is not None and fetched.response is not None and not fetched.response.truncated:
+            self.cache.store(url, fetched.response, business_data)
+    
+    def save(self, business_data):
+        """Store extracted business info"""
+        db_result = self.db.insert_business(business_data)
+        
+        if db_result['success']:
+            logger.info('Scraped %s (%s)', db_result['data']['company_name'], db_result['status'],
+                        extra={'url': db_result['data']['url'], 'status': db_result['status']})
+            return {"success": True, "data": db_result['data'], "status": db_result['status']}
+        else:
+            logger.error('Database error: %s', db_result['error'])
+            return {"success": False, "error": f"Database error: {db_result['error']}"}
+    
+    def scrape_business(self, url, depth=None):
+        """Main scraping function.
+
+        With a crawl depth (default CRAWL_DEPTH), fields the landing page
+        doesn't give are filled in from its about/contact/team/careers pages.
+        """
+        try:
+            logger.debug('Scraping: %s', url)
+            depth = crawl_depth(depth)
             
-            if db_result['success']:
-                print(f"✅ Successfully scraped: {business_data['company_name']}")
-                return {"success": True, "data": business_data}
-            else:
-                print(f"❌ Database error: {db_result['error']}")
-                return {"success": False, "error": f"Database error: {db_result['error']}"}
+            # Get the website, unless the cached copy is still good
+            fetched = self.fetcher.call(self.fetch_page(url, depth))
+            business_data = fetched.data
+            
+            # Parse HTML and extract business info, unless the page hashes
+            # the same as what is stored and was crawled to the same depth
+            if business_data is None:
+                body = fetched.response.body
+                pool = get_extractor_pool()
+                # Subpages download while the landing page is parsed
+                crawl = self.fetcher.run(self.fetch_subpages(url, body, depth)) if depth else None
+                business_data = parse_business(body, url, self.known_hash(url, fetched.response), pool,
+                                               depth=depth)
+                if crawl is not None and is_unchanged(business_data):
+                    crawl.cancel()
+                elif crawl is not None:
+                    subpages = [parse_business(content, page_url, pool=pool, fields=subpage_fields(kind))
+                                for kind, page_url, content in crawl.result()]
+                    merge_business(business_data, subpages)
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request error: {e}")
+            # Save to database
+            result = self.save(business_data)
+            if result['success']:
+                self.remember(url, fetched, result['data'])
+            return result
+            
+        except FetchError as e:
+            logger.warning('Request error for %s: %s', url, e)
             return {"success": False, "error": f"Failed to access website: {str(e)}"}
         except Exception as e:
-            print(f"❌ Scraping error: {e}")
+            logger.exception('Scraping error for %s: %s', url, e)
             return {"success": False, "error": f"Scraping failed: {str(e)}"}
+
+
+class BusinessExtractor:
+    """Field extractors that work on an analyzed page"""
+    
+    def extract_business(self, page, url, timings=None, pool=None, fields=None):
+        """Run the registered extractors over an analyzed page.
+
+        fields limits which ones run; the default is every extractor that
+        runs on landing pages, with the subpage-only fields left missing.
+        Each field's (wall, CPU) seconds go into timings when it is given.
+        With a pool, the cpu_heavy extractors run there together, as one
+        task on a PageInputs copy, while the rest run here.
+        """
+        landing = fields is None
+        if landing:
+            specs = {field: spec for field, spec in EXTRACTORS.items() if spec.subpages is None}
+        else:
+            specs = {field: EXTRACTORS[field] for field in fields}
+        heavy = [spec for spec in specs.values() if spec.cpu_heavy] if pool is not None else []
+        future = None
+        if heavy:
+            inputs = PageInputs(page, {name for spec in heavy for name in spec.inputs})
+            future = pool.submit(_timed_extract_all, heavy, inputs, url)
+        
+        offloaded = {spec.field for spec in heavy}
+        results = {field: _timed_extract(spec, page, url, self)
+                   for field, spec in specs.items() if field not in offloaded}
+        if future is not None:
+            results.update(future.result())
+        
+        business_data = {'url': url}
+        for field in EXTRACTORS if landing else specs:
+            if field not in results:
+                business_data[field] = EXTRACTORS[field].missing
+                continue
+            value, wall, cpu = results[field]
+            business_data[field] = value
+            if timings is not None:
+                timings[field] = (wall, cpu)
+        return business_data
     
-    def _get_company_name(self, soup, url):
+    @extractor('company_name', inputs=('title', 'meta', 'url'))
+    def _get_company_name(self, page, url):
         """Get company name"""
         # Try title tag first
-        title = soup.find('title')
-        if title:
-            title_text = title.get_text().strip()
+        title = page.title
+        if title is not None:
+            title_text = title.strip()
             # Clean up title
-            cleaned = re.sub(r'\s*[-|–]\s*(Home|Welcome|Official).*$', '', title_text)
+            cleaned = patterns.TITLE_SUFFIX.sub('', title_text, count=1)
             if cleaned and len(cleaned) > 2:
                 return cleaned
         
         # Try meta tags
-        meta_name = soup.find('meta', {'property': 'og:site_name'})
-        if meta_name:
-            return meta_name.get('content', '').strip()
+        meta_name = page.get_meta('property', 'og:site_name')
+        if meta_name is not None:
+            return meta_name.strip()
         
         # Fallback to domain
         domain = url.replace('https://', '').replace('http://', '').replace('www.', '')
         return domain.split('.')[0].title()
     
-    def _get_business_type(self, soup):
+    @extractor('business_type', inputs=('text',), cpu_heavy=True)
+    def _get_business_type(self, page):
         """Get business type"""
-        content = soup.get_text().lower()
-        
-        if any(word in content for word in ['software', 'saas', 'platform', 'api']):
-            return 'SaaS/Software'
-        elif any(word in content for word in ['shop', 'store', 'buy', 'sell', 'retail']):
-            return 'E-commerce'
-        elif any(word in content for word in ['consulting', 'advisory', 'services']):
-            return 'Consulting'
-        elif any(word in content for word in ['healthcare', 'medical', 'health']):
-            return 'Healthcare'
-        elif any(word in content for word in ['education', 'learning', 'training']):
-            return 'Education'
-        elif any(word in content for word in ['technology', 'tech', 'digital']):
-            return 'Technology'
-        else:
-            return 'Business Services'
+        hits = page.keyword_hits(PAGE_KEYWORDS)
+        return PAGE_KEYWORDS.classify(hits, 'business_type')
     
-    def _get_industry(self, soup):
+    @extractor('industry', inputs=('text',), cpu_heavy=True)
+    def _get_industry(self, page):
         """Get industry"""
-        content = soup.get_text().lower()
-        
-        if any(word in content for word in ['software', 'tech', 'ai', 'cloud']):
-            return 'Technology'
-        elif any(word in content for word in ['healthcare', 'medical', 'pharma']):
-            return 'Healthcare'
-        elif any(word in content for word in ['finance', 'banking', 'investment']):
-            return 'Finance'
-        elif any(word in content for word in ['education', 'learning', 'university']):
-            return 'Education'
-        elif any(word in content for word in ['retail', 'ecommerce', 'shopping']):
-            return 'Retail'
-        else:
-            return 'Other'
+        hits = page.keyword_hits(PAGE_KEYWORDS)
+        return PAGE_KEYWORDS.classify(hits, 'industry')
     
-    def _get_description(self, soup):
+    @extractor('description', inputs=('meta', 'paragraphs'))
+    def _get_description(self, page):
         """Get description"""
         # Try meta description
-        meta_desc = soup.find('meta', {'name': 'description'})
-        if meta_desc:
-            desc = meta_desc.get('content', '').strip()
+        meta_desc = page.get_meta('name', 'description')
+        if meta_desc is not None:
+            desc = meta_desc.strip()
             if len(desc) > 20:
                 return desc
         
         # Try og:description
-        og_desc = soup.find('meta', {'property': 'og:description'})
-        if og_desc:
-            desc = og_desc.get('content', '').strip()
+        og_desc = page.get_meta('property', 'og:description')
+        if og_desc is not None:
+            desc = og_desc.strip()
             if len(desc) > 20:
                 return desc
         
         # Try first paragraph
-        paragraphs = soup.find_all('p')
-        for p in paragraphs:
-            text = p.get_text().strip()
+        for p in page.paragraphs:
+            text = p.strip()
             if 50 <= len(text) <= 300:
                 return text
         
         return 'No description available'
     
-    def _get_location(self, soup):
+    @extractor('location', inputs=('text',), cpu_heavy=True, missing='Unknown')
+    def _get_location(self, page):
         """Get location"""
-        content = soup.get_text()
+        content = page.text
         
         # Look for location patterns
-        patterns = [
-            r'(?:located|based|headquartered)\s+(?:in|at)\s+([A-Z][a-z]+(?:,\s*[A-Z]{2,3})?)',
-            r'([A-Z][a-z]+,\s*[A-Z]{2})'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, content)
-            if matches:
-                return matches[0]
+        for pattern in patterns.LOCATION_PATTERNS:
+            match = pattern.search(content)
+            if match:
+                return match.group(1)
         
         return 'Unknown'
     
-    def _get_founded_year(self, soup):
+    @extractor('founded_year', inputs=('text',), cpu_heavy=True, missing='Unknown')
+    def _get_founded_year(self, page):
         """Get founding year"""
-        content = soup.get_text()
-        
-        patterns = [
-            r'founded\s+in\s+(\d{4})',
-            r'established\s+in\s+(\d{4})',
-            r'started\s+in\s+(\d{4})',
-            r'since\s+(\d{4})'
-        ]
-        
+        content = page.text
         current_year = datetime.now().year
         
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                year = int(match)
+        for pattern in patterns.FOUNDED_YEAR_PATTERNS:
+            for match in pattern.finditer(content):
+                year = int(match.group(1))
                 if 1800 <= year <= current_year:
                     return str(year)
         
         return 'Unknown'
     
-    def _get_contact_info(self, soup):
+    @extractor('contact_info', inputs=('text',), cpu_heavy=True, missing='Contact info not found')
+    def _get_contact_info(self, page):
         """Get contact info"""
-        content = soup.get_text()
+        content = page.text
         
         # Look for email
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        emails = re.findall(email_pattern, content)
+        email = patterns.EMAIL.search(content) if '@' in content else None
         
         # Look for phone
-        phone_pattern = r'(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}'
-        phones = re.findall(phone_pattern, content)
+        phone = patterns.PHONE.search(content)
         
         contact_info = []
-        if emails:
-            contact_info.append(f"Email: {emails[0]}")
-        if phones:
-            contact_info.append(f"Phone: {phones[0]}")
+        if email:
+            contact_info.append(f"Email: {email.group()}")
+        if phone:
+            contact_info.append(f"Phone: {phone.group()}")
         
         return ', '.join(contact_info) if contact_info else 'Contact info not found'
     
-    def _get_social_media(self, soup):
+    @extractor('social_media', inputs=('links',), missing='No social media found')
+    def _get_social_media(self, page):
         """Get social media"""
         social_links = []
         
-        for link in soup.find_all('a', href=True):
-            href = link['href'].lower()
+        for link in page.links:
+            href = link.lower()
             if 'linkedin.com' in href:
                 social_links.append(f"LinkedIn: {href}")
             elif 'twitter.com' in href or 'x.com' in href:
@@ -229,60 +893,95 @@ class BusinessScraper:
         
         return ', '.join(social_links[:2]) if social_links else 'No social media found'
     
-    def _get_content(self, soup):
+    @extractor('content', inputs=('main_text',))
+    def _get_content(self, page):
         """Get main content"""
-        # Remove scripts and styles
-        for element in soup(['script', 'style', 'nav', 'header', 'footer']):
-            element.decompose()
-        
-        main_content = soup.find('main') or soup.find('body')
-        if main_content:
-            text = main_content.get_text(separator=' ', strip=True)
-            return ' '.join(text.split())[:1000]
+        # Scripts, styles and page chrome are already left out of main_text
+        if page.main_text is not None:
+            return page.main_text[:1000]
         
         return 'No content extracted'
     
-    def _get_company_size(self, soup):
+    @extractor('company_size', inputs=('clean_text',), cpu_heavy=True)
+    def _get_company_size(self, page):
         """Get company size"""
-        content = soup.get_text().lower()
-        
-        if 'startup' in content or 'small team' in content:
-            return 'Startup (1-10 employees)'
-        elif 'small business' in content:
-            return 'Small (11-50 employees)'
-        elif 'medium' in content:
-            return 'Medium (51-200 employees)'
-        elif 'large' in content or 'enterprise' in content:
-            return 'Large (201-1000 employees)'
-        else:
-            return 'Unknown'
+        hits = page.keyword_hits(SIZE_KEYWORDS, clean=True)
+        return SIZE_KEYWORDS.classify(hits, 'company_size')
     
-    def _get_revenue(self, soup):
+    @extractor('estimated_revenue', inputs=('clean_text',), cpu_heavy=True, missing='Not disclosed')
+    def _get_revenue(self, page):
         """Get revenue estimate"""
-        content = soup.get_text()
+        content = page.clean_text
         
-        revenue_pattern = r'\$(\d+(?:,\d{3})*(?:\.\d+)?)\s*(?:million|billion|M|B)'
-        matches = re.findall(revenue_pattern, content, re.IGNORECASE)
+        match = patterns.REVENUE.search(content) if '$' in content else None
         
-        if matches:
-            return f"${matches[0]}"
+        if match:
+            return f"${match.group(1)}"
         
         return 'Not disclosed'
     
+    # Marketing copy on other pages is full of titles next to capitalized
+    # words ("Join the CEO Summit"), so only pages about the people are read
+    @extractor('key_executives', inputs=('clean_text',), cpu_heavy=True, missing='Leadership info not found',
+               subpages=('about', 'team'))
+    def _get_executives(self, page):
+        """Get up to three named leaders with their titles"""
+        content = page.clean_text
+        
+        executives = {}
+        for name_first, pattern in zip((True, False), patterns.EXECUTIVE_PATTERNS):
+            for match in pattern.finditer(content):
+                name, title = match.groups() if name_first else reversed(match.groups())
+                executives.setdefault(' '.join(name.split()), ' '.join(title.split()))
+                if len(executives) == 3:
+                    break
+            if len(executives) == 3:
+                break
+        
+        if executives:
+            return ', '.join(f"{name} ({title})" for name, title in executives.items())
+        
+        return 'Leadership info not found'
+    
     # Simple implementations for other methods
-    def _get_services(self, soup): return 'Services not specified'
-    def _get_target_market(self, soup): return 'General Market'
-    def _get_technologies(self, soup): return 'Not specified'
-    def _get_employees(self, soup): return 'Not specified'
-    def _get_summary(self, soup): return 'Business summary not available'
-    def _get_business_model(self, soup): return 'Unknown'
-    def _get_advantages(self, soup): return 'Not specified'
-    def _get_executives(self, soup): return 'Leadership info not found'
-    def _get_awards(self, soup): return 'No awards mentioned'
-    def _get_news(self, soup): return 'No recent updates found'
-    def _get_products(self, soup): return 'Product categories not specified'
-    def _get_testimonials(self, soup): return 'No testimonials found'
-    def _get_partnerships(self, soup): return 'No partnerships mentioned'
-    def _get_certifications(self, soup): return 'No certifications mentioned'
-    def _get_market_focus(self, soup): return 'Unknown'
-    def _get_maturity(self, soup): return 'Unknown'
\ No newline at end of file
+    @extractor('key_services')
+    def _get_services(self, page): return 'Services not specified'
+    @extractor('target_market')
+    def _get_target_market(self, page): return 'General Market'
+    @extractor('technologies')
+    def _get_technologies(self, page): return 'Not specified'
+    @extractor('employee_count')
+    def _get_employees(self, page): return 'Not specified'
+    @extractor('summary')
+    def _get_summary(self, page): return 'Business summary not available'
+    @extractor('business_model')
+    def _get_business_model(self, page): return 'Unknown'
+    @extractor('competitive_advantages')
+    def _get_advantages(self, page): return 'Not specified'
+    @extractor('awards_recognition')
+    def _get_awards(self, page): return 'No awards mentioned'
+    @extractor('recent_news')
+    def _get_news(self, page): return 'No recent updates found'
+    @extractor('product_categories')
+    def _get_products(self, page): return 'Product categories not specified'
+    @extractor('client_testimonials')
+    def _get_testimonials(self, page): return 'No testimonials found'
+    @extractor('partnerships')
+    def _get_partnerships(self, page): return 'No partnerships mentioned'
+    @extractor('certifications')
+    def _get_certifications(self, page): return 'No certifications mentioned'
+    @extractor('market_focus')
+    def _get_market_focus(self, page): return 'Unknown'
+    @extractor('business_maturity')
+    def _get_maturity(self, page): return 'Unknown'
+
+
+# Fields worth looking for on crawled subpages: those whose extractor can
+# come up empty on the landing page
+SUBPAGE_FIELDS = tuple(spec.field for spec in EXTRACTORS.values() if spec.missing is not None)
+
+
+def subpage_fields(kind):
+    """The SUBPAGE_FIELDS to extract from a crawled subpage of a SUBPAGE_PATTERNS kind"""
+    return tuple(field for field in SUBPAGE_FIELDS
+                 if EXTRACTORS[field].subpages is None or kind in EXTRACTORS[field].subpages)
@@ -0,0 +1,126 @@
+import math
+import re
+from bisect import bisect_left, insort
+
+# Letters and digits; matches how SQLite's unicode61 tokenizer splits text
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Field weights for ranking: a hit in the name counts for more than one in
+# the description
+SEARCH_WEIGHTS = {
+    'company_name': 3.0,
+    'business_type': 2.0,
+    'industry': 2.0,
+    'location': 1.0,
+    'description': 1.0,
+}
+
+
+def tokenize(text):
+    """Lowercased search terms in text"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class SearchIndex:
+    def __init__(self, weights=SEARCH_WEIGHTS):
+        """Inverted index over the searchable business fields.
+
+        Every query term is treated as a prefix ("micro" finds "microsoft"),
+        all terms must match, and results are ranked by field-weighted
+        tf-idf. Documents are added and removed one at a time, or added in
+        bulk with add_many().
+        """
+        self.weights = weights
+        self.postings = {}   # term -> {doc_id: weight}
+        self.doc_terms = {}  # doc_id -> terms, for removal
+        self.terms = []      # sorted vocabulary, for prefix lookups
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def _term_weights(self, record):
+        weights = {}
+        for field, field_weight in self.weights.items():
+            for term in tokenize(record.get(field) or ''):
+                weights[term] = weights.get(term, 0.0) + field_weight
+        return weights
+
+    def add(self, doc_id, record):
+        """Index a record's searchable fields"""
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+
+        weights = self._term_weights(record)
+        for term, weight in weights.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                insort(self.terms, term)
+            self.postings[term][doc_id] = weight
+        self.doc_terms[doc_id] = list(weights)
+
+    def add_many(self, items):
+        """Index several (doc_id, record) pairs, sorting the vocabulary once"""
+        new_terms = []
+        # Last record wins for a repeated id; removing a document indexed
+        # earlier in this call would miss its terms in the unsorted tail
+        for doc_id, record in dict(items).items():
+            if doc_id in self.doc_terms:
+                self.remove(doc_id)
+            weights = self._term_weights(record)
+            for term, weight in weights.items():
+                docs = self.postings.get(term)
+                if docs is None:
+                    docs = self.postings[term] = {}
+                    new_terms.append(term)
+                docs[doc_id] = weight
+            self.doc_terms[doc_id] = list(weights)
+        if new_terms:
+            self.terms.extend(new_terms)
+            self.terms.sort()
+
+    def remove(self, doc_id):
+        """Drop a record from the index"""
+        for term in self.doc_terms.pop(doc_id, ()):
+            docs = self.postings[term]
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def _expand(self, prefix):
+        """Every indexed term starting with prefix"""
+        # Every term with the prefix sorts between it and prefix followed by
+        # the highest code point, so only the matches get copied
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + '\U0010ffff', start)
+        return self.terms[start:end]
+
+    def search(self, query):
+        """Score the documents matching every term of query.
+
+        Returns {doc_id: score}, or None if the query has no terms.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return None
+
+        total_docs = max(len(self.doc_terms), 1)
+        scores = None
+        # Rarest prefix first keeps the running intersection small
+        expanded = sorted((self._expand(term) for term in set(terms)),
+                          key=lambda ts: sum(len(self.postings[t]) for t in ts))
+        for matches in expanded:
+            term_scores = {}
+            for term in matches:
+                docs = self.postings[term]
+                idf = math.log(1 + total_docs / len(docs))
+                for doc_id, weight in docs.items():
+                    if scores is None or doc_id in scores:
+                        term_scores[doc_id] = term_scores.get(doc_id, 0.0) + weight * idf
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: scores[doc_id] + s for doc_id, s in term_scores.items()}
+            if not scores:
+                break
+        return scores
@@ -0,0 +1,114 @@
+"""Serve the API from several worker processes over one shared SQLite catalog
+
+    DATABASE_PATH=businesses.db python serve.py [--workers 4] [--port 5003]
+
+The parent opens the catalog once, so the schema and sample data are in
+place before any worker starts, then binds the listening socket and forks
+the workers. Each worker imports app and serves the shared socket with
+werkzeug's threaded server; the kernel hands every connection to one of
+them. Parsing and queries run in the workers, so they spread over all cores.
+
+Everything a request can see is in the SQLite file: businesses, the catalog
+version behind the query caches and ETags, and job snapshots. Only the first
+worker runs the REFRESH_MAX_AGE_HOURS scheduler. /api/metrics and the fetch
+cache counters are per worker.
+
+Workers that die are restarted. SIGTERM or Ctrl-C stops them all.
+"""
+import argparse
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import sys
+
+from database import Database, SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Connections waiting to be accepted by some worker
+LISTEN_BACKLOG = 1024
+
+
+def worker(sock, host, index):
+    """Import the app and serve the inherited socket until terminated"""
+    if index:
+        os.environ.pop('REFRESH_MAX_AGE_HOURS', None)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    from werkzeug.serving import make_server
+    from app import app
+    server = make_server(host, sock.getsockname()[1], app, threaded=True, fd=sock.fileno())
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5003)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    # Not configure_logging(): its writer thread wouldn't survive the fork,
+    # and each worker's app sets up its own
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s %(message)s')
+    path = os.environ.get('DATABASE_PATH')
+    if not path:
+        sys.exit('serve.py needs DATABASE_PATH: an in-memory catalog would be split between workers')
+    store = SQLiteStore(path)
+    Database(store)
+    # Workers open their own connections; none may be inherited across fork
+    store.close()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(LISTEN_BACKLOG)
+    # Every worker wakes for a new connection; the losers' accept() must
+    # fail instead of blocking
+    sock.setblocking(False)
+
+    # fork, so workers inherit the socket; the parent has no threads yet
+    context = multiprocessing.get_context('fork')
+    workers = {}
+
+    def start(index):
+        # Not daemonic: workers start process pools of their own for parsing
+        process = context.Process(target=worker, args=(sock, args.host, index))
+        process.start()
+        workers[index] = process
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(args.workers):
+        start(index)
+    logger.info('Serving on http://%s:%d with %d workers', args.host, args.port, args.workers)
+
+    while not stopping:
+        sentinels = {process.sentinel: index for index, process in workers.items()}
+        for sentinel in multiprocessing.connection.wait(list(sentinels), timeout=1):
+            if stopping:
+                break
+            index = sentinels[sentinel]
+            logger.warning('Worker %d (pid %d) exited with %s, restarting', index, workers[index].pid,
+                           workers[index].exitcode)
+            start(index)
+
+    for process in workers.values():
+        process.terminate()
+    for process in workers.values():
+        process.join(5)
+    logger.info('Stopped')
+
+
+if __name__ == '__main__':
+    main()
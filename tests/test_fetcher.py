@@ -0,0 +1,195 @@
+"""AsyncFetcher against a local http.server site
+
+Run from the repo root:  python -m unittest discover tests  (or python -m pytest tests)
+"""
+import asyncio
+import gzip
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetcher import AsyncFetcher, FetchError, UnsupportedContent
+
+PAGE = b'<html><head><title>Test</title></head><body><p>hello</p></body></html>'
+ETAG = '"v1"'
+MAX_BYTES = 64 * 1024
+# Decompresses to 16 MB; the fetcher must stop at MAX_BYTES
+GZIP_BOMB = gzip.compress(b'\0' * (16 * 1024 * 1024), 9)
+# Held open by /slow so concurrent requests overlap
+SLOW_SECONDS = 0.2
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.record(self)
+        route = getattr(self, 'route_' + self.path.strip('/').split('/')[0], None)
+        if route is None:
+            self.reply(404, b'')
+        else:
+            route()
+
+    def reply(self, status, body, content_type='text/html', **headers):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        for name, value in headers.items():
+            self.send_header(name.replace('_', '-'), value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The fetcher hangs up once it has max_bytes
+            pass
+
+    def route_page(self):
+        self.reply(200, PAGE)
+
+    def route_slow(self):
+        with self.server.lock:
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        time.sleep(SLOW_SECONDS)
+        with self.server.lock:
+            self.server.active -= 1
+        self.reply(200, PAGE)
+
+    def route_cached(self):
+        if self.headers.get('If-None-Match') == ETAG:
+            self.reply(304, b'', content_type=None, ETag=ETAG)
+        else:
+            self.reply(200, PAGE, ETag=ETAG, Last_Modified='Mon, 05 Oct 2026 10:00:00 GMT')
+
+    def route_pdf(self):
+        self.reply(200, b'%PDF-1.4', content_type='application/pdf')
+
+    def route_untyped(self):
+        self.reply(200, PAGE, content_type=None)
+
+    def route_big(self):
+        self.reply(200, b'<p>' + b'x' * (4 * MAX_BYTES) + b'</p>')
+
+    def route_gzip(self):
+        self.reply(200, gzip.compress(PAGE), Content_Encoding='gzip')
+
+    def route_bomb(self):
+        self.reply(200, GZIP_BOMB, Content_Encoding='gzip')
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.active = self.peak = 0
+        # Client (host, port) of every request, so connection reuse shows
+        self.clients = []
+
+    def record(self, handler):
+        with self.lock:
+            self.clients.append(handler.client_address)
+
+
+class AsyncFetcherTest(unittest.TestCase):
+    PER_HOST = 2
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = Server()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.reset()
+        self.fetcher = AsyncFetcher(per_host=self.PER_HOST, max_bytes=MAX_BYTES)
+
+    def tearDown(self):
+        self.fetcher.close()
+
+    def fetch(self, path, etag=None, last_modified=None):
+        return self.fetcher.call(self.fetcher.fetch_response(self.base + path, etag, last_modified))
+
+    def test_page(self):
+        response = self.fetch('/page')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, PAGE)
+        self.assertFalse(response.truncated)
+
+    def test_keepalive_reuses_connection(self):
+        for _ in range(5):
+            self.assertEqual(self.fetcher.fetch_sync(self.base + '/page'), PAGE)
+        self.assertEqual(len(self.server.clients), 5)
+        self.assertEqual(len(set(self.server.clients)), 1)
+
+    def test_per_host_cap(self):
+        async def fetch_all():
+            return await asyncio.gather(*(self.fetcher.fetch(f'{self.base}/slow/{i}') for i in range(8)))
+
+        bodies = self.fetcher.call(fetch_all())
+        self.assertEqual(bodies, [PAGE] * 8)
+        self.assertEqual(self.server.peak, self.PER_HOST)
+        # Queued requests went out on the connections already open
+        self.assertLessEqual(len(set(self.server.clients)), self.PER_HOST)
+
+    def test_revalidation(self):
+        response = self.fetch('/cached')
+        self.assertEqual((response.status, response.etag), (200, ETAG))
+
+        response = self.fetch('/cached', response.etag, response.last_modified)
+        self.assertEqual(response.status, 304)
+        self.assertIsNone(response.body)
+        self.assertEqual(response.etag, ETAG)
+
+    def test_http_error(self):
+        with self.assertRaises(FetchError):
+            self.fetch('/missing')
+
+    def test_rejects_non_html(self):
+        with self.assertRaises(UnsupportedContent):
+            self.fetch('/pdf')
+        # Still a FetchError, so callers report it like any other failure
+        with self.assertRaises(FetchError):
+            self.fetch('/pdf')
+
+    def test_missing_content_type_allowed(self):
+        self.assertEqual(self.fetch('/untyped').body, PAGE)
+
+    def test_body_cut_at_max_bytes(self):
+        response = self.fetch('/big')
+        self.assertTrue(response.truncated)
+        self.assertEqual(len(response.body), MAX_BYTES)
+        # The cut connection isn't handed back for reuse
+        self.assertEqual(self.fetch('/page').body, PAGE)
+
+    def test_gzip(self):
+        response = self.fetch('/gzip')
+        self.assertEqual(response.body, PAGE)
+        self.assertFalse(response.truncated)
+
+    def test_gzip_bomb(self):
+        response = self.fetch('/bomb')
+        self.assertTrue(response.truncated)
+        self.assertLessEqual(len(response.body), MAX_BYTES)
+
+
+if __name__ == '__main__':
+    unittest.main()